@@ -1,21 +1,41 @@
-from typing import Optional, List, Dict, Any
+import asyncio
+import functools
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Any, Callable
 from fastapi.middleware.cors import CORSMiddleware
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from pydantic import BaseModel
 
-from backend.privacy.masking import mask_pii, safe_unmask
-from backend.services.user_profile import get_user_profile_light
-from backend.services.store_locator import get_nearby_stores
-from backend.services.offers import get_offers_for_stores
+from backend.privacy.masking import PiiMapping, mask_pii, safe_unmask
+from backend.services.user_context import get_user_context
+from backend.services.location_cache import get_nearby_context
 from backend.llm.agent_intent import get_intents
 from backend.llm.agent_response import get_final_response
+from backend.llm import model_router
+from backend.llm import scheduler as llm_scheduler
+from backend.llm.scheduler import SchedulerRejected
+from backend.services import metrics
+from backend.services.faq_answers import extractive_answer
+from backend.services.keyword_matcher import get_matcher as get_keyword_matcher
+from backend.services.tenants import (
+    DEFAULT_TENANT,
+    Tenant,
+    TenantConfigError,
+    UnknownTenantError,
+    get_tenant,
+    registry_stats,
+    scoped_user_id,
+)
 from backend.services.user_memory import (
-    get_user_profile,
     update_conversation_history,
     set_last_seen_store,
     reset_user,
     reset_all,
+    flush_user_memory,
 )
 
 
@@ -34,11 +54,79 @@ app.add_middleware(
 
 
 
+# ---- FAQ detection + speculative RAG ----
+
+# A keyword hit is only overruled when Agent-1 is at least this sure
+# about an intent that doesn't need FAQ data.
+FAQ_VETO_CONFIDENCE = 0.85
+
+# Vector search runs here while Agent-1 is still thinking.
+_rag_prefetch_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="rag-prefetch")
+
+
+def _looks_like_faq(masked_message: str) -> bool:
+    """
+    Cheap keyword heuristic, available before any LLM call
+    (rules in backend/data/keywords.json, hot-reloaded).
+    """
+    return get_keyword_matcher().looks_like_faq(masked_message)
+
+
+def _intent_wants_faq(intent: Dict[str, Any]) -> bool:
+    if "faq_answer" in (intent.get("required_data") or []):
+        return True
+    return str(intent.get("name") or "").startswith("ASK_")
+
+
+def _agent1_rejects_faq(intents: List[Dict[str, Any]]) -> bool:
+    """
+    True when Agent-1 confidently picked a non-FAQ intent (e.g. "is the
+    return-to-office coffee shop open?"). Fallback intents never veto.
+    """
+    real = [i for i in intents if i.get("category") != "fallback"]
+    if not real or any(_intent_wants_faq(i) for i in real):
+        return False
+    top = max(real, key=lambda i: i.get("confidence") or 0.0)
+    return (top.get("confidence") or 0.0) >= FAQ_VETO_CONFIDENCE
+
+
+def _faq_only_intent(intents: List[Dict[str, Any]]) -> Optional[str]:
+    """
+    If every real intent is a FAQ intent, return the most confident one's
+    name ("" when Agent-1 only produced fallbacks); otherwise None.
+    """
+    real = [i for i in intents if i.get("category") != "fallback"]
+    if any(not _intent_wants_faq(i) for i in real):
+        return None
+    if not real:
+        return ""
+    return max(real, key=lambda i: i.get("confidence") or 0.0).get("name") or ""
+
+
+def _rag_lookup(question: str, tenant: Optional[Tenant] = None) -> List[Dict[str, Any]]:
+    if tenant is not None:
+        return tenant.rag_query(question, top_k=3)
+    from backend.services.rag_service import rag_query  # import here to avoid cycles
+    return rag_query(question, top_k=3)
+
+
+def _resolve_tenant(tenant_id: Optional[str]) -> Tenant:
+    try:
+        return get_tenant(tenant_id)
+    except UnknownTenantError:
+        raise HTTPException(status_code=404, detail=f"unknown tenant: {tenant_id}")
+    except TenantConfigError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+
 class ChatRequest(BaseModel):
     user_id: str
     message: str
     lat: Optional[float] = None
     lng: Optional[float] = None
+    tenant_id: str = DEFAULT_TENANT  # brand; see backend/services/tenants.py
+    batch: bool = False  # offline / batch job: its LLM calls queue behind interactive turns
+    timeout_s: Optional[float] = None  # client timeout; LLM calls still queued past it are dropped (503)
 
 
 class StoreSummary(BaseModel):
@@ -56,77 +144,212 @@ class ChatResponse(BaseModel):
     debug: Optional[Dict[str, Any]] = None  # you can disable/remove this for prod
 
 
+# "background" (default): after startup, warm imports / memory / RAG / FAQ
+# index in a thread so /health answers at once and the first turn is fast.
+# "off": everything loads lazily on first use.
+WARM_ON_STARTUP = os.getenv("WARM_ON_STARTUP", "background").strip().lower()
+
+
+@app.on_event("startup")
+def _warm_in_background():
+    if WARM_ON_STARTUP != "background":
+        return
+    from backend.warm import IN_PROCESS_STEPS, warm
+
+    threading.Thread(
+        target=warm, args=(IN_PROCESS_STEPS,), name="warm-up", daemon=True
+    ).start()
+
+
+@app.on_event("shutdown")
+def _flush_memory_on_shutdown():
+    flush_user_memory()
+
+
 @app.get("/health")
 def health_check():
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+def metrics_endpoint():
+    data = metrics.snapshot()
+    data["rag_speculation_hit_rate"] = metrics.ratio(
+        "rag_speculation.hit", "rag_speculation.started"
+    )
+    data["location_cache_hit_rate"] = metrics.ratio(
+        "location_cache.hit", "location_cache.lookups"
+    )
+    data["llm_coalesced_rate"] = metrics.ratio("llm.coalesced", "llm.calls")
+    data["llm_routing"] = model_router.routing_stats()
+    data["tenants"] = registry_stats()
+    data["llm_scheduler"] = llm_scheduler.scheduler_stats()
+    data["ws_open"] = metrics.get_counter("ws.opened") - metrics.get_counter("ws.closed")
+    return data
+
+
+class ChatSession:
+    """
+    State kept for one /ws/chat connection and reused across its turns:
+    - pii_map: PII tokens stay stable for the whole conversation
+    - the current location, so turns don't need to resend it
+    - the tenant (brand) the connection talks to
+    """
+
+    def __init__(
+        self,
+        user_id: str,
+        lat: Optional[float] = None,
+        lng: Optional[float] = None,
+        tenant_id: str = DEFAULT_TENANT,
+    ):
+        self.user_id = user_id
+        self.lat = lat
+        self.lng = lng
+        self.tenant_id = tenant_id
+        self.pii_map: PiiMapping = {}
+
+    @property
+    def tenant(self) -> Tenant:
+        # Looked up per turn so the registry's LRU sees the use (and an
+        # evicted tenant is reloaded)
+        return get_tenant(self.tenant_id)
+
+    def set_location(self, lat: Optional[float], lng: Optional[float]):
+        self.lat = lat
+        self.lng = lng
+
+    def user_context(self):
+        # Cached per user and invalidated by user_memory, so this is a dict lookup
+        return get_user_context(scoped_user_id(self.tenant_id, self.user_id))
+
+
 @app.post("/chat", response_model=ChatResponse)
 def chat_endpoint(payload: ChatRequest):
+    tenant = _resolve_tenant(payload.tenant_id)
+    try:
+        return _run_chat_turn(
+            payload.user_id, payload.message, payload.lat, payload.lng,
+            tenant=tenant, batch=payload.batch, timeout_s=payload.timeout_s,
+        )
+    except SchedulerRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+
+def _run_chat_turn(
+    user_id: str,
+    message: str,
+    lat: Optional[float],
+    lng: Optional[float],
+    session: Optional[ChatSession] = None,
+    on_delta: Optional[Callable[[str], None]] = None,
+    tenant: Optional[Tenant] = None,
+    batch: bool = False,
+    timeout_s: Optional[float] = None,
+) -> ChatResponse:
     """
-    Main chat entrypoint:
+    Main chat pipeline (shared by POST /chat and /ws/chat):
+    - Resolve the tenant (brand): catalogs, RAG collection, prompts
+    - Fetch store + offer context (cached per location cell)
+    - Schedule: the turn's LLM calls queue by user, priority class and deadline
     - Mask PII
     - Agent-1: get intents
-    - Fetch store + offer context
-    - Agent-2: compose response
+    - Agent-2: compose response (streamed to on_delta if given)
     - Optional safe unmask
     """
-    user_id = payload.user_id
-    message = payload.message
-    lat = payload.lat
-    lng = payload.lng
+    # 1) Get profiles: one cached snapshot holding the persistent profile
+    # (preferences, history, last order, etc.) and the lightweight profile
+    # (from users.json), pre-serialized for the prompts.
+    # Memory is per tenant: "brewco:alice" and "alice" are different users.
+    if tenant is None:
+        tenant = session.tenant if session else get_tenant()
+    memory_user_id = scoped_user_id(tenant.tenant_id, user_id)
+    metrics.incr(f"tenant.{tenant.tenant_id}.turns")
+    user_ctx = session.user_context() if session else get_user_context(memory_user_id)
+
+    # 1b) Store + offer context for the position. It comes from the
+    # location-cell cache (which also covers a socket session asking again
+    # from the same spot) and doesn't depend on the intents, so it's fetched
+    # up front: the nearest store's distance decides the scheduling class.
+    candidate_stores, offers = get_nearby_context(
+        lat, lng, user_ctx.loyalty_tier, tenant=tenant
+    )
+    nearest_m = None
+    if lat is not None and lng is not None and candidate_stores:
+        nearest_m = candidate_stores[0]["distance_m"]  # without a position every store says 0 m
+
+    # 1c) LLM scheduling: Gold members and in-store users first, batch jobs
+    # last, fair across users; raises SchedulerRejected when dropped.
+    priority = llm_scheduler.priority_class(user_ctx.loyalty_tier, nearest_m, batch=batch)
+    with llm_scheduler.request_context(memory_user_id, priority, timeout_s):
+        return _chat_pipeline(
+            message, lat, lng, tenant, memory_user_id, user_ctx,
+            candidate_stores, offers, session, on_delta,
+        )
 
-    # 1) Get profiles
-    # Persistent profile (preferences, history, last order, etc.)
-    persistent_profile = get_user_profile(user_id)
-    # Lightweight profile (for LLM context, from users.json)
-    user_profile = get_user_profile_light(user_id)
+
+def _chat_pipeline(
+    message: str,
+    lat: Optional[float],
+    lng: Optional[float],
+    tenant: Tenant,
+    memory_user_id: str,
+    user_ctx,
+    candidate_stores: List[Dict[str, Any]],
+    offers: List[Dict[str, Any]],
+    session: Optional[ChatSession],
+    on_delta: Optional[Callable[[str], None]],
+) -> ChatResponse:
+    user_profile = user_ctx.profile_light
 
 
     # 2) Mask PII in the user message
-    masked_message, pii_map = mask_pii(message)
+    masked_message, pii_map = mask_pii(message, session.pii_map if session else None)
+
+    # 2b) Speculative RAG: start retrieval now if the keywords say FAQ,
+    # so it overlaps with the Agent-1 call instead of following it.
+    heuristic_faq = _looks_like_faq(masked_message)
+    rag_future = None
+    if heuristic_faq:
+        rag_future = _rag_prefetch_pool.submit(_rag_lookup, masked_message, tenant)
+        metrics.incr("rag_speculation.started")
 
-        # 3) Agent-1: generate intents
+    # 3) Agent-1: generate intents
     intent_input = {
         "user_message": masked_message,
         "user_profile": user_profile,
         "location": {"lat": lat, "lng": lng},
+        "user_context": user_ctx,
     }
-    intents_result = get_intents(intent_input)
+    intents_result = get_intents(intent_input, system_prompt=tenant.prompt("intent"))
     intents = intents_result.get("intents", [])
 
     # ---- Decide if this looks like a FAQ / policy question ----
-    user_lower = masked_message.lower()
-    heuristic_faq = any(
-        kw in user_lower
-        for kw in [
-            "return", "refund", "return policy", "shipping",
-            "delivery", "loyalty", "membership", "points",
-            "allergen", "allergy", "wifi", "wi-fi", "terms"
-        ]
-    )
-
     # If Agent-1 explicitly asks for FAQ data, respect that too
     explicit_faq = any(
         "faq_answer" in (i.get("required_data") or [])
         for i in intents
     )
 
-    needs_faq = heuristic_faq or explicit_faq
+    needs_faq = explicit_faq or (heuristic_faq and not _agent1_rejects_faq(intents))
 
-    # 4) Fetch store context based on location + intents
-    candidate_stores = get_nearby_stores(lat, lng, intents=intents)
-
-    # 5) Fetch offers for those stores
-    offers = get_offers_for_stores(user_id, candidate_stores)
+    # 4-5) Store + offer context was fetched before scheduling (1b)
 
     # 6) RAG: if this is FAQ-ish, query vector store
     rag_snippets = []
     if needs_faq:
-        from backend.services.rag_service import rag_query  # import here to avoid cycles
-        rag_snippets = rag_query(masked_message, top_k=3)
+        if rag_future is not None:
+            rag_snippets = rag_future.result()
+            metrics.incr("rag_speculation.hit")
+        else:
+            rag_snippets = _rag_lookup(masked_message, tenant)
+            metrics.incr("rag_speculation.missed")
         # For FAQ/policy questions, we usually don't want store recommendations
         candidate_stores = []
+    elif rag_future is not None:
+        # Agent-1 overruled the keywords: drop the speculative retrieval
+        rag_future.cancel()
+        metrics.incr("rag_speculation.discarded")
 
     # 7) Bundle context for Agent-2
     context_bundle = {
@@ -134,15 +357,32 @@ def chat_endpoint(payload: ChatRequest):
         "intents": intents,
         "location": {"lat": lat, "lng": lng},
         "candidate_stores": candidate_stores,
-        "user_profile_light": user_profile,
-        "user_profile_persistent": persistent_profile,
+        "user_context": user_ctx,  # spliced in as user_profile_light/_persistent
         "offers": offers,
         "rag_snippets": rag_snippets,
     }
 
 
 
-    response_result = get_final_response(context_bundle)
+    # 7b) Pure policy question + confident retrieval: answer extractively, skip Agent-2
+    response_result = None
+    if needs_faq and rag_snippets:
+        faq_intent = _faq_only_intent(intents)
+        if faq_intent is not None:
+            response_result = extractive_answer(
+                masked_message,
+                rag_snippets,
+                selected_intent=faq_intent or None,
+                category_index=tenant.faq_index(),
+            )
+            if response_result is not None:
+                metrics.incr("faq_extractive.answered")
+                metrics.incr(f"tenant.{tenant.tenant_id}.faq_extractive")
+
+    if response_result is None:
+        response_result = get_final_response(
+            context_bundle, on_delta=on_delta, system_prompt=tenant.prompt("response")
+        )
 
     reply_text = response_result.get("reply", "")
     selected_intent = response_result.get("selected_intent")
@@ -151,8 +391,6 @@ def chat_endpoint(payload: ChatRequest):
     # 7) Safe unmask (currently unmask everything; you can restrict kinds later)
     reply_unmasked = safe_unmask(reply_text, pii_map)
 
-    update_conversation_history(user_id, message, reply_unmasked)
-
     # 8) Build selected_store summary
     store_summary_obj: Optional[StoreSummary] = None
     if selected_store_id and candidate_stores:
@@ -167,13 +405,17 @@ def chat_endpoint(payload: ChatRequest):
                 )
                 break
     
-    # 9) Update user memory (conversation history + last seen store)
-    update_conversation_history(user_id, message, reply_unmasked)
+    # 9) Update user memory (conversation history + last seen store).
+    # In-memory update is immediate; the durable log is written behind.
+    # History keeps the masked texts only: it's persisted to disk and fed
+    # back into later prompts, so raw phone numbers / emails / order ids
+    # must not end up in it.
+    update_conversation_history(memory_user_id, masked_message, reply_text)
 
     if store_summary_obj is not None:
         # store a slim version of the selected store
         set_last_seen_store(
-            user_id,
+            memory_user_id,
             {
                 "id": store_summary_obj.id,
                 "name": store_summary_obj.name,
@@ -192,6 +434,8 @@ def chat_endpoint(payload: ChatRequest):
         selected_store=store_summary_obj,
         debug={
             "intents": intents,
+            "intent_model": intents_result.get("model"),
+            "tenant_id": tenant.tenant_id,
             "candidate_stores": candidate_stores,
             "offers": offers,
             "raw_response": response_result,
@@ -199,9 +443,10 @@ def chat_endpoint(payload: ChatRequest):
     )
 
 @app.post("/reset_user/{user_id}")
-def reset_user_endpoint(user_id: str):
-    reset_user(user_id)
-    return {"status": "ok", "user_id": user_id}
+def reset_user_endpoint(user_id: str, tenant_id: str = DEFAULT_TENANT):
+    tenant = _resolve_tenant(tenant_id)
+    reset_user(scoped_user_id(tenant.tenant_id, user_id))
+    return {"status": "ok", "user_id": user_id, "tenant_id": tenant.tenant_id}
 
 
 @app.post("/reset_all")
@@ -210,6 +455,189 @@ def reset_all_endpoint():
     return {"status": "ok"}
 
 
+# ---- WebSocket chat: persistent connection, per-session state, streamed replies ----
+
+WS_HEARTBEAT_INTERVAL_S = 20.0
+WS_IDLE_TIMEOUT_S = 60.0      # close if the client sent nothing (not even a pong) this long
+WS_MAX_PENDING_TURNS = 4      # queued messages per connection before we answer "busy"
+
+
+class _DeltaUnmasker:
+    """
+    Unmask streamed reply text. A PII token may arrive split across chunks
+    ("[PHO" + "NE_1]"), so anything after an unclosed "[" is held back.
+    """
+
+    def __init__(self, pii_map: PiiMapping, emit: Callable[[str], None]):
+        self.pii_map = pii_map
+        self.emit = emit
+        self._pending = ""
+
+    def __call__(self, chunk: str):
+        self._pending += chunk
+        cut = self._pending.rfind("[")
+        if cut != -1 and "]" not in self._pending[cut:]:
+            ready, self._pending = self._pending[:cut], self._pending[cut:]
+        else:
+            ready, self._pending = self._pending, ""
+        if ready:
+            self.emit(safe_unmask(ready, self.pii_map))
+
+    def flush(self):
+        if self._pending:
+            self.emit(safe_unmask(self._pending, self.pii_map))
+            self._pending = ""
+
+
+@app.websocket("/ws/chat")
+async def ws_chat_endpoint(websocket: WebSocket):
+    """
+    Client -> server messages (JSON):
+      {"type": "hello", "user_id": "...", "lat": 12.97, "lng": 77.59, "tenant_id"?: "..."}   once, first
+      {"type": "chat", "id": 1, "message": "...", "lat"?: ..., "lng"?: ...}
+      {"type": "location", "lat": ..., "lng": ...}
+      {"type": "ping"} / {"type": "pong"}
+    Server -> client:
+      {"type": "ready"}, {"type": "delta", "id", "text"}, {"type": "final", "id", ...ChatResponse},
+      {"type": "error", "id"?, "error"}, {"type": "ping"} / {"type": "pong"}
+    """
+    await websocket.accept()
+    metrics.incr("ws.opened")
+    loop = asyncio.get_running_loop()
+
+    session: Optional[ChatSession] = None
+    last_seen = loop.time()
+    send_lock = asyncio.Lock()
+    pending: asyncio.Queue = asyncio.Queue(maxsize=WS_MAX_PENDING_TURNS)
+
+    async def send(obj: Dict[str, Any]):
+        async with send_lock:
+            await websocket.send_json(obj)
+
+    async def run_turn(turn_id: Any, text: str):
+        deltas: asyncio.Queue = asyncio.Queue()
+        unmasker = _DeltaUnmasker(
+            session.pii_map, lambda t: loop.call_soon_threadsafe(deltas.put_nowait, t)
+        )
+        fut = loop.run_in_executor(
+            None,
+            functools.partial(
+                _run_chat_turn,
+                session.user_id, text, session.lat, session.lng,
+                session=session, on_delta=unmasker,
+            ),
+        )
+
+        # Forward deltas while the pipeline runs. Whatever piled up while the
+        # previous frame was being sent goes out as one frame, so a slow
+        # client gets fewer, bigger frames instead of an unbounded backlog.
+        while True:
+            getter = asyncio.ensure_future(deltas.get())
+            done, _ = await asyncio.wait({fut, getter}, return_when=asyncio.FIRST_COMPLETED)
+            if getter not in done:
+                getter.cancel()
+                break
+            chunk = getter.result()
+            while not deltas.empty():
+                chunk += deltas.get_nowait()
+            await send({"type": "delta", "id": turn_id, "text": chunk})
+
+        try:
+            result: ChatResponse = fut.result()
+        except Exception as e:
+            await send({"type": "error", "id": turn_id, "error": str(e)})
+            return
+
+        unmasker.flush()
+        await asyncio.sleep(0)  # let the flush callback land in the queue
+        tail = ""
+        while not deltas.empty():
+            tail += deltas.get_nowait()
+        if tail:
+            await send({"type": "delta", "id": turn_id, "text": tail})
+
+        final = result.model_dump()
+        final.update({"type": "final", "id": turn_id})
+        await send(final)
+
+    async def worker():
+        # One turn at a time per connection, in arrival order
+        while True:
+            turn_id, text = await pending.get()
+            await run_turn(turn_id, text)
+
+    async def heartbeat():
+        while True:
+            await asyncio.sleep(WS_HEARTBEAT_INTERVAL_S)
+            if loop.time() - last_seen > WS_IDLE_TIMEOUT_S:
+                await websocket.close(code=1001)
+                return
+            await send({"type": "ping"})
+
+    tasks = [asyncio.create_task(worker()), asyncio.create_task(heartbeat())]
+    try:
+        while True:
+            raw = await websocket.receive_text()
+            last_seen = loop.time()
+            try:
+                msg = json.loads(raw)
+            except json.JSONDecodeError:
+                await send({"type": "error", "error": "invalid JSON"})
+                continue
+            if not isinstance(msg, dict):
+                await send({"type": "error", "error": "expected a JSON object"})
+                continue
+
+            mtype = msg.get("type")
+            if mtype == "ping":
+                await send({"type": "pong"})
+            elif mtype == "pong":
+                pass
+            elif mtype == "hello":
+                if not msg.get("user_id"):
+                    await send({"type": "error", "error": "hello needs user_id"})
+                    continue
+                try:
+                    tenant = get_tenant(msg.get("tenant_id"))
+                except UnknownTenantError:
+                    await send({"type": "error", "error": f"unknown tenant: {msg.get('tenant_id')}"})
+                    continue
+                except TenantConfigError as e:
+                    await send({"type": "error", "error": str(e)})
+                    continue
+                if (session is None or session.user_id != msg["user_id"]
+                        or session.tenant_id != tenant.tenant_id):
+                    session = ChatSession(msg["user_id"], tenant_id=tenant.tenant_id)
+                session.set_location(msg.get("lat"), msg.get("lng"))
+                await send({"type": "ready"})
+            elif session is None:
+                await send({"type": "error", "error": "send hello first"})
+            elif mtype == "location":
+                session.set_location(msg.get("lat"), msg.get("lng"))
+            elif mtype == "chat":
+                turn_id = msg.get("id")
+                if not msg.get("message"):
+                    await send({"type": "error", "id": turn_id, "error": "empty message"})
+                    continue
+                if "lat" in msg or "lng" in msg:
+                    session.set_location(msg.get("lat"), msg.get("lng"))
+                try:
+                    pending.put_nowait((turn_id, msg["message"]))
+                except asyncio.QueueFull:
+                    await send({"type": "error", "id": turn_id, "error": "busy"})
+            else:
+                await send({"type": "error", "error": f"unknown type: {mtype}"})
+    except (WebSocketDisconnect, RuntimeError):
+        # RuntimeError: receive after the heartbeat closed an idle socket
+        pass
+    finally:
+        for t in tasks:
+            t.cancel()
+        metrics.incr("ws.closed")  # before awaiting: the server may be cancelling us too
+        # A turn already in the executor finishes there; nothing is sent for it
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
 if __name__ == "__main__":
     import uvicorn
 
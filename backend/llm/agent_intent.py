@@ -1,10 +1,13 @@
 import json
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
-import ollama
+from backend.llm import client as llm_client
+from backend.llm import model_router
+from backend.services.keyword_matcher import get_matcher as get_keyword_matcher
+from backend.services.user_context import intent_profile, splice_json
 
 
-MODEL_NAME = "llama3.1"  # make sure you've pulled this in Ollama
+MODEL_NAME = model_router.LARGE_MODEL  # make sure you've pulled this (and LLM_SMALL_MODEL) in Ollama
 
 
 INTENT_SYSTEM_PROMPT = """
@@ -12,7 +15,7 @@ You are an Intent Classification and Task Routing engine for a hyper-personalize
 
 You will receive:
 - the user's MASKED message (no raw PII),
-- light user profile,
+- light user profile (loyalty tier),
 - user location (lat/lng may be null).
 
 Your job:
@@ -43,49 +46,96 @@ CRITICAL RULES:
 """
 
 
-def get_intents(payload: Dict[str, Any]) -> Dict[str, Any]:
+def _call_model(model: str, messages: List[Dict[str, str]], options: Dict[str, Any]) -> Optional[Any]:
     """
-    Agent-1: call llama3.1 to get top-N intents as JSON.
+    One Agent-1 generation; returns the parsed JSON or None if it isn't JSON.
+    """
+    # Identical concurrent prompts share one Ollama call
+    resp = llm_client.chat(model, messages, options)
+    content = resp["message"]["content"].strip()
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError:
+        return None
+
+
+def get_intents(
+    payload: Dict[str, Any],
+    model: Optional[str] = None,
+    system_prompt: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Agent-1: get top-N intents as JSON (small model, escalating to llama3.1).
     payload:
       {
         "user_message": str,
         "user_profile": {...},
-        "location": {"lat": float | None, "lng": float | None}
+        "location": {"lat": float | None, "lng": float | None},
+        "user_context": UserContextSnapshot (optional, replaces user_profile)
       }
+    The result carries the model that produced it under "model".
+    `system_prompt` replaces INTENT_SYSTEM_PROMPT (per-tenant templates).
     """
     user_message = payload.get("user_message", "")
     user_profile = payload.get("user_profile", {})
     location = payload.get("location", {})
-
-    user_prompt = {
-        "user_message_masked": user_message,
-        "user_profile_light": user_profile,
-        "location": location,
-    }
-
-    # Call llama3.1 via Ollama
-    resp = ollama.chat(
-        model=MODEL_NAME,
-        messages=[
-            {"role": "system", "content": INTENT_SYSTEM_PROMPT},
+    user_context = payload.get("user_context")
+
+    # No user_id / name in the prompt: the same question from two users is
+    # the same request and is coalesced into one generation.
+    if user_context is not None:
+        user_content = splice_json(
+            [("user_profile_light", user_context.intent_json)],
+            {"user_message_masked": user_message, "location": location},
+        )
+    else:
+        user_content = json.dumps(
             {
-                "role": "user",
-                "content": json.dumps(user_prompt, ensure_ascii=False),
+                "user_profile_light": intent_profile(user_profile),
+                "user_message_masked": user_message,
+                "location": location,
             },
-        ],
-        options={
-            "temperature": 0.2,  # more deterministic
-        },
-    )
-
-    content = resp["message"]["content"].strip()
+            ensure_ascii=False,
+        )
+
+    messages = [
+        {"role": "system", "content": system_prompt or INTENT_SYSTEM_PROMPT},
+        {"role": "user", "content": user_content},
+    ]
+    options = {
+        "temperature": 0.2,  # more deterministic
+    }
 
-    # Try to parse JSON robustly
+    # Small model first; rerun on the large one if its output is unusable.
+    # An explicit `model` (tier comparisons) skips routing.
+    routed = model is None
+    if routed:
+        model = model_router.choose_intent_model()
+    model_router.record_choice("intent", model)
+    small = routed and model != model_router.LARGE_MODEL
     try:
-        data = json.loads(content)
-    except json.JSONDecodeError:
-        # Last-ditch fallback: wrap in a default if something goes wrong
-        # so the rest of the pipeline doesn't break.
+        data = _call_model(model, messages, options)
+    except Exception as e:
+        # e.g. the small model isn't pulled: the large one takes the call
+        if not (small and model_router.escalate_on_error("intent", e)):
+            raise
+        data, reason = None, "error"
+    else:
+        reason = model_router.intent_escalation_reason(data) if small else None
+        if reason is not None:
+            model_router.record_escalation("intent", reason)
+
+    if reason is not None:
+        model = model_router.LARGE_MODEL
+        model_router.record_choice("intent", model)
+        data = _call_model(model, messages, options)
+
+    if not isinstance(data, dict):
+        # Last-ditch fallback: keyword rules if they recognise the message,
+        # otherwise a default, so the rest of the pipeline doesn't break.
+        local = get_keyword_matcher().local_intents(user_message)
+        if local:
+            return {"intents": local[:5], "model": model}
         return {
             "intents": [
                 {
@@ -95,7 +145,8 @@ def get_intents(payload: Dict[str, Any]) -> Dict[str, Any]:
                     "required_data": [],
                     "category": "fallback",
                 }
-            ]
+            ],
+            "model": model,
         }
 
     # Minimal safety checks
@@ -113,4 +164,5 @@ def get_intents(payload: Dict[str, Any]) -> Dict[str, Any]:
 
     # Always limit to 5
     data["intents"] = intents[:5]
+    data["model"] = model
     return data
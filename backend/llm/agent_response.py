@@ -1,10 +1,13 @@
 import json
-from typing import Dict, Any, List, Optional
+import re
+from typing import Dict, Any, List, Optional, Callable, Tuple
 
-import ollama
+from backend.llm import client as llm_client
+from backend.llm import model_router
+from backend.services.user_context import splice_json
 
 
-MODEL_NAME = "llama3.1"  # same as Agent-1; keep consistent
+MODEL_NAME = model_router.LARGE_MODEL  # same as Agent-1; keep consistent
 
 
 RESPONSE_SYSTEM_PROMPT = """
@@ -94,36 +97,183 @@ def _heuristic_choose_store(stores: List[Dict[str, Any]]) -> Optional[Dict[str,
     return stores[0]
 
 
-def get_final_response(context_bundle: Dict[str, Any]) -> Dict[str, Any]:
+def _scan_json_string(raw: str) -> Tuple[Optional[int], int]:
     """
-    Agent-2: call llama3.1 with the context bundle,
-    ask it to select intent + store + craft final message.
+    Scan the body of a JSON string (after the opening quote).
+    Returns (index of the closing quote or None, length that is safe to decode).
+    """
+    i = 0
+    n = len(raw)
+    while i < n:
+        c = raw[i]
+        if c == "\\":
+            step = 6 if raw[i + 1:i + 2] == "u" else 2
+            if i + step > n:
+                return None, i  # escape sequence not complete yet
+            i += step
+            continue
+        if c == '"':
+            return i, i
+        i += 1
+    return None, n
+
+
+class _ReplyStreamExtractor:
+    """
+    Pull the "reply" string out of Agent-2's JSON while it is still streaming.
+    feed() returns the newly available reply text (already unescaped).
+    """
+
+    _KEY_RE = re.compile(r'"reply"\s*:\s*"')
+
+    def __init__(self):
+        self._buf = ""
+        self._start: Optional[int] = None
+        self._emitted = 0
+        self._done = False
+
+    def feed(self, chunk: str) -> str:
+        self._buf += chunk
+        if self._done:
+            return ""
+        if self._start is None:
+            m = self._KEY_RE.search(self._buf)
+            if not m:
+                return ""
+            self._start = m.end()
+
+        raw = self._buf[self._start:]
+        end, safe = _scan_json_string(raw)
+        if end is not None:
+            self._done = True
+        try:
+            text = json.loads('"' + raw[:safe] + '"')
+        except ValueError:
+            return ""
+        new = text[self._emitted:]
+        self._emitted = len(text)
+        return new
+
+
+def _chat_streaming(model: str, messages: List[Dict[str, str]], options: Dict[str, Any],
+                    on_delta: Callable[[str], None]) -> Dict[str, Any]:
+    """
+    Stream the completion, forwarding reply text to on_delta as it arrives.
+    Returns the same {"message": {"content": ...}} shape as ollama.chat().
+    """
+    extractor = _ReplyStreamExtractor()
+
+    def on_chunk(piece: str):
+        delta = extractor.feed(piece)
+        if delta:
+            on_delta(delta)
+
+    return llm_client.chat(model, messages, options, on_chunk=on_chunk)
+
+
+def _call_model(
+    model: str,
+    messages: List[Dict[str, str]],
+    options: Dict[str, Any],
+    on_delta: Optional[Callable[[str], None]],
+) -> Optional[Any]:
+    """
+    One Agent-2 generation; returns the parsed JSON or None if it isn't JSON.
+    """
+    # Identical concurrent prompts share one Ollama call
+    if on_delta is not None:
+        resp = _chat_streaming(model, messages, options, on_delta)
+    else:
+        resp = llm_client.chat(model, messages, options)
+    content = resp["message"]["content"].strip()
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError:
+        return None
+
+
+def get_final_response(
+    context_bundle: Dict[str, Any],
+    on_delta: Optional[Callable[[str], None]] = None,
+    model: Optional[str] = None,
+    system_prompt: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Agent-2: call the routed model (small for simple turns, llama3.1 otherwise)
+    with the context bundle, ask it to select intent + store + craft final message.
+    An explicit `model` skips routing; `system_prompt` replaces
+    RESPONSE_SYSTEM_PROMPT (per-tenant templates).
+
+    If the bundle carries a "user_context" snapshot, its pre-serialized
+    user_profile_light / user_profile_persistent fragments are spliced in
+    instead of re-serializing the profile dicts.
+
+    If on_delta is given, the model output is streamed and the "reply" text
+    is passed to on_delta piece by piece before the full result is returned.
     """
     # Optionally, we can add a small heuristic hint about best_store
     candidate_stores: List[Dict[str, Any]] = context_bundle.get("candidate_stores", []) or []
     best_store = _heuristic_choose_store(candidate_stores)
     context_bundle["best_store_hint"] = best_store  # purely advisory for the model
 
-    # Call llama via Ollama
-    resp = ollama.chat(
-        model=MODEL_NAME,
-        messages=[
-            {"role": "system", "content": RESPONSE_SYSTEM_PROMPT},
-            {
-                "role": "user",
-                "content": json.dumps(context_bundle, ensure_ascii=False),
-            },
-        ],
-        options={
-            "temperature": 0.3,  # a bit more creative but still stable
-        },
-    )
+    user_context = context_bundle.pop("user_context", None)
+    if user_context is not None:
+        history_turns = user_context.history_turns()
+        user_content = splice_json(
+            [
+                ("user_profile_light", user_context.light_json),
+                ("user_profile_persistent", user_context.persistent_json()),
+            ],
+            context_bundle,
+        )
+    else:
+        history_turns = len((context_bundle.get("user_profile_persistent") or {}).get("history") or [])
+        user_content = json.dumps(context_bundle, ensure_ascii=False)
 
-    content = resp["message"]["content"].strip()
+    messages = [
+        {"role": "system", "content": system_prompt or RESPONSE_SYSTEM_PROMPT},
+        {"role": "user", "content": user_content},
+    ]
+    options = {
+        "temperature": 0.3,  # a bit more creative but still stable
+    }
+
+    routed = model is None
+    if routed:
+        model, _ = model_router.choose_response_model(
+            context_bundle.get("intents") or [], len(user_content), history_turns
+        )
+    model_router.record_choice("response", model)
 
+    streamed = []
+    if on_delta is not None:
+        def forward(text: str):
+            streamed.append(text)
+            on_delta(text)
+    else:
+        forward = None
+
+    # Escalate a failed or bad small-model answer, unless part of its reply
+    # already went out to the client (the heuristic fallback below covers that).
+    small = routed and model != model_router.LARGE_MODEL
     try:
-        data = json.loads(content)
-    except json.JSONDecodeError:
+        data = _call_model(model, messages, options, forward)
+    except Exception as e:
+        # e.g. the small model isn't pulled: the large one takes the call
+        if not (small and not streamed and model_router.escalate_on_error("response", e)):
+            raise
+        data, reason = None, "error"
+    else:
+        reason = model_router.response_escalation_reason(data) if small and not streamed else None
+        if reason is not None:
+            model_router.record_escalation("response", reason)
+
+    if reason is not None:
+        model = model_router.LARGE_MODEL
+        model_router.record_choice("response", model)
+        data = _call_model(model, messages, options, forward)
+
+    if not isinstance(data, dict):
         # Fallback: if model fails JSON, construct basic reply using heuristics
         primary_intent_name = None
         if context_bundle.get("intents"):
@@ -150,6 +300,7 @@ def get_final_response(context_bundle: Dict[str, Any]) -> Dict[str, Any]:
             "selected_store_id": selected_store_id,
             "reasoning": "JSON parsing failed; used local heuristic fallback.",
             "reply": fallback_reply,
+            "model": model,
         }
 
     # Minimal safety: ensure keys exist
@@ -158,4 +309,5 @@ def get_final_response(context_bundle: Dict[str, Any]) -> Dict[str, Any]:
         "selected_store_id": data.get("selected_store_id"),
         "reasoning": data.get("reasoning", ""),
         "reply": data.get("reply", ""),
+        "model": model,
     }
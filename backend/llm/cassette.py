@@ -0,0 +1,111 @@
+# backend/llm/cassette.py
+
+import gzip
+import json
+import os
+import threading
+import time
+from typing import Dict, Any, Iterator, List, Optional
+
+# Record / replay of LLM generations, so prompt and pipeline changes can be
+# measured without a live Ollama.
+#
+#   LLM_CASSETTE_MODE=record  every generation is also written to the cassette
+#   LLM_CASSETTE_MODE=replay  generations come from the cassette only; an
+#                             unrecorded request raises CassetteMiss
+#   LLM_CASSETTE_PATH         gzip'd JSONL file (default bench/cassettes/llm.jsonl.gz)
+#   LLM_CASSETTE_TIMING       replay pacing: "original" (recorded chunk timing)
+#                             or "zero" (no waiting)
+#
+# One line per distinct request (client.request_key), appended as its own
+# gzip member so a crashed recording keeps everything written before it:
+#   {"k": "<sha256>", "m": "llama3.1", "c": ["chunk", ...], "t": [ms, ...]}
+# "t" holds each chunk's arrival time in ms since the request started;
+# non-streamed responses are stored as a single chunk.
+
+CASSETTE_MODE = os.getenv("LLM_CASSETTE_MODE", "off").strip().lower()
+CASSETTE_PATH = os.getenv(
+    "LLM_CASSETTE_PATH",
+    os.path.join(os.path.dirname(__file__), "..", "..", "bench", "cassettes", "llm.jsonl.gz"),
+)
+CASSETTE_TIMING = os.getenv("LLM_CASSETTE_TIMING", "original").strip().lower()
+
+MODES = ("off", "record", "replay")
+TIMINGS = ("original", "zero")
+
+
+class CassetteMiss(LookupError):
+    """
+    Replay mode got a request that was never recorded.
+    """
+
+
+class Cassette:
+    def __init__(self, path: str, mode: str = "replay", timing: str = "original"):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"cassette mode must be record or replay, not {mode!r}")
+        if timing not in TIMINGS:
+            raise ValueError(f"cassette timing must be one of {TIMINGS}, not {timing!r}")
+        self.path = path
+        self.mode = mode
+        self.timing = timing
+        self._lock = threading.Lock()
+        self._records: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            self._load()
+        elif mode == "replay":
+            raise FileNotFoundError(path)
+
+    def _load(self):
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    rec = json.loads(line)
+                    self._records[rec["k"]] = rec
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._records
+
+    def record(self, key: str, model: str, chunks: List[str], times_ms: List[float]):
+        """
+        Store one generation (first recording of a key wins).
+        """
+        rec = {"k": key, "m": model, "c": chunks, "t": [round(t, 1) for t in times_ms]}
+        with self._lock:
+            if key in self._records:
+                return
+            self._records[key] = rec
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.write(json.dumps(rec, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    def play(self, key: str) -> Iterator[str]:
+        """
+        Yield the recorded chunks for `key`, paced per self.timing.
+        """
+        rec = self._records.get(key)
+        if rec is None:
+            raise CassetteMiss(key)
+
+        start = time.perf_counter()
+        for chunk, at_ms in zip(rec["c"], rec["t"]):
+            if self.timing == "original":
+                wait = at_ms / 1000.0 - (time.perf_counter() - start)
+                if wait > 0:
+                    time.sleep(wait)
+            yield chunk
+
+
+def from_env() -> Optional[Cassette]:
+    """
+    The cassette configured by LLM_CASSETTE_*, or None when it's off.
+    """
+    if CASSETTE_MODE == "off":
+        return None
+    if CASSETTE_MODE not in MODES:
+        raise ValueError(f"LLM_CASSETTE_MODE must be one of {MODES}, not {CASSETTE_MODE!r}")
+    return Cassette(CASSETTE_PATH, CASSETTE_MODE, CASSETTE_TIMING)
@@ -0,0 +1,287 @@
+# backend/llm/client.py
+
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Dict, Any, Iterator, List, Optional, Callable
+
+from backend.llm import scheduler
+from backend.llm.scheduler import DeadlineExceeded, SchedulerRejected
+from backend.services import metrics
+
+# Single-flight wrapper around ollama.chat(): concurrent calls with the same
+# canonical request (model, options, messages, stream) share one in-flight
+# generation. The first caller (leader) talks to Ollama; everyone arriving
+# while it runs waits for the same result. Streaming followers get the chunks
+# the leader already received replayed, then the rest live.
+#
+# Nothing is cached after completion: a call that starts after the leader
+# finished triggers a fresh generation.
+#
+# The ollama package (httpx, httpcore, pydantic models) is imported on the
+# first call, not when the API process starts.
+#
+# Generations can be recorded to / replayed from a cassette
+# (LLM_CASSETTE_MODE, see cassette.py); replay never touches Ollama.
+#
+# A leader holds a scheduler slot (scheduler.py) while it generates;
+# followers don't need one but are still admitted under their own request
+# (deadline, rate). A follower lifts the leader's queued class to its own
+# and waits no longer than its own deadline. If the leader's own request is
+# refused a slot, nothing was generated yet: its followers retry and one of
+# them leads instead of all failing with another user's rejection.
+
+_ollama = None  # the ollama module, or an ollama.Client from set_ollama_host()
+
+_cassette_lock = threading.Lock()
+_cassette = None
+_cassette_configured = False
+
+
+def _backend():
+    global _ollama
+    if _ollama is None:
+        import ollama
+        _ollama = ollama
+    return _ollama
+
+
+def set_ollama_host(host: Optional[str]):
+    """
+    Talk to a specific Ollama server (benchmarks, tests);
+    None goes back to the default (OLLAMA_HOST).
+    """
+    global _ollama
+    import ollama
+    _ollama = ollama.Client(host=host) if host else ollama
+
+
+def _get_cassette():
+    global _cassette, _cassette_configured
+    if not _cassette_configured:
+        with _cassette_lock:
+            if not _cassette_configured:
+                from backend.llm.cassette import from_env
+                _cassette = from_env()
+                _cassette_configured = True
+    return _cassette
+
+
+def set_cassette(cassette):
+    """
+    Record to / replay from `cassette` (a cassette.Cassette); None turns
+    record/replay off regardless of LLM_CASSETTE_MODE.
+    """
+    global _cassette, _cassette_configured
+    with _cassette_lock:
+        _cassette = cassette
+        _cassette_configured = True
+
+
+def preload(model: str, keep_alive: str = "30m"):
+    """
+    Ask Ollama to load `model` into memory without generating anything.
+    """
+    cassette = _get_cassette()
+    if cassette is not None and cassette.mode == "replay":
+        return
+    _backend().generate(model=model, prompt="", keep_alive=keep_alive)
+
+
+def request_key(
+    model: str,
+    messages: List[Dict[str, str]],
+    options: Optional[Dict[str, Any]] = None,
+    stream: bool = False,
+) -> str:
+    canonical = json.dumps(
+        {"model": model, "messages": messages, "options": options or {}, "stream": stream},
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _response(model: str, content: str) -> Dict[str, Any]:
+    # Fresh dict per caller so nobody can mutate another caller's result
+    return {"model": model, "message": {"role": "assistant", "content": content}}
+
+
+def _generate(key: str, model: str, messages, options, stream: bool) -> Iterator[str]:
+    """
+    Content chunks of one generation, from Ollama or the cassette.
+    """
+    cassette = _get_cassette()
+    if cassette is not None and cassette.mode == "replay":
+        if key not in cassette:
+            # Same request, recorded streamed instead of non-streamed (or vice versa)
+            key = request_key(model, messages, options, stream=not stream)
+        yield from cassette.play(key)
+        metrics.incr("llm.cassette.replayed")
+        return
+
+    start = time.perf_counter()
+    chunks: List[str] = []
+    times_ms: List[float] = []
+    if stream:
+        pieces = (c["message"]["content"] for c in
+                  _backend().chat(model=model, messages=messages, options=options, stream=True))
+    else:
+        pieces = iter([_backend().chat(model=model, messages=messages, options=options)["message"]["content"]])
+    for piece in pieces:
+        if cassette is not None:
+            chunks.append(piece)
+            times_ms.append((time.perf_counter() - start) * 1000.0)
+        yield piece
+    if cassette is not None:
+        cassette.record(key, model, chunks, times_ms)
+        metrics.incr("llm.cassette.recorded")
+
+
+class _LeaderRejected(Exception):
+    """
+    The leader was refused a scheduler slot; followers should re-join.
+    """
+
+
+class _InFlight:
+    __slots__ = ("cond", "chunks", "done", "future", "ticket")
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.chunks: List[str] = []
+        self.done = False
+        self.future: Future = Future()  # resolves to the full content string
+        self.ticket = scheduler.Ticket()  # the leader's slot claim, boosted by followers
+
+
+_lock = threading.Lock()
+_INFLIGHT: Dict[str, _InFlight] = {}
+
+
+def _join(key: str):
+    """
+    Returns (call, is_leader).
+    """
+    with _lock:
+        call = _INFLIGHT.get(key)
+        if call is not None:
+            return call, False
+        call = _InFlight()
+        _INFLIGHT[key] = call
+        return call, True
+
+
+def _leave(key: str, call: _InFlight):
+    with _lock:
+        if _INFLIGHT.get(key) is call:
+            del _INFLIGHT[key]
+
+
+def _lead(key: str, call: _InFlight, model: str, messages, options,
+          on_chunk: Optional[Callable[[str], None]]):
+    callback_error: Optional[BaseException] = None
+    try:
+        with scheduler.slot(call.ticket):
+            metrics.incr("llm.generations")
+            if on_chunk is None:
+                content = "".join(_generate(key, model, messages, options, stream=False))
+            else:
+                for piece in _generate(key, model, messages, options, stream=True):
+                    with call.cond:
+                        call.chunks.append(piece)
+                        call.cond.notify_all()
+                    if callback_error is None:
+                        # The leader's own consumer failing must not cut the
+                        # generation short for the followers.
+                        try:
+                            on_chunk(piece)
+                        except Exception as e:
+                            callback_error = e
+                content = "".join(call.chunks)
+    except SchedulerRejected:
+        # Refused before generating: the rejection is this caller's alone.
+        # Leave first, so retrying followers register a fresh call.
+        _leave(key, call)
+        call.future.set_exception(_LeaderRejected())
+        raise
+    except BaseException as e:
+        call.future.set_exception(e)
+        raise
+    else:
+        call.future.set_result(content)
+    finally:
+        _leave(key, call)
+        with call.cond:
+            call.done = True
+            call.cond.notify_all()
+    if callback_error is not None:
+        raise callback_error
+    return content
+
+
+def _follower_deadline() -> DeadlineExceeded:
+    metrics.incr("llm.follower_deadline")
+    return DeadlineExceeded("request exceeded its deadline waiting for a shared generation")
+
+
+def _follow(call: _InFlight, timeout: Optional[float]) -> str:
+    try:
+        return call.future.result(timeout=timeout)
+    except FutureTimeout:
+        raise _follower_deadline() from None
+
+
+def _follow_stream(call: _InFlight, on_chunk: Callable[[str], None], timeout: Optional[float]) -> str:
+    deadline = None if timeout is None else time.monotonic() + timeout
+    seen = 0
+    while True:
+        with call.cond:
+            while seen == len(call.chunks) and not call.done:
+                if deadline is None:
+                    call.cond.wait()
+                    continue
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    raise _follower_deadline()
+                call.cond.wait(left)
+            pending = call.chunks[seen:]
+            seen = len(call.chunks)
+            finished = call.done
+        for piece in pending:
+            on_chunk(piece)
+        if finished and seen == len(call.chunks):
+            return call.future.result()
+
+
+def chat(
+    model: str,
+    messages: List[Dict[str, str]],
+    options: Optional[Dict[str, Any]] = None,
+    on_chunk: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Drop-in for ollama.chat(); returns {"model", "message": {"role", "content"}}.
+    With on_chunk, the completion is streamed and every raw content chunk is
+    passed to on_chunk before the full response is returned.
+    """
+    metrics.incr("llm.calls")
+    key = request_key(model, messages, options, stream=on_chunk is not None)
+    while True:
+        call, leader = _join(key)
+        if leader:
+            return _response(model, _lead(key, call, model, messages, options, on_chunk))
+
+        metrics.incr("llm.coalesced")
+        scheduler.follow(call.ticket)
+        timeout = scheduler.time_left()
+        try:
+            if on_chunk is None:
+                return _response(model, _follow(call, timeout))
+            return _response(model, _follow_stream(call, on_chunk, timeout))
+        except _LeaderRejected:
+            metrics.incr("llm.leader_rejected")
+
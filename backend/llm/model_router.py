@@ -0,0 +1,146 @@
+# backend/llm/model_router.py
+
+import os
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+from backend.llm.scheduler import SchedulerRejected
+from backend.services import metrics
+
+# Picks the Ollama model per agent call. Agent-1 always starts on the small
+# model; Agent-2 uses it only for simple turns (one confident intent, short
+# prompt, short conversation). Either agent is re-run on the large model when
+# the small model's JSON fails validation or Agent-1 is not confident.
+#
+# A small-model call that raises (most often: the model was never pulled)
+# is re-run on the large model too, and routing then sends everything to
+# the large model for SMALL_MODEL_RETRY_S before trying the small one again.
+#
+#   LLM_LARGE_MODEL          default "llama3.1"
+#   LLM_SMALL_MODEL          default "llama3.2:3b" (any quantized local tag works)
+#   LLM_ROUTING              "off" sends everything to the large model
+#   LLM_SMALL_MODEL_RETRY_S  default 300
+
+LARGE_MODEL = os.getenv("LLM_LARGE_MODEL", "llama3.1")
+SMALL_MODEL = os.getenv("LLM_SMALL_MODEL", "llama3.2:3b")
+ROUTING_ENABLED = (
+    os.getenv("LLM_ROUTING", "on").strip().lower() not in ("0", "off", "false", "no")
+    and SMALL_MODEL != LARGE_MODEL
+)
+
+INTENT_MIN_CONFIDENCE = 0.6        # small-model Agent-1 below this -> rerun on large
+PLAUSIBLE_INTENT_CONFIDENCE = 0.5  # intents at/above this count as "in play"
+RESPONSE_MIN_CONFIDENCE = 0.8      # Agent-2 small only if the top intent is this sure
+RESPONSE_MAX_PROMPT_CHARS = 6000
+RESPONSE_MAX_HISTORY_TURNS = 6
+SMALL_MODEL_RETRY_S = float(os.getenv("LLM_SMALL_MODEL_RETRY_S", "300"))
+
+_small_model_down_until = 0.0
+
+AGENTS = ("intent", "response")
+
+
+def _confidence(intent: Dict[str, Any]) -> float:
+    try:
+        return float(intent.get("confidence", 0.0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def record_choice(agent: str, model: str):
+    tier = "small" if model != LARGE_MODEL else "large"
+    metrics.incr(f"llm.route.{agent}.{tier}")
+    metrics.incr(f"llm.model.{model}")
+
+
+def record_escalation(agent: str, reason: str):
+    metrics.incr(f"llm.escalate.{agent}")
+    metrics.incr(f"llm.escalate.{agent}.{reason}")
+
+
+def small_model_available() -> bool:
+    return time.monotonic() >= _small_model_down_until
+
+
+def escalate_on_error(agent: str, error: Exception) -> bool:
+    """
+    A small-model call raised: True if the caller should re-run it on the
+    large model. Scheduler rejections (deadline, queue cap) are about the
+    request, not the model, and are not retried.
+    """
+    global _small_model_down_until
+    if isinstance(error, SchedulerRejected):
+        return False
+    _small_model_down_until = time.monotonic() + SMALL_MODEL_RETRY_S
+    metrics.incr("llm.small_model_errors")
+    record_escalation(agent, "error")
+    return True
+
+
+def choose_intent_model() -> str:
+    return SMALL_MODEL if ROUTING_ENABLED and small_model_available() else LARGE_MODEL
+
+
+def intent_escalation_reason(data: Any) -> Optional[str]:
+    """
+    Why Agent-1's parsed output is not good enough (None = accept it).
+    """
+    if not isinstance(data, dict):
+        return "invalid_json"
+    intents = data.get("intents")
+    if not isinstance(intents, list) or not intents:
+        return "no_intents"
+    if not all(isinstance(i, dict) and i.get("name") for i in intents):
+        return "schema"
+    if max(_confidence(i) for i in intents) < INTENT_MIN_CONFIDENCE:
+        return "low_confidence"
+    return None
+
+
+def choose_response_model(
+    intents: List[Dict[str, Any]],
+    prompt_chars: int,
+    history_turns: int,
+) -> Tuple[str, str]:
+    """
+    Returns (model, reason) for Agent-2; reason says why the large model was
+    needed, or "simple" when the small one was picked.
+    """
+    if not ROUTING_ENABLED:
+        return LARGE_MODEL, "routing_off"
+    if not small_model_available():
+        return LARGE_MODEL, "small_model_unavailable"
+    plausible = [i for i in intents or [] if _confidence(i) >= PLAUSIBLE_INTENT_CONFIDENCE]
+    if len(plausible) != 1:
+        return LARGE_MODEL, "multi_intent" if plausible else "no_confident_intent"
+    if _confidence(plausible[0]) < RESPONSE_MIN_CONFIDENCE:
+        return LARGE_MODEL, "low_confidence"
+    if prompt_chars > RESPONSE_MAX_PROMPT_CHARS:
+        return LARGE_MODEL, "large_context"
+    if history_turns > RESPONSE_MAX_HISTORY_TURNS:
+        return LARGE_MODEL, "long_conversation"
+    return SMALL_MODEL, "simple"
+
+
+def response_escalation_reason(data: Any) -> Optional[str]:
+    if not isinstance(data, dict):
+        return "invalid_json"
+    reply = data.get("reply")
+    if not isinstance(reply, str) or not reply.strip():
+        return "schema"
+    return None
+
+
+def routing_stats() -> Dict[str, Any]:
+    """
+    Share of calls per tier and escalation rate of small-model calls, per agent.
+    """
+    out: Dict[str, Any] = {"routing_enabled": ROUTING_ENABLED,
+                           "small_model": SMALL_MODEL, "large_model": LARGE_MODEL,
+                           "small_model_available": small_model_available()}
+    for agent in AGENTS:
+        small = metrics.get_counter(f"llm.route.{agent}.small")
+        large = metrics.get_counter(f"llm.route.{agent}.large")
+        out[f"{agent}_small_share"] = small / (small + large) if small + large else 0.0
+        out[f"{agent}_escalation_rate"] = metrics.ratio(f"llm.escalate.{agent}", f"llm.route.{agent}.small")
+    return out
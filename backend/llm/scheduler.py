@@ -0,0 +1,465 @@
+# backend/llm/scheduler.py
+
+import contextvars
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Tuple
+
+from backend.services import metrics
+
+# Admission control in front of the model server. Every generation that
+# reaches Ollama (the single-flight leader in client.py) first takes one of
+# MAX_CONCURRENCY slots. When none is free, requests wait in a queue:
+#
+# - Priority classes, served strictly in order:
+#     high    Gold members and users standing in a store
+#     normal  everyone else
+#     batch   batch jobs (ChatRequest.batch) and users over their rate
+# - Within a class, weighted fair queueing across users (self-clocked: each
+#   request's finish tag is max(class virtual time, user's last tag) + 1),
+#   so one user with 50 queued requests can't push a newcomer back by 50.
+# - Per-user token buckets (USER_RATE generations/s, USER_BURST burst): a
+#   request beyond the bucket is demoted to the batch class, not rejected.
+# - A user can have at most MAX_QUEUED_PER_USER requests waiting (429 beyond).
+# - Requests whose client timeout (deadline) has passed are dropped from the
+#   queue instead of being generated for nobody (503).
+# - A request coalesced onto another one's generation (client.py followers)
+#   needs no slot but is still charged to its own user via follow(). It
+#   lifts the shared generation's queued class to its own (a Gold follower
+#   doesn't wait behind batch jobs because a batch job asked first), and it
+#   stops waiting at its own deadline (time_left()).
+#
+# Rejection messages reach clients, so they never name the user.
+#
+# The request (user, class, deadline) travels in a contextvar set by
+# request_context() in the chat pipeline, so the agents don't pass it along.
+
+SCHEDULER_ENABLED = os.getenv("LLM_SCHEDULER", "on").strip().lower() not in ("0", "off", "false")
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", os.getenv("OLLAMA_NUM_PARALLEL", "4")))
+USER_RATE = float(os.getenv("LLM_USER_RATE", "1.0"))    # generations per second
+USER_BURST = float(os.getenv("LLM_USER_BURST", "6"))    # a chat turn is 2-3 generations
+MAX_QUEUED_PER_USER = int(os.getenv("LLM_MAX_QUEUED_PER_USER", "8"))
+
+# Client timeout assumed when the request doesn't send one
+DEFAULT_TIMEOUT_S = float(os.getenv("CHAT_TIMEOUT_S", "120"))
+
+# Users within this distance of a store count as in-store
+IN_STORE_RADIUS_M = 75.0
+
+PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_BATCH = 0, 1, 2
+CLASS_NAMES = ("high", "normal", "batch")
+
+WAIT_SAMPLES = 2000  # recent waits kept per class for /metrics percentiles
+
+
+class SchedulerRejected(Exception):
+    status_code = 503
+
+
+class DeadlineExceeded(SchedulerRejected):
+    status_code = 503
+
+
+class UserQueueFull(SchedulerRejected):
+    status_code = 429
+
+
+class RequestContext:
+    __slots__ = ("user_id", "priority", "deadline")
+
+    def __init__(self, user_id: str, priority: int = PRIORITY_NORMAL, deadline: Optional[float] = None):
+        self.user_id = user_id
+        self.priority = priority
+        self.deadline = deadline  # time.monotonic() value, or None
+
+
+_current: "contextvars.ContextVar[Optional[RequestContext]]" = contextvars.ContextVar(
+    "llm_request", default=None
+)
+
+
+@contextmanager
+def request_context(user_id: str, priority: int = PRIORITY_NORMAL, timeout_s: Optional[float] = None):
+    """
+    Attribute the generations made inside the block to `user_id`.
+    The deadline is `timeout_s` (default DEFAULT_TIMEOUT_S) from now.
+    """
+    timeout_s = DEFAULT_TIMEOUT_S if timeout_s is None else timeout_s
+    ctx = RequestContext(user_id, priority, time.monotonic() + timeout_s if timeout_s > 0 else None)
+    token = _current.set(ctx)
+    try:
+        yield ctx
+    finally:
+        _current.reset(token)
+
+
+def current_request() -> Optional[RequestContext]:
+    return _current.get()
+
+
+def priority_class(loyalty_tier: Optional[str], nearest_store_m: Optional[float] = None, batch: bool = False) -> int:
+    if batch:
+        return PRIORITY_BATCH
+    if (loyalty_tier or "").lower() == "gold":
+        return PRIORITY_HIGH
+    if nearest_store_m is not None and nearest_store_m <= IN_STORE_RADIUS_M:
+        return PRIORITY_HIGH
+    return PRIORITY_NORMAL
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def full(self, now: float) -> bool:
+        return self.tokens + (now - self.updated) * self.rate >= self.burst
+
+    def take(self, now: float) -> bool:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))]
+
+
+class _Waiter:
+    __slots__ = ("user_id", "deadline", "enqueued", "cls", "granted", "dropped")
+
+    def __init__(self, user_id: str, deadline: Optional[float], now: float, cls: int):
+        self.user_id = user_id
+        self.deadline = deadline
+        self.enqueued = now
+        self.cls = cls  # heap entries in other classes are stale (boosted)
+        self.granted = False
+        self.dropped = False
+
+
+class Ticket:
+    """
+    One generation's claim on a slot, shared by the leader and the requests
+    coalesced onto it; followers raise its class through it.
+    """
+    __slots__ = ("priority", "waiter")
+
+    def __init__(self):
+        self.priority: Optional[int] = None  # best class among the followers
+        self.waiter: Optional[_Waiter] = None  # set while the leader is queued
+
+
+class Scheduler:
+    """
+    fair=False gives the old behaviour for comparison: one FIFO queue in
+    arrival order, no classes, no buckets (only the concurrency limit).
+    """
+
+    def __init__(
+        self,
+        concurrency: int = MAX_CONCURRENCY,
+        user_rate: float = USER_RATE,
+        user_burst: float = USER_BURST,
+        max_queued_per_user: int = MAX_QUEUED_PER_USER,
+        fair: bool = True,
+    ):
+        self.concurrency = max(1, concurrency)
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.max_queued_per_user = max_queued_per_user
+        self.fair = fair
+
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._queues: List[List[Tuple[float, int, _Waiter]]] = [[] for _ in CLASS_NAMES]
+        self._virtual = [0.0] * len(CLASS_NAMES)
+        self._last_finish: Dict[Tuple[int, str], float] = {}
+        self._queued: Dict[str, int] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._running = 0
+        self._waits = [deque(maxlen=WAIT_SAMPLES) for _ in CLASS_NAMES]
+
+    # ---- admission ----
+
+    def _take_token(self, ctx: RequestContext, now: float) -> bool:
+        bucket = self._buckets.get(ctx.user_id)
+        if bucket is None:
+            if len(self._buckets) > 10000:
+                # Full buckets carry no state worth keeping
+                for uid in [u for u, b in self._buckets.items() if b.full(now)]:
+                    del self._buckets[uid]
+            bucket = self._buckets[ctx.user_id] = TokenBucket(self.user_rate, self.user_burst, now)
+        if bucket.take(now):
+            return True
+        metrics.incr("scheduler.throttled")
+        return False
+
+    def _classify(self, ctx: RequestContext, now: float) -> int:
+        if not self.fair:
+            return PRIORITY_NORMAL
+        return ctx.priority if self._take_token(ctx, now) else PRIORITY_BATCH
+
+    def _finish_tag(self, cls: int, user_id: str, seq: int) -> float:
+        if not self.fair:
+            return float(seq)
+        key = (cls, user_id)
+        tag = max(self._virtual[cls], self._last_finish.get(key, 0.0)) + 1.0
+        self._last_finish[key] = tag
+        return tag
+
+    def _dequeued(self, waiter: _Waiter):
+        left = self._queued.get(waiter.user_id, 1) - 1
+        if left > 0:
+            self._queued[waiter.user_id] = left
+        else:
+            self._queued.pop(waiter.user_id, None)
+            # Nothing queued: the user's old tags are behind the virtual clock
+            for cls in range(len(CLASS_NAMES)):
+                self._last_finish.pop((cls, waiter.user_id), None)
+
+    def _dispatch(self, now: float):
+        """
+        Hand free slots to the best waiters. Caller holds self._cond.
+        """
+        for cls, queue in enumerate(self._queues):
+            while queue and self._running < self.concurrency:
+                tag, _, waiter = heapq.heappop(queue)
+                if waiter.cls != cls or waiter.dropped:
+                    continue
+                if waiter.deadline is not None and now >= waiter.deadline:
+                    waiter.dropped = True
+                    self._dequeued(waiter)
+                    continue
+                self._virtual[cls] = max(self._virtual[cls], tag)
+                waiter.granted = True
+                self._dequeued(waiter)
+                self._running += 1
+                self._waits[cls].append(now - waiter.enqueued)
+        self._cond.notify_all()
+
+    def _check_deadline(self, ctx: RequestContext, now: float):
+        if ctx.deadline is not None and now >= ctx.deadline:
+            metrics.incr("scheduler.dropped_deadline")
+            raise DeadlineExceeded("request exceeded its deadline before queueing")
+
+    def acquire(self, ctx: Optional[RequestContext] = None, ticket: Optional[Ticket] = None):
+        """
+        Block until a slot is free for this request. Raises DeadlineExceeded
+        or UserQueueFull instead of waiting pointlessly. With a ticket, the
+        wait can be moved to a better class by boost().
+        """
+        ctx = ctx or current_request() or RequestContext("anonymous")
+        now = time.monotonic()
+        self._check_deadline(ctx, now)
+        with self._cond:
+            cls = self._classify(ctx, now)
+            if ticket is not None and self.fair and ticket.priority is not None:
+                cls = min(cls, ticket.priority)  # a follower joined before we queued
+            self._wait_for_slot(ctx, cls, now, ticket)
+
+    def follow(self, ctx: Optional[RequestContext] = None, ticket: Optional[Ticket] = None):
+        """
+        Admit a request that shares another request's generation. It takes
+        no slot, but its own deadline and rate still apply: over the rate it
+        first waits for a batch-class turn, like any throttled request.
+        The shared generation (`ticket`) is then lifted to this request's class.
+        """
+        ctx = ctx or current_request() or RequestContext("anonymous")
+        now = time.monotonic()
+        self._check_deadline(ctx, now)
+        with self._cond:
+            if not self.fair:
+                return
+            if self._take_token(ctx, now):
+                cls = ctx.priority
+            else:
+                cls = PRIORITY_BATCH
+                self._wait_for_slot(ctx, cls, now)
+                self._release_locked()
+            if ticket is not None:
+                self._boost(ticket, cls)
+
+    def _boost(self, ticket: Ticket, cls: int):
+        """
+        Priority inheritance: requeue the ticket's waiter in class `cls` if
+        that's better. The old heap entry stays behind as stale (waiter.cls).
+        Caller holds self._cond.
+        """
+        if ticket.priority is not None and ticket.priority <= cls:
+            return
+        ticket.priority = cls
+        waiter = ticket.waiter
+        if waiter is None or waiter.granted or waiter.dropped or waiter.cls <= cls:
+            return
+        waiter.cls = cls
+        seq = next(self._seq)
+        heapq.heappush(self._queues[cls], (self._finish_tag(cls, waiter.user_id, seq), seq, waiter))
+        metrics.incr("scheduler.boosted")
+        self._dispatch(time.monotonic())
+
+    def _wait_for_slot(self, ctx: RequestContext, cls: int, now: float, ticket: Optional[Ticket] = None):
+        """
+        Caller holds self._cond.
+        """
+        if self._running < self.concurrency and not any(self._queues):
+            self._running += 1
+            self._waits[cls].append(0.0)
+            metrics.incr("scheduler.admitted")
+            return
+
+        if self.fair and self._queued.get(ctx.user_id, 0) >= self.max_queued_per_user:
+            metrics.incr("scheduler.rejected_user_queue")
+            raise UserQueueFull(f"too many requests queued for this user (max {self.max_queued_per_user})")
+
+        waiter = _Waiter(ctx.user_id, ctx.deadline, now, cls)
+        if ticket is not None:
+            ticket.waiter = waiter
+        seq = next(self._seq)
+        heapq.heappush(self._queues[cls], (self._finish_tag(cls, ctx.user_id, seq), seq, waiter))
+        self._queued[ctx.user_id] = self._queued.get(ctx.user_id, 0) + 1
+        metrics.incr("scheduler.queued")
+        self._dispatch(now)
+
+        while not waiter.granted:
+            if not waiter.dropped and waiter.deadline is not None and time.monotonic() >= waiter.deadline:
+                waiter.dropped = True  # left in the heap, skipped by _dispatch
+                self._dequeued(waiter)
+            if waiter.dropped:
+                metrics.incr("scheduler.dropped_deadline")
+                raise DeadlineExceeded("request exceeded its deadline in the queue")
+            timeout = None if waiter.deadline is None else max(0.0, waiter.deadline - time.monotonic())
+            self._cond.wait(timeout)
+        metrics.incr("scheduler.admitted")
+        if ticket is not None:
+            ticket.waiter = None
+
+    def release(self):
+        with self._cond:
+            self._release_locked()
+
+    def _release_locked(self):
+        self._running -= 1
+        self._dispatch(time.monotonic())
+
+    @contextmanager
+    def slot(self, ctx: Optional[RequestContext] = None, ticket: Optional[Ticket] = None):
+        self.acquire(ctx, ticket)
+        try:
+            yield
+        finally:
+            self.release()
+
+    # ---- metrics ----
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            depth = {
+                name: sum(1 for _, _, w in self._queues[cls] if w.cls == cls and not w.dropped)
+                for cls, name in enumerate(CLASS_NAMES)
+            }
+            waits = {name: list(self._waits[cls]) for cls, name in enumerate(CLASS_NAMES)}
+            running = self._running
+            users_queued = len(self._queued)
+        return {
+            "enabled": True,
+            "fair": self.fair,
+            "concurrency": self.concurrency,
+            "running": running,
+            "queue_depth": depth,
+            "users_queued": users_queued,
+            "wait_ms": {
+                name: {
+                    "p50": _percentile(w, 50) * 1000.0,
+                    "p95": _percentile(w, 95) * 1000.0,
+                    "samples": len(w),
+                }
+                for name, w in waits.items()
+            },
+            "admitted": metrics.get_counter("scheduler.admitted"),
+            "throttled": metrics.get_counter("scheduler.throttled"),
+            "dropped_deadline": metrics.get_counter("scheduler.dropped_deadline"),
+            "boosted": metrics.get_counter("scheduler.boosted"),
+            "rejected_user_queue": metrics.get_counter("scheduler.rejected_user_queue"),
+        }
+
+
+_scheduler_lock = threading.Lock()
+_scheduler: Optional[Scheduler] = None
+
+
+def get_scheduler() -> Optional[Scheduler]:
+    """
+    The process-wide scheduler, or None when LLM_SCHEDULER=off.
+    """
+    global _scheduler
+    if not SCHEDULER_ENABLED:
+        return None
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = Scheduler()
+    return _scheduler
+
+
+def configure(scheduler: Optional[Scheduler]):
+    """
+    Swap the process-wide scheduler (benchmarks, tests); None -> defaults.
+    """
+    global _scheduler
+    with _scheduler_lock:
+        _scheduler = scheduler
+
+
+@contextmanager
+def slot(ticket: Optional[Ticket] = None):
+    """
+    Hold a model-server slot for one generation (no-op when disabled).
+    """
+    scheduler = get_scheduler()
+    if scheduler is None:
+        yield
+        return
+    with scheduler.slot(ticket=ticket):
+        yield
+
+
+def follow(ticket: Optional[Ticket] = None):
+    """
+    Admit a request that coalesced onto another one's generation (no-op
+    when disabled); see Scheduler.follow().
+    """
+    scheduler = get_scheduler()
+    if scheduler is not None:
+        scheduler.follow(ticket=ticket)
+
+
+def time_left() -> Optional[float]:
+    """
+    Seconds until the current request's deadline; None without a deadline
+    or when the scheduler is disabled.
+    """
+    ctx = current_request()
+    if get_scheduler() is None or ctx is None or ctx.deadline is None:
+        return None
+    return max(0.0, ctx.deadline - time.monotonic())
+
+
+def scheduler_stats() -> Dict[str, Any]:
+    scheduler = get_scheduler()
+    return scheduler.stats() if scheduler is not None else {"enabled": False}
@@ -16,21 +16,28 @@ def _mask_pattern(
     kind: str,
     mapping: PiiMapping,
     counter: Dict[str, int],
+    known: Optional[Dict[Tuple[str, str], str]] = None,
 ) -> str:
     """
     Internal helper to mask all matches of a regex pattern with tokens like [KIND_1].
+    `known` maps (kind, value) -> existing token so repeated values reuse it.
     """
 
     def repl(match: re.Match) -> str:
+        value = match.group(0)
+        if known is not None and (kind, value) in known:
+            return known[(kind, value)]
         counter[kind] = counter.get(kind, 0) + 1
         token = f"[{kind}_{counter[kind]}]"
-        mapping[token] = {"value": match.group(0), "kind": kind}
+        mapping[token] = {"value": value, "kind": kind}
+        if known is not None:
+            known[(kind, value)] = token
         return token
 
     return re.sub(pattern, repl, text)
 
 
-def mask_pii(text: str) -> Tuple[str, PiiMapping]:
+def mask_pii(text: str, mapping: Optional[PiiMapping] = None) -> Tuple[str, PiiMapping]:
     """
     Mask basic PII from the given text.
 
@@ -39,23 +46,34 @@ def mask_pii(text: str) -> Tuple[str, PiiMapping]:
     - EMAIL: email addresses
     - ORDER: order IDs like ORD1234, ORD-1234, ORDER_5678
 
+    Pass an existing `mapping` (e.g. from earlier turns of the same session)
+    to extend it in place: numbering continues and a value seen before gets
+    its old token back.
+
     Returns:
         masked_text, mapping
     """
-    mapping: PiiMapping = {}
+    if mapping is None:
+        mapping = {}
     counter: Dict[str, int] = {}
+    known: Dict[Tuple[str, str], str] = {}
+    for token, info in mapping.items():
+        known[(info["kind"], info["value"])] = token
+        m = re.match(r"\[([A-Z]+)_(\d+)\]$", token)
+        if m:
+            counter[m.group(1)] = max(counter.get(m.group(1), 0), int(m.group(2)))
 
     # Phone numbers: crude but works well enough for hackathon
     phone_pattern = r"\+?\d[\d\-\s]{8,15}"
-    text = _mask_pattern(text, phone_pattern, "PHONE", mapping, counter)
+    text = _mask_pattern(text, phone_pattern, "PHONE", mapping, counter, known)
 
     # Emails
     email_pattern = r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}"
-    text = _mask_pattern(text, email_pattern, "EMAIL", mapping, counter)
+    text = _mask_pattern(text, email_pattern, "EMAIL", mapping, counter, known)
 
     # Order IDs like ORD1234 / ORD-1234 / ORDER_5678
     order_pattern = r"\b(?:ORD|ORDER)[-_]?\d+\b"
-    text = _mask_pattern(text, order_pattern, "ORDER", mapping, counter)
+    text = _mask_pattern(text, order_pattern, "ORDER", mapping, counter, known)
 
     # You can add more patterns here if you want (addresses, card numbers, etc.)
 
@@ -0,0 +1,219 @@
+# backend/services/faq_answers.py
+
+import os
+import re
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+
+# Extractive FAQ answers: for pure policy questions we pick the best-matching
+# sentences from the policy docs instead of asking Agent-2 to restate them.
+
+# Chroma's default distance is squared L2; on the unit-length MiniLM
+# embeddings that's 2 - 2*cos, so 0 = identical, 2 = orthogonal, 4 = opposite
+# (the quantized index reports the same scale). Only answer without the LLM
+# when the top snippet is within MAX_DISTANCE: the default 1.0 (cos >= 0.5)
+# separates questions about the retrieved policy, which land below it, from
+# off-topic matches, which land above it. The sentence-overlap check below is
+# the second gate.
+# FAQ_MAX_DISTANCE overrides it (lower = fewer, safer extractive answers).
+MAX_DISTANCE = float(os.getenv("FAQ_MAX_DISTANCE", "1.0"))
+
+# Fraction of the question's content words a sentence must cover.
+MIN_SENTENCE_SCORE = 0.25
+
+MAX_SENTENCES = 2
+
+CATEGORY_TITLES = {
+    "return_policy": "Return & Refund Policy",
+    "shipping_policy": "Shipping & Delivery Guidelines",
+    "wifi_terms": "In-Store Wi-Fi Terms",
+    "loyalty": "Loyalty Program",
+    "allergen": "Allergen & Ingredient Guide",
+}
+
+# Per-category kill switch. FAQ_EXTRACTIVE_DISABLED="allergen,wifi_terms"
+# (or "all") turns categories off at startup; set_category_enabled() at runtime.
+_DISABLED = {
+    c.strip()
+    for c in os.getenv("FAQ_EXTRACTIVE_DISABLED", "").split(",")
+    if c.strip()
+}
+
+_STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "do", "does", "did",
+    "what", "whats", "which", "who", "how", "when", "where", "why", "can", "could",
+    "i", "me", "my", "you", "your", "we", "our", "us", "it", "its", "this", "that",
+    "of", "for", "to", "in", "on", "at", "by", "with", "from", "and", "or", "if",
+    "any", "there", "about", "tell", "please", "much", "many", "long", "get",
+}
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+Sentence = Tuple[str, frozenset]
+
+_index_lock = threading.Lock()
+_CATEGORY_INDEX: Optional[Dict[str, List[Sentence]]] = None
+
+
+def _tokens(text: str) -> frozenset:
+    words = _WORD_RE.findall(text.lower().replace("wi-fi", "wifi"))
+    return frozenset(_stem(w) for w in words if w not in _STOPWORDS)
+
+
+def _stem(word: str) -> str:
+    # Tiny suffix stripper so "returns"/"returned" meet "return".
+    for suffix in ("ing", "ed", "es", "s"):
+        if len(word) > len(suffix) + 2 and word.endswith(suffix):
+            return word[: -len(suffix)]
+    return word
+
+
+def _split_chunk(text: str) -> List[Sentence]:
+    """
+    Split a chunk into answerable sentences, skipping headings like
+    "Return & Refund Policy — GroundTruth Coffee Stores."
+    """
+    out: List[Sentence] = []
+    for raw in _SENTENCE_RE.split(text or ""):
+        s = raw.strip()
+        if len(s.split()) < 4 or " — " in s:
+            continue
+        out.append((s, _tokens(s)))
+    return out
+
+
+def build_category_index(
+    static_docs: Optional[List[Dict[str, Any]]] = None,
+    collection_name: Optional[str] = None,
+) -> Dict[str, List[Sentence]]:
+    """
+    {category: [(sentence, tokens), ...]} for a doc set (default STATIC_DOCS)
+    plus whatever else was ingested into its collection (default the main one).
+    """
+    from backend.services.rag_service import STATIC_DOCS, get_collection
+
+    if static_docs is None:
+        static_docs = STATIC_DOCS
+    chunks: List[Tuple[str, str]] = [
+        (d["metadata"].get("category", "faq"), d["text"]) for d in static_docs
+    ]
+
+    # Anything ingested from PDFs lives only in the collection.
+    static_ids = {d["id"] for d in static_docs}
+    try:
+        stored = get_collection(collection_name).get(include=["documents", "metadatas"])
+        for doc_id, doc, meta in zip(
+            stored.get("ids") or [], stored.get("documents") or [], stored.get("metadatas") or []
+        ):
+            if doc_id not in static_ids and doc:
+                chunks.append(((meta or {}).get("category", "faq"), doc))
+    except Exception:
+        pass
+
+    index: Dict[str, List[Sentence]] = {}
+    for category, text in chunks:
+        bucket = index.setdefault(category, [])
+        seen = {s for s, _ in bucket}
+        for s, toks in _split_chunk(text):
+            if s not in seen:
+                bucket.append((s, toks))
+                seen.add(s)
+    return index
+
+
+def get_category_index() -> Dict[str, List[Sentence]]:
+    """
+    Precomputed {category: [(sentence, tokens), ...]}, built once on first use.
+    """
+    global _CATEGORY_INDEX
+    if _CATEGORY_INDEX is None:
+        with _index_lock:
+            if _CATEGORY_INDEX is None:
+                _CATEGORY_INDEX = build_category_index()
+    return _CATEGORY_INDEX
+
+
+def rebuild_index():
+    """
+    Call after ingesting new documents.
+    """
+    global _CATEGORY_INDEX
+    with _index_lock:
+        _CATEGORY_INDEX = build_category_index()
+
+
+def is_category_enabled(category: str) -> bool:
+    return "all" not in _DISABLED and category not in _DISABLED
+
+
+def set_category_enabled(category: str, enabled: bool):
+    if enabled:
+        _DISABLED.discard(category)
+    else:
+        _DISABLED.add(category)
+
+
+def extractive_answer(
+    question: str,
+    rag_snippets: List[Dict[str, Any]],
+    selected_intent: Optional[str] = None,
+    category_index: Optional[Dict[str, List[Sentence]]] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Try to answer a FAQ question from the retrieved chunks without an LLM.
+    `category_index` replaces the default index (e.g. a tenant's own docs).
+
+    Returns a dict shaped like get_final_response() output, or None when
+    retrieval isn't confident enough / the category is switched off /
+    no sentence matches the question well.
+    """
+    if not rag_snippets:
+        return None
+
+    top = rag_snippets[0]
+    distance = top.get("distance")
+    if distance is None or distance > MAX_DISTANCE:
+        return None
+
+    category = (top.get("metadata") or {}).get("category", "faq")
+    if not is_category_enabled(category):
+        return None
+
+    q_tokens = _tokens(question)
+    if not q_tokens:
+        return None
+
+    if category_index is None:
+        category_index = get_category_index()
+    candidates = list(category_index.get(category, []))
+    known = {s for s, _ in candidates}
+    for sn in rag_snippets:
+        if (sn.get("metadata") or {}).get("category", "faq") != category:
+            continue
+        for s, toks in _split_chunk(sn.get("text", "")):
+            if s not in known:
+                candidates.append((s, toks))
+                known.add(s)
+
+    scored = []
+    for pos, (s, toks) in enumerate(candidates):
+        score = len(q_tokens & toks) / len(q_tokens)
+        if score >= MIN_SENTENCE_SCORE:
+            scored.append((score, pos, s))
+    if not scored:
+        return None
+
+    scored.sort(key=lambda x: (-x[0], x[1]))
+    # Extra sentences must be nearly as relevant as the best one
+    cutoff = scored[0][0] * 0.75
+    best = [x for x in scored[:MAX_SENTENCES] if x[0] >= cutoff]
+    best.sort(key=lambda x: x[1])  # keep document order
+    title = CATEGORY_TITLES.get(category, "policy")
+
+    return {
+        "selected_intent": selected_intent,
+        "selected_store_id": None,
+        "reasoning": f"Extractive answer from {category} (distance={distance:.3f}).",
+        "reply": f"Per our {title}: " + " ".join(s for _, _, s in best),
+    }
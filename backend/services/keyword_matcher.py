@@ -0,0 +1,238 @@
+# backend/services/keyword_matcher.py
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, Any, List, NamedTuple, Optional, Set, Tuple
+
+# Keyword rules (phrase -> intent / category) compiled into one regex trie,
+# so a message is scanned once no matter how many phrases there are.
+#
+# Rules live in backend/data/keywords.json (KEYWORDS_CONFIG overrides):
+#   {"rules": [{"intent": "ASK_RETURN_POLICY", "category": "return_policy",
+#               "faq": true, "required_data": [...], "phrases": ["refund", ...]}]}
+#
+# A phrase matches at the start of a word and may run on into a longer word
+# ("refund" matches "refunds", "allerg" would match "allergy"), but not in
+# the middle of one ("points" does not match "appointments"). Whitespace in a
+# phrase matches any run of whitespace. The longest phrase at a position wins.
+#
+# The file is re-read when its mtime changes (checked at most once per
+# RELOAD_CHECK_S); a broken edit keeps the previous rules. The new trie is
+# compiled on a background thread while requests keep using the old one,
+# then swapped in, so no request waits for a recompile.
+
+CONFIG_PATH = os.getenv(
+    "KEYWORDS_CONFIG",
+    os.path.join(os.path.dirname(__file__), "..", "data", "keywords.json"),
+)
+RELOAD_CHECK_S = 1.0
+
+# Confidence given to intents produced by the local fast path
+LOCAL_INTENT_CONFIDENCE = 0.6
+
+logger = logging.getLogger(__name__)
+
+
+class KeywordRule(NamedTuple):
+    intent: Optional[str]
+    category: str
+    faq: bool
+    required_data: Tuple[str, ...]
+
+
+class KeywordMatch(NamedTuple):
+    phrase: str
+    rule: KeywordRule
+    start: int
+    end: int
+
+
+def _normalize_phrase(phrase: str) -> str:
+    return " ".join(phrase.lower().split())
+
+
+def _trie_regex(phrases: List[str]) -> str:
+    """
+    Regex alternation shaped like a trie: shared prefixes are matched once
+    and optional suffixes are greedy, so the longest phrase wins.
+    """
+    trie: Dict[str, Any] = {}
+    for p in phrases:
+        node = trie
+        for ch in p:
+            node = node.setdefault(ch, {})
+        node[""] = {}  # end-of-phrase marker
+
+    def emit(node: Dict[str, Any]) -> str:
+        branches = [
+            (r"\s+" if ch == " " else re.escape(ch)) + emit(child)
+            for ch, child in sorted(node.items())
+            if ch != ""
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            return "(?:" + body + ")?" if len(branches) == 1 else body + "?"
+        return body
+
+    return emit(trie)
+
+
+class KeywordMatcher:
+    """
+    Immutable compiled rule set; get_matcher() swaps in a new one on reload.
+    """
+
+    def __init__(self, rules: List[Dict[str, Any]]):
+        self.rules: List[KeywordRule] = []
+        self._by_phrase: Dict[str, List[KeywordRule]] = {}
+        for r in rules:
+            rule = KeywordRule(
+                intent=r.get("intent"),
+                category=r.get("category") or "general",
+                faq=bool(r.get("faq", False)),
+                required_data=tuple(r.get("required_data") or (["faq_answer"] if r.get("faq") else [])),
+            )
+            self.rules.append(rule)
+            for phrase in r.get("phrases") or []:
+                phrase = _normalize_phrase(phrase)
+                if phrase:
+                    self._by_phrase.setdefault(phrase, []).append(rule)
+
+        self.phrase_count = len(self._by_phrase)
+        self._pattern = None
+        if self._by_phrase:
+            self._pattern = re.compile(r"(?<!\w)" + _trie_regex(list(self._by_phrase)))
+
+    def scan(self, text: str) -> List[KeywordMatch]:
+        """
+        Every (phrase, rule) hit in `text`, in order of appearance.
+        """
+        if self._pattern is None or not text:
+            return []
+        out: List[KeywordMatch] = []
+        for m in self._pattern.finditer(text.lower()):
+            phrase = " ".join(m.group().split())
+            for rule in self._by_phrase.get(phrase, ()):
+                out.append(KeywordMatch(phrase, rule, m.start(), m.end()))
+        return out
+
+    def looks_like_faq(self, text: str) -> bool:
+        return any(m.rule.faq for m in self.scan(text))
+
+    def faq_categories(self, text: str) -> Set[str]:
+        return {m.rule.category for m in self.scan(text) if m.rule.faq}
+
+    def local_intents(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Agent-1-shaped intents from keyword hits, most-mentioned first.
+        Empty when nothing matched.
+        """
+        hits: Dict[KeywordRule, List[KeywordMatch]] = {}
+        for m in self.scan(text):
+            if m.rule.intent:
+                hits.setdefault(m.rule, []).append(m)
+        ranked = sorted(hits.items(), key=lambda kv: (-len(kv[1]), kv[1][0].start))
+        return [
+            {
+                "name": rule.intent,
+                "confidence": LOCAL_INTENT_CONFIDENCE,
+                "reason": "Keyword match: " + ", ".join(sorted({m.phrase for m in ms})),
+                "required_data": list(rule.required_data),
+                "category": rule.category,
+            }
+            for rule, ms in ranked
+        ]
+
+
+def load_rules(path: str) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    rules = data.get("rules") if isinstance(data, dict) else data
+    if not isinstance(rules, list):
+        raise ValueError(f"{path}: expected a list of rules")
+    return rules
+
+
+_lock = threading.Lock()
+_matcher: Optional[KeywordMatcher] = None
+_loaded_mtime: Optional[float] = None
+_next_check = 0.0
+_reload_thread: Optional[threading.Thread] = None
+
+
+def _config_mtime() -> Optional[float]:
+    try:
+        return os.path.getmtime(CONFIG_PATH)
+    except OSError:
+        return None
+
+
+def reload_matcher() -> KeywordMatcher:
+    """
+    Re-read the config now. Keeps the current rules if the file is broken.
+    Compiles without holding the lock; readers keep the old matcher until
+    the swap.
+    """
+    global _matcher, _loaded_mtime
+    mtime = _config_mtime()  # before reading, so a later edit triggers another reload
+    try:
+        matcher: Optional[KeywordMatcher] = KeywordMatcher(load_rules(CONFIG_PATH) if mtime is not None else [])
+    except (OSError, ValueError) as e:  # json.JSONDecodeError is a ValueError
+        logger.warning("keywords: keeping previous rules, failed to load %s: %s", CONFIG_PATH, e)
+        matcher = None
+    with _lock:
+        if matcher is None:
+            matcher = _matcher or KeywordMatcher([])
+        _matcher = matcher
+        _loaded_mtime = mtime
+        return matcher
+
+
+def _reload_in_background():
+    global _reload_thread
+    try:
+        reload_matcher()
+    finally:
+        with _lock:
+            _reload_thread = None
+
+
+def get_matcher() -> KeywordMatcher:
+    """
+    Current compiled matcher; picks up config edits without a restart.
+    Only the very first call compiles inline; after an edit the old matcher
+    is served until the background reload has swapped in the new one.
+    """
+    global _next_check, _reload_thread
+    matcher = _matcher
+    now = time.monotonic()
+    if matcher is not None and now < _next_check:
+        return matcher
+    _next_check = now + RELOAD_CHECK_S
+    if matcher is None:
+        return reload_matcher()
+    if _config_mtime() != _loaded_mtime:
+        with _lock:
+            if _reload_thread is None:
+                _reload_thread = threading.Thread(
+                    target=_reload_in_background, name="keywords-reload", daemon=True
+                )
+                _reload_thread.start()
+    return matcher
+
+
+def wait_for_reload(timeout: Optional[float] = None) -> bool:
+    """
+    Block until a background reload in progress has finished (tests, tooling).
+    """
+    thread = _reload_thread
+    if thread is not None:
+        thread.join(timeout)
+        return not thread.is_alive()
+    return True
@@ -0,0 +1,243 @@
+# backend/services/location_cache.py
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Tuple
+
+from backend.services import metrics
+from backend.services import offers as offer_catalog
+from backend.services import store_locator
+from backend.services.store_locator import EARTH_RADIUS_M
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Store + offer context cached per (tenant, geohash cell, loyalty tier).
+#
+# Everyone in the same ~1.2 km x 0.6 km cell shares the ranked store list
+# and the tier's offers; on a hit only the distances are recomputed for the
+# exact user position (vectorized) and the list is re-ranked.
+#
+# A tenant (backend.services.tenants.Tenant) brings its own store catalog,
+# tier discounts and catalog versions; None means the built-in catalogs.
+#
+# numpy is imported inside the functions so it loads with the first located
+# turn (or `python -m backend.warm`), not at API startup.
+
+GEOHASH_PRECISION = 6
+MAX_TTL_S = 300.0
+MAX_ENTRIES = 10000
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_encode(lat: float, lng: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    out = []
+    bits = 0
+    ch = 0
+    even = True  # geohash interleaves bits starting with longitude
+    while len(out) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if lng >= mid:
+                ch = (ch << 1) | 1
+                lng_lo = mid
+            else:
+                ch <<= 1
+                lng_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                ch = (ch << 1) | 1
+                lat_lo = mid
+            else:
+                ch <<= 1
+                lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            out.append(_BASE32[ch])
+            bits = 0
+            ch = 0
+    return "".join(out)
+
+
+def geohash_center(cell: str) -> Tuple[float, float]:
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    even = True
+    for c in cell:
+        v = _BASE32.index(c)
+        for shift in range(4, -1, -1):
+            bit = (v >> shift) & 1
+            if even:
+                mid = (lng_lo + lng_hi) / 2
+                if bit:
+                    lng_lo = mid
+                else:
+                    lng_hi = mid
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                if bit:
+                    lat_lo = mid
+                else:
+                    lat_hi = mid
+            even = not even
+    return (lat_lo + lat_hi) / 2, (lng_lo + lng_hi) / 2
+
+
+def haversine_distances_m(lat: float, lng: float, lats: "np.ndarray", lngs: "np.ndarray") -> "np.ndarray":
+    """
+    Vectorized haversine: distances in meters from one point to many.
+    """
+    import numpy as np
+
+    phi1 = np.radians(lat)
+    phi2 = np.radians(lats)
+    dphi = phi2 - phi1
+    dlambda = np.radians(lngs - lng)
+
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    return EARTH_RADIUS_M * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def _seconds_until_next_boundary(stores: List[Dict[str, Any]], now: datetime) -> float:
+    """
+    Seconds until any store in the list opens or closes ("HH:MM-HH:MM" hours),
+    so cached is_open_now never outlives an opening-hour boundary.
+    """
+    best = MAX_TTL_S
+    for s in stores:
+        hours = s.get("opening_hours") or ""
+        for part in hours.split("-"):
+            try:
+                hh, mm = part.strip().split(":")
+                boundary = now.replace(hour=int(hh) % 24, minute=int(mm), second=0, microsecond=0)
+            except ValueError:
+                continue
+            if boundary <= now:
+                boundary += timedelta(days=1)
+            best = min(best, (boundary - now).total_seconds())
+    return max(best, 1.0)
+
+
+class _CellEntry:
+    __slots__ = ("stores", "lats", "lngs", "offers_by_store", "expires_at", "versions")
+
+    def __init__(self, stores, offers, expires_at, versions):
+        import numpy as np
+
+        self.stores = stores
+        self.lats = np.array([s["lat"] for s in stores], dtype=np.float64)
+        self.lngs = np.array([s["lng"] for s in stores], dtype=np.float64)
+        self.offers_by_store = {o["store_id"]: o for o in offers}
+        self.expires_at = expires_at
+        self.versions = versions
+
+
+_lock = threading.Lock()
+_CACHE: "OrderedDict[Tuple[str, str, str], _CellEntry]" = OrderedDict()
+
+
+def _versions(tenant=None) -> Tuple[int, int]:
+    if tenant is not None:
+        return tenant.catalog_versions()
+    return store_locator.catalog_version(), offer_catalog.catalog_version()
+
+
+def invalidate(tenant_id: Optional[str] = None):
+    """
+    Drop every entry, or only one tenant's.
+    """
+    with _lock:
+        if tenant_id is None:
+            _CACHE.clear()
+            return
+        for key in [k for k in _CACHE if k[0] == tenant_id]:
+            del _CACHE[key]
+
+
+def _stores_and_offers(lat, lng, tier: str, intents, tenant=None):
+    if tenant is not None:
+        stores = tenant.nearby_stores(lat, lng, intents=intents)
+        return stores, tenant.build_offers(tier, stores)
+    stores = store_locator.get_nearby_stores(lat, lng, intents=intents)
+    return stores, offer_catalog.build_offers(tier, stores)
+
+
+def _fill(cell: str, tier: str, intents, tenant=None) -> _CellEntry:
+    versions = _versions(tenant)
+    c_lat, c_lng = geohash_center(cell)
+    stores, offers = _stores_and_offers(c_lat, c_lng, tier, intents, tenant)
+    ttl = _seconds_until_next_boundary(stores, datetime.now())
+    return _CellEntry(stores, offers, time.monotonic() + ttl, versions)
+
+
+def get_nearby_context(
+    lat: Optional[float],
+    lng: Optional[float],
+    tier: str,
+    intents: Optional[List[Dict[str, Any]]] = None,
+    tenant=None,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    (candidate_stores, offers) for a user position and loyalty tier.
+    Stores carry distance_m from the exact position and are sorted by it.
+    `intents` doesn't affect the store list today, so it isn't part of the key.
+    """
+    if lat is None or lng is None:
+        metrics.incr("location_cache.bypass")
+        return _stores_and_offers(lat, lng, tier, intents, tenant)
+
+    metrics.incr("location_cache.lookups")  # hit + miss, for the /metrics hit rate
+    tenant_id = tenant.tenant_id if tenant is not None else "default"
+    key = (tenant_id, geohash_encode(lat, lng), (tier or "").lower())
+    now = time.monotonic()
+    with _lock:
+        entry = _CACHE.get(key)
+        if entry is not None and (entry.expires_at <= now or entry.versions != _versions(tenant)):
+            del _CACHE[key]
+            entry = None
+        if entry is not None:
+            _CACHE.move_to_end(key)
+
+    if entry is None:
+        metrics.incr("location_cache.miss")
+        entry = _fill(key[1], tier, intents, tenant)
+        with _lock:
+            _CACHE[key] = entry
+            while len(_CACHE) > MAX_ENTRIES:
+                _CACHE.popitem(last=False)
+    else:
+        metrics.incr("location_cache.hit")
+
+    # Correct distances to the exact position and re-rank
+    dists = haversine_distances_m(lat, lng, entry.lats, entry.lngs)
+    order = dists.argsort(kind="stable")
+    stores: List[Dict[str, Any]] = []
+    offers: List[Dict[str, Any]] = []
+    for rank, i in enumerate(order, start=1):
+        s = dict(entry.stores[i])
+        s["distance_m"] = float(dists[i])
+        stores.append(s)
+        offer = entry.offers_by_store.get(s["id"])
+        if offer is not None:
+            offers.append(_renumbered(offer, rank))
+    return stores, offers
+
+
+def _renumbered(offer: Dict[str, Any], rank: int) -> Dict[str, Any]:
+    """
+    Copy of a cached offer whose coupon number follows the user's own
+    ranking ("HOT15_1" is the nearest store), as build_offers() numbers them,
+    not the ranking at the cell center the entry was built from.
+    """
+    offer = dict(offer)
+    code = offer.get("coupon_code")
+    if code and "_" in code:
+        offer["coupon_code"] = f"{code.rpartition('_')[0]}_{rank}"
+    return offer
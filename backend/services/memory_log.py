@@ -0,0 +1,235 @@
+# backend/services/memory_log.py
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, List, Optional
+
+from backend.services import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, run a single API process
+    fcntl = None
+
+# Append-only JSONL log for user memory, written behind the request path.
+#
+# Each line is one mutation record, e.g.
+#   {"op": "turn", "user_id": "u1", "user": "...", "bot": "..."}
+#   {"op": "put", "user_id": "u1", "profile": {...}}   (written by compaction)
+# Replaying the records in order through the same apply function that
+# mutates the live memory rebuilds the state after a crash/restart.
+#
+# Several processes may write the same log (uvicorn --workers, the warm CLI
+# next to the server): appends and compaction take an exclusive flock on
+# "<path>.lock", and the log is reopened under the lock, so nobody appends to
+# a file that another process's compaction is about to replace.
+
+ApplyFn = Callable[[Dict[str, Dict[str, Any]], Dict[str, Any]], None]
+
+FLUSH_INTERVAL_S = 0.2
+BATCH_SIZE = 256
+COMPACT_EVERY = 5000  # records appended since the last compaction
+
+logger = logging.getLogger(__name__)
+
+
+def replay_log(path: str, apply_fn: ApplyFn) -> Dict[str, Dict[str, Any]]:
+    """
+    Rebuild memory from the log at `path`.
+    A torn last line (crash mid-write) is ignored.
+    """
+    memory: Dict[str, Dict[str, Any]] = {}
+    if not os.path.exists(path):
+        return memory
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            apply_fn(memory, record)
+    return memory
+
+
+class WriteBehindLog:
+    """
+    In-process queue + background writer thread.
+
+    append() never touches the disk; the writer drains the queue every
+    FLUSH_INTERVAL_S (or as soon as BATCH_SIZE records are waiting), writes
+    them with a single fsync, and compacts the file every COMPACT_EVERY records.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        apply_fn: ApplyFn,
+        flush_interval: float = FLUSH_INTERVAL_S,
+        batch_size: int = BATCH_SIZE,
+        compact_every: int = COMPACT_EVERY,
+    ):
+        self.path = path
+        self.apply_fn = apply_fn
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.compact_every = compact_every
+
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        self._cond = threading.Condition()
+        self._appended = 0  # records handed to append()
+        self._written = 0   # records the writer is done with (on disk or dropped)
+        self._since_compact = 0
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    # ---- producer side ----
+
+    def append(self, record: Dict[str, Any]):
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("write-behind log is closed")
+            self._appended += 1
+            self._ensure_thread()
+        self._queue.put(record)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until every record appended so far is on disk.
+        Returns False on timeout.
+        """
+        with self._cond:
+            target = self._appended
+            return self._cond.wait_for(lambda: self._written >= target, timeout=timeout)
+
+    def close(self, timeout: Optional[float] = 10.0):
+        self.flush(timeout=timeout)
+        with self._cond:
+            self._closed = True
+        if self._thread is not None:
+            self._queue.put(None)  # wake the writer so it can exit
+            self._thread.join(timeout=timeout)
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            d = os.path.dirname(self.path)
+            if d:
+                os.makedirs(d, exist_ok=True)
+            self._thread = threading.Thread(
+                target=self._run, name="user-memory-writer", daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.close)
+
+    # ---- writer side ----
+
+    def _run(self):
+        while True:
+            batch: List[Dict[str, Any]] = []
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            stop = item is None
+            if item is not None:
+                batch.append(item)
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    continue
+                batch.append(item)
+
+            if batch:
+                self._write_batch(batch)
+                with self._cond:
+                    self._written += len(batch)
+                    self._cond.notify_all()
+            if stop:
+                return
+
+    @contextmanager
+    def _file_lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(self.path + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _write_batch(self, batch: List[Dict[str, Any]]):
+        """
+        Never raises: a bad record or a disk error must not kill the writer
+        thread. Memory stays correct in-process; only durability is lost,
+        counted in metrics as user_memory.log_dropped.
+        """
+        lines: List[str] = []
+        for r in batch:
+            try:
+                lines.append(json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n")
+            except (TypeError, ValueError) as e:
+                metrics.incr("user_memory.log_dropped")
+                logger.error("user memory: dropping unserializable %r record: %s", r.get("op"), e)
+        if not lines:
+            return
+        try:
+            with self._file_lock(), open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(lines))
+                f.flush()
+                os.fsync(f.fileno())
+        except Exception:
+            metrics.incr("user_memory.log_dropped", len(lines))
+            logger.exception("user memory: failed to persist %d records", len(lines))
+            return
+
+        self._since_compact += len(lines)
+        if self._since_compact >= self.compact_every:
+            try:
+                with self._file_lock():
+                    self._compact()
+            except Exception:
+                # The records are on disk; the log just stays uncompacted
+                # until the next attempt.
+                self._since_compact = 0
+                metrics.incr("user_memory.compact_failed")
+                logger.exception("user memory: log compaction failed")
+
+    def compact(self):
+        """
+        Rewrite the log as one "put" record per user. Only called from the
+        writer thread (or when no writer is running), so no appends from this
+        process race it; the file lock keeps other processes out.
+        """
+        with self._file_lock():
+            self._compact()
+
+    def _compact(self):
+        memory = replay_log(self.path, self.apply_fn)
+        tmp_path = self.path + ".compact"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for user_id, profile in memory.items():
+                f.write(
+                    json.dumps(
+                        {"op": "put", "user_id": user_id, "profile": profile},
+                        ensure_ascii=False,
+                        separators=(",", ":"),
+                    )
+                    + "\n"
+                )
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._since_compact = 0
@@ -0,0 +1,37 @@
+# backend/services/metrics.py
+
+import threading
+from typing import Dict, Any
+
+# Process-local counters; exposed as JSON via GET /metrics.
+_lock = threading.Lock()
+_COUNTERS: Dict[str, int] = {}
+
+
+def incr(name: str, value: int = 1):
+    with _lock:
+        _COUNTERS[name] = _COUNTERS.get(name, 0) + value
+
+
+def get_counter(name: str) -> int:
+    with _lock:
+        return _COUNTERS.get(name, 0)
+
+
+def ratio(numerator: str, denominator: str) -> float:
+    """
+    Convenience for hit rates: counter(numerator) / counter(denominator).
+    """
+    with _lock:
+        den = _COUNTERS.get(denominator, 0)
+        return (_COUNTERS.get(numerator, 0) / den) if den else 0.0
+
+
+def snapshot() -> Dict[str, Any]:
+    with _lock:
+        return {"counters": dict(_COUNTERS)}
+
+
+def reset():
+    with _lock:
+        _COUNTERS.clear()
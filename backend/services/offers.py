@@ -1,31 +1,49 @@
 # backend/services/offers.py
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 from backend.services.user_memory import get_user_profile
 
 
-def _discount_for_tier(tier: str) -> int:
-    tier = (tier or "").lower()
-    if tier == "gold":
-        return 15
-    if tier == "silver":
-        return 10
-    return 5  # bronze / default
+# Offer catalog: % off hot beverages per loyalty tier
+TIER_DISCOUNTS: Dict[str, int] = {
+    "gold": 15,
+    "silver": 10,
+    "bronze": 5,
+}
+DEFAULT_DISCOUNT = 5  # bronze / default
+
+_catalog_version = 0
+
+
+def catalog_version() -> int:
+    return _catalog_version
 
 
-def get_offers_for_stores(user_id: str, stores: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def reload_offer_catalog(tier_discounts: Dict[str, int]):
     """
-    Loyalty-aware offers:
-    - Bronze: 5% off
-    - Silver: 10% off
-    - Gold: 15% off
+    Replace the tier -> discount table (caches watch catalog_version()).
+    """
+    global TIER_DISCOUNTS, _catalog_version
+    TIER_DISCOUNTS = {k.lower(): v for k, v in tier_discounts.items()}
+    _catalog_version += 1
 
-    Applies to hot beverages by default.
+
+def _discount_for_tier(tier: str, tier_discounts: Optional[Dict[str, int]] = None) -> int:
+    tier = (tier or "").lower()
+    return (TIER_DISCOUNTS if tier_discounts is None else tier_discounts).get(tier, DEFAULT_DISCOUNT)
+
+
+def build_offers(
+    tier: str,
+    stores: List[Dict[str, Any]],
+    tier_discounts: Optional[Dict[str, int]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    One hot-beverage coupon per store for the given loyalty tier.
+    `tier_discounts` replaces TIER_DISCOUNTS (e.g. a tenant's own scheme).
     """
-    profile = get_user_profile(user_id)
-    tier = profile.get("loyalty_tier", "Bronze")
-    discount = _discount_for_tier(tier)
+    discount = _discount_for_tier(tier, tier_discounts)
 
     offers: List[Dict[str, Any]] = []
     for idx, s in enumerate(stores):
@@ -39,3 +57,23 @@ def get_offers_for_stores(user_id: str, stores: List[Dict[str, Any]]) -> List[Di
             }
         )
     return offers
+
+
+def get_offers_for_stores(
+    user_id: str,
+    stores: List[Dict[str, Any]],
+    tier: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Loyalty-aware offers:
+    - Bronze: 5% off
+    - Silver: 10% off
+    - Gold: 15% off
+
+    Applies to hot beverages by default.
+    Pass `tier` if the caller already knows it (skips the profile lookup).
+    """
+    if tier is None:
+        profile = get_user_profile(user_id)
+        tier = profile.get("loyalty_tier", "Bronze")
+    return build_offers(tier, stores)
@@ -1,11 +1,13 @@
 # backend/services/rag_service.py
 
 import os
-from typing import List, Dict, Any
-
-import chromadb
+import threading
+from typing import List, Dict, Any, Optional
 
 # ---- ChromaDB setup ----
+# chromadb (onnxruntime, tokenizers, OpenTelemetry exporters) is imported and
+# the persistent client opened on first use, and the static docs are only
+# written on the first query (or by `python -m backend.warm`), never on import.
 
 CHROMA_DIR = os.path.join(
     os.path.dirname(__file__),
@@ -15,13 +17,42 @@ CHROMA_DIR = os.path.join(
     "vector_store"
 )
 
-_client = chromadb.PersistentClient(path=CHROMA_DIR)
+_client = None
+_client_lock = threading.Lock()
+_bootstrap_lock = threading.Lock()
+_bootstrapped = set()  # collection names populated in this process
 
 COLLECTION_NAME = "customer_faqs"
 
+# ---- Retrieval backend ----
+# "chroma" (default): the persistent Chroma collection above.
+# "quantized": int8 memory-mapped index built by rag/build_quantized_index.py,
+#              shared across worker processes through the page cache.
+RAG_BACKEND = os.getenv("RAG_BACKEND", "chroma")
+
+QUANTIZED_INDEX_DIR = os.getenv(
+    "RAG_QUANTIZED_INDEX_DIR",
+    os.path.join(os.path.dirname(__file__), "..", "..", "rag", "quantized_index"),
+)
+
+_quantized_index = None
+_quantized_lock = threading.Lock()
+_embedding_fn = None
+_embedding_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                import chromadb
+                _client = chromadb.PersistentClient(path=CHROMA_DIR)
+    return _client
+
 
-def get_collection():
-    return _client.get_or_create_collection(name=COLLECTION_NAME)
+def get_collection(name: Optional[str] = None):
+    return get_client().get_or_create_collection(name=name or COLLECTION_NAME)
 
 
 # ---- Static "PDF" contents for hackathon RAG ----
@@ -106,12 +137,12 @@ STATIC_DOCS = [
 ]
 
 
-def _bootstrap_static_docs():
+def _bootstrap_static_docs(collection_name: Optional[str] = None, static_docs: Optional[List[Dict[str, Any]]] = None):
     """
     Initialize the Chroma collection with static docs if it's empty.
     This replaces the need for PDF ingestion during a hackathon.
     """
-    col = get_collection()
+    col = get_collection(collection_name)
     try:
         if col.count() > 0:
             # Already populated, don't duplicate
@@ -120,23 +151,75 @@ def _bootstrap_static_docs():
         # If count() fails, just try to add docs
         pass
 
-    ids = [d["id"] for d in STATIC_DOCS]
-    docs = [d["text"] for d in STATIC_DOCS]
-    metas = [d["metadata"] for d in STATIC_DOCS]
+    if static_docs is None:
+        static_docs = STATIC_DOCS
+    if not static_docs:
+        return
+    ids = [d["id"] for d in static_docs]
+    docs = [d["text"] for d in static_docs]
+    metas = [d["metadata"] for d in static_docs]
 
     col.add(ids=ids, documents=docs, metadatas=metas)
 
 
-# Run bootstrap at import time
-_bootstrap_static_docs()
+def ensure_bootstrapped(collection_name: Optional[str] = None, docs: Optional[List[Dict[str, Any]]] = None):
+    """
+    Populate the collection with `docs` (default STATIC_DOCS) once per
+    process (no-op if it already has documents).
+    """
+    name = collection_name or COLLECTION_NAME
+    if name in _bootstrapped:
+        return
+    with _bootstrap_lock:
+        if name not in _bootstrapped:
+            _bootstrap_static_docs(name, docs)
+            _bootstrapped.add(name)
 
 
-def rag_query(question: str, top_k: int = 3) -> List[Dict[str, Any]]:
+def embed_texts(texts: List[str]):
+    """
+    Embed with the same model Chroma uses for the collection (all-MiniLM-L6-v2),
+    so both backends rank in the same vector space.
+    """
+    global _embedding_fn
+    if _embedding_fn is None:
+        with _embedding_lock:
+            if _embedding_fn is None:
+                from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+                _embedding_fn = DefaultEmbeddingFunction()
+    return _embedding_fn(texts)
+
+
+def get_quantized_index():
+    global _quantized_index
+    if _quantized_index is None:
+        with _quantized_lock:
+            if _quantized_index is None:
+                from backend.services.vector_index import QuantizedIndex
+                _quantized_index = QuantizedIndex(QUANTIZED_INDEX_DIR)
+    return _quantized_index
+
+
+def rag_query(
+    question: str,
+    top_k: int = 3,
+    collection_name: Optional[str] = None,
+    index=None,
+) -> List[Dict[str, Any]]:
     """
     Query the vector store for relevant chunks.
-    Returns a list of {text, metadata}.
+    Returns a list of {text, metadata, distance} (lower distance = closer match).
+
+    `collection_name` / `index` select another tenant's Chroma collection /
+    quantized index; the caller bootstraps a non-default collection itself.
     """
-    col = get_collection()
+    if RAG_BACKEND == "quantized":
+        index = index if index is not None else get_quantized_index()
+        return index.search(embed_texts([question])[0], top_k=top_k)
+
+    if collection_name is None:
+        ensure_bootstrapped()
+    col = get_collection(collection_name)
 
     try:
         if col.count() == 0:
@@ -148,9 +231,10 @@ def rag_query(question: str, top_k: int = 3) -> List[Dict[str, Any]]:
 
     docs = res.get("documents", [[]])[0]
     metas = res.get("metadatas", [[]])[0]
+    dists = (res.get("distances") or [[]])[0] or [None] * len(docs)
 
     snippets: List[Dict[str, Any]] = []
-    for d, m in zip(docs, metas):
-        snippets.append({"text": d, "metadata": m})
+    for d, m, dist in zip(docs, metas, dists):
+        snippets.append({"text": d, "metadata": m, "distance": dist})
 
     return snippets
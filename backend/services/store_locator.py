@@ -1,12 +1,60 @@
 import math
+import threading
 from typing import List, Dict, Any, Optional
 
 
+EARTH_RADIUS_M = 6371000
+
+# Demo store catalog (pretend Bangalore)
+STORE_CATALOG: List[Dict[str, Any]] = [
+    {
+        "id": "store_101",
+        "name": "Starbucks MG Road",
+        "lat": 12.9717,
+        "lng": 77.5948,
+        "opening_hours": "08:00-22:00",
+        "is_open_now": True,
+        "rating": 4.4,
+        "review_count": 892,
+    },
+    {
+        "id": "store_102",
+        "name": "Third Wave Coffee Church Street",
+        "lat": 12.9730,
+        "lng": 77.6050,
+        "opening_hours": "09:00-23:00",
+        "is_open_now": False,
+        "rating": 4.6,
+        "review_count": 650,
+    },
+]
+
+_catalog_lock = threading.Lock()
+_catalog_version = 0
+
+
+def catalog_version() -> int:
+    """
+    Bumped on every reload; caches compare it to detect a stale catalog.
+    """
+    return _catalog_version
+
+
+def reload_store_catalog(stores: List[Dict[str, Any]]):
+    """
+    Replace the store catalog (e.g. after pulling fresh data from Places).
+    """
+    global STORE_CATALOG, _catalog_version
+    with _catalog_lock:
+        STORE_CATALOG = [dict(s) for s in stores]
+        _catalog_version += 1
+
+
 def _haversine_distance_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
     Distance in meters between two lat/lng pairs.
     """
-    R = 6371000  # Earth radius in meters
+    R = EARTH_RADIUS_M  # Earth radius in meters
     phi1, phi2 = math.radians(lat1), math.radians(lat2)
     dphi = math.radians(lat2 - lat1)
     dlambda = math.radians(lon2 - lon1)
@@ -23,34 +71,14 @@ def get_nearby_stores(
     lat: Optional[float],
     lng: Optional[float],
     intents: Optional[List[Dict[str, Any]]] = None,
+    catalog: Optional[List[Dict[str, Any]]] = None,
 ) -> List[Dict[str, Any]]:
     """
     For now: mock 2–3 stores, compute distance from given lat/lng if present.
     Later you can replace with Google Places / other APIs.
+    `catalog` replaces STORE_CATALOG (e.g. a tenant's own store list).
     """
-    # Demo store catalog (pretend Bangalore)
-    stores = [
-        {
-            "id": "store_101",
-            "name": "Starbucks MG Road",
-            "lat": 12.9717,
-            "lng": 77.5948,
-            "opening_hours": "08:00-22:00",
-            "is_open_now": True,
-            "rating": 4.4,
-            "review_count": 892,
-        },
-        {
-            "id": "store_102",
-            "name": "Third Wave Coffee Church Street",
-            "lat": 12.9730,
-            "lng": 77.6050,
-            "opening_hours": "09:00-23:00",
-            "is_open_now": False,
-            "rating": 4.6,
-            "review_count": 650,
-        },
-    ]
+    stores = [dict(s) for s in (STORE_CATALOG if catalog is None else catalog)]
 
     # Add distance_m if lat/lng provided
     for s in stores:
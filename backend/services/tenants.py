@@ -0,0 +1,388 @@
+# backend/services/tenants.py
+
+import json
+import logging
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+from backend.services import metrics
+
+# Multi-tenant brand support.
+#
+# A tenant is one brand: its own store catalog, tier discounts, FAQ docs
+# (Chroma collection "customer_faqs__<tenant>" / quantized index
+# <RAG_QUANTIZED_INDEX_DIR>/<tenant>) and prompt templates. Config lives in
+# backend/data/tenants/<tenant>/tenant.json (TENANTS_DIR overrides):
+#
+#   {"brand_name": "BrewCo",
+#    "stores": [...same shape as store_locator.STORE_CATALOG...],
+#    "tier_discounts": {"gold": 20, "silver": 12, "bronze": 6},
+#    "faq_docs": [...same shape as rag_service.STATIC_DOCS...],
+#    "prompts": {"intent": "...", "response": "You are BrewCo's assistant.\n{default}"}}
+#
+# Every key is optional; a missing one falls back to the built-in catalogs.
+# "{default}" in a prompt is replaced by the built-in prompt.
+#
+# The "default" tenant is the original single-brand setup (no config file).
+# Other tenants are loaded on first request and kept in an LRU; when their
+# estimated size exceeds TENANT_CACHE_BUDGET_MB the least recently used ones
+# are dropped (and reloaded from disk when asked for again).
+#
+# A tenant.json that can't be used (bad JSON, wrong shapes) makes the tenant
+# unavailable (TenantConfigError, 503) until the file changes; it isn't
+# re-parsed on every request in between.
+
+DEFAULT_TENANT = "default"
+
+TENANTS_DIR = os.getenv(
+    "TENANTS_DIR",
+    os.path.join(os.path.dirname(__file__), "..", "data", "tenants"),
+)
+# Counts what a tenant holds in this process: its config, extractive FAQ
+# index and the mapped size of its quantized index files. Its Chroma
+# collection is not counted: it lives in the shared Chroma client, which
+# keeps collections loaded regardless of tenant eviction.
+TENANT_CACHE_BUDGET_MB = float(os.getenv("TENANT_CACHE_BUDGET_MB", "256"))
+
+_TENANT_ID_RE = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+
+# Expected type of each (optional) top-level tenant.json key
+_CONFIG_TYPES = {
+    "brand_name": str,
+    "stores": list,
+    "tier_discounts": dict,
+    "faq_docs": list,
+    "prompts": dict,
+}
+
+logger = logging.getLogger(__name__)
+
+
+class UnknownTenantError(KeyError):
+    pass
+
+
+class TenantConfigError(Exception):
+    """
+    The tenant exists but its tenant.json can't be used. The message goes
+    to clients, so it names the tenant only; details are logged.
+    """
+    status_code = 503
+
+
+def _deep_sizeof(obj: Any) -> int:
+    """
+    Rough in-memory size of plain JSON-like data (dicts, lists, strings...).
+    """
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_sizeof(k) + _deep_sizeof(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_deep_sizeof(v) for v in obj)
+    return size
+
+
+def scoped_user_id(tenant_id: Optional[str], user_id: str) -> str:
+    """
+    User memory / context key: the same user id under two brands is two users.
+    """
+    if not tenant_id or tenant_id == DEFAULT_TENANT:
+        return user_id
+    return f"{tenant_id}:{user_id}"
+
+
+class Tenant:
+    """
+    One brand's catalogs and lazily built indexes. Resources are only
+    dropped by release(), which the registry calls on eviction.
+    """
+
+    def __init__(self, tenant_id: str, config: Optional[Dict[str, Any]] = None, generation: int = 0):
+        from backend.services.rag_service import COLLECTION_NAME
+
+        config = config or {}
+        self.tenant_id = tenant_id
+        self.is_default = tenant_id == DEFAULT_TENANT
+        self.brand_name: str = config.get("brand_name") or tenant_id
+        self.stores: Optional[List[Dict[str, Any]]] = config.get("stores")
+        discounts = config.get("tier_discounts")
+        self.tier_discounts: Optional[Dict[str, int]] = (
+            {k.lower(): v for k, v in discounts.items()} if discounts is not None else None
+        )
+        self.faq_docs: Optional[List[Dict[str, Any]]] = config.get("faq_docs")
+        self.prompts: Dict[str, str] = config.get("prompts") or {}
+        self.collection_name = COLLECTION_NAME if self.is_default else f"{COLLECTION_NAME}__{tenant_id}"
+        self.generation = generation
+
+        self._lock = threading.Lock()
+        self._faq_index = None
+        self._quantized_index = None
+        self._config_bytes = _deep_sizeof(config)
+        self._index_bytes = 0
+        self._mapped_bytes = 0
+
+    # ---- stores + offers ----
+
+    def nearby_stores(self, lat, lng, intents=None) -> List[Dict[str, Any]]:
+        from backend.services.store_locator import get_nearby_stores
+
+        return get_nearby_stores(lat, lng, intents=intents, catalog=self.stores)
+
+    def build_offers(self, tier: str, stores: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        from backend.services.offers import build_offers
+
+        return build_offers(tier, stores, tier_discounts=self.tier_discounts)
+
+    def catalog_versions(self) -> Tuple[int, int]:
+        """
+        What location_cache compares to detect a stale entry.
+        """
+        from backend.services import offers, store_locator
+
+        # A tenant's own catalogs only change by reloading it (new generation)
+        store_v = store_locator.catalog_version() if self.stores is None else self.generation
+        offer_v = offers.catalog_version() if self.tier_discounts is None else self.generation
+        return store_v, offer_v
+
+    # ---- RAG + extractive FAQ ----
+
+    def _get_quantized_index(self):
+        from backend.services import rag_service
+
+        if self.is_default:
+            return rag_service.get_quantized_index()
+        if self._quantized_index is None:
+            with self._lock:
+                if self._quantized_index is None:
+                    from backend.services.vector_index import QuantizedIndex
+
+                    path = os.path.join(rag_service.QUANTIZED_INDEX_DIR, self.tenant_id)
+                    self._quantized_index = QuantizedIndex(path)
+                    # Upper bound on what the mmap'd files can keep resident
+                    self._mapped_bytes = sum(
+                        os.path.getsize(os.path.join(path, name)) for name in os.listdir(path)
+                    )
+        return self._quantized_index
+
+    def ensure_bootstrapped(self):
+        """
+        Write the tenant's faq_docs into its Chroma collection if it's empty.
+        """
+        from backend.services import rag_service
+
+        if self.is_default:
+            rag_service.ensure_bootstrapped()
+        else:
+            rag_service.ensure_bootstrapped(self.collection_name, self.faq_docs or [])
+
+    def rag_query(self, question: str, top_k: int = 3) -> List[Dict[str, Any]]:
+        from backend.services import rag_service
+
+        if self.is_default:
+            return rag_service.rag_query(question, top_k=top_k)
+        if rag_service.RAG_BACKEND == "quantized":
+            return rag_service.rag_query(question, top_k=top_k, index=self._get_quantized_index())
+        self.ensure_bootstrapped()
+        return rag_service.rag_query(question, top_k=top_k, collection_name=self.collection_name)
+
+    def faq_index(self):
+        from backend.services import faq_answers
+
+        if self.is_default:
+            return faq_answers.get_category_index()
+        if self._faq_index is None:
+            with self._lock:
+                if self._faq_index is None:
+                    self._faq_index = faq_answers.build_category_index(
+                        self.faq_docs or [], self.collection_name
+                    )
+                    self._index_bytes = _deep_sizeof(self._faq_index)
+        return self._faq_index
+
+    # ---- prompts ----
+
+    def prompt(self, kind: str) -> Optional[str]:
+        """
+        System prompt for "intent" / "response", or None for the built-in one.
+        """
+        template = self.prompts.get(kind)
+        if not template:
+            return None
+        if kind == "intent":
+            from backend.llm.agent_intent import INTENT_SYSTEM_PROMPT as default
+        else:
+            from backend.llm.agent_response import RESPONSE_SYSTEM_PROMPT as default
+        return template.replace("{default}", default)
+
+    # ---- bookkeeping ----
+
+    def size_bytes(self) -> int:
+        return self._config_bytes + self._index_bytes + self._mapped_bytes
+
+    def release(self):
+        """
+        Drop cached indexes and location-cache entries. Turns still holding
+        this object keep working; the mmap'd files close once they finish.
+        """
+        from backend.services import location_cache
+
+        with self._lock:
+            self._faq_index = None
+            self._quantized_index = None
+            self._index_bytes = 0
+            self._mapped_bytes = 0
+        location_cache.invalidate(self.tenant_id)
+
+
+def tenant_config_path(tenant_id: str) -> str:
+    return os.path.join(TENANTS_DIR, tenant_id, "tenant.json")
+
+
+def _validate_id(tenant_id: Optional[str]) -> str:
+    tenant_id = (tenant_id or DEFAULT_TENANT).strip().lower()
+    if not _TENANT_ID_RE.match(tenant_id):
+        raise UnknownTenantError(tenant_id)
+    return tenant_id
+
+
+_lock = threading.Lock()
+_TENANTS: "OrderedDict[str, Tenant]" = OrderedDict()
+_BROKEN: Dict[str, int] = {}  # tenant_id -> mtime_ns of the tenant.json that failed
+_generation = 0
+
+
+def _check_config(config: Any):
+    if not isinstance(config, dict):
+        raise ValueError("expected a JSON object")
+    for key, expected in _CONFIG_TYPES.items():
+        value = config.get(key)
+        if value is not None and not isinstance(value, expected):
+            raise ValueError(f"{key!r} should be a {expected.__name__}")
+
+
+def _load_tenant(tenant_id: str) -> Tenant:
+    global _generation
+    if tenant_id == DEFAULT_TENANT:
+        return Tenant(DEFAULT_TENANT)
+    path = tenant_config_path(tenant_id)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        raise UnknownTenantError(tenant_id) from None
+    with _lock:
+        known_broken = _BROKEN.get(tenant_id) == mtime
+    if known_broken:
+        raise TenantConfigError(f"tenant unavailable (bad configuration): {tenant_id}")
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)  # JSONDecodeError / UnicodeDecodeError are ValueErrors
+        _check_config(config)
+        with _lock:
+            _generation += 1
+            generation = _generation
+        tenant = Tenant(tenant_id, config, generation)
+    except FileNotFoundError:
+        raise UnknownTenantError(tenant_id) from None
+    except (OSError, ValueError, AttributeError, KeyError, TypeError) as e:
+        logger.error("tenant %s: unusable config %s: %s", tenant_id, path, e)
+        metrics.incr("tenants.config_errors")
+        with _lock:
+            _BROKEN[tenant_id] = mtime
+        raise TenantConfigError(f"tenant unavailable (bad configuration): {tenant_id}") from e
+    with _lock:
+        _BROKEN.pop(tenant_id, None)
+    return tenant
+
+
+def _evict_over_budget(keep: str):
+    """
+    Drop least recently used tenants until the total fits the budget.
+    Caller holds _lock. The default tenant and `keep` are never dropped.
+    """
+    budget = TENANT_CACHE_BUDGET_MB * 1024 * 1024
+    total = sum(t.size_bytes() for t in _TENANTS.values())
+    for tid in list(_TENANTS):
+        if total <= budget:
+            break
+        if tid in (keep, DEFAULT_TENANT):
+            continue
+        tenant = _TENANTS.pop(tid)
+        total -= tenant.size_bytes()
+        tenant.release()
+        metrics.incr("tenants.evicted")
+
+
+def get_tenant(tenant_id: Optional[str] = None) -> Tenant:
+    """
+    Loaded tenant for an id (None / "" -> default), loading it on first use.
+    Raises UnknownTenantError for a malformed id or one without a config,
+    TenantConfigError when its config is unusable.
+    """
+    tenant_id = _validate_id(tenant_id)
+    with _lock:
+        tenant = _TENANTS.get(tenant_id)
+        if tenant is not None:
+            _TENANTS.move_to_end(tenant_id)
+            # Indexes are built lazily, so sizes grow after the load
+            _evict_over_budget(keep=tenant_id)
+            return tenant
+
+    tenant = _load_tenant(tenant_id)
+    with _lock:
+        existing = _TENANTS.get(tenant_id)
+        if existing is not None:  # another thread got there first
+            _TENANTS.move_to_end(tenant_id)
+            return existing
+        _TENANTS[tenant_id] = tenant
+        metrics.incr("tenants.loaded")
+        _evict_over_budget(keep=tenant_id)
+    return tenant
+
+
+def evict_tenant(tenant_id: str) -> bool:
+    """
+    Drop a tenant's cached state now; it reloads from disk on next use.
+    """
+    with _lock:
+        tenant = _TENANTS.pop(_validate_id(tenant_id), None)
+    if tenant is None:
+        return False
+    tenant.release()
+    return True
+
+
+def reload_tenant(tenant_id: str) -> Tenant:
+    """
+    Pick up an edited tenant.json (or ingested docs) without a restart.
+    """
+    evict_tenant(tenant_id)
+    return get_tenant(tenant_id)
+
+
+def registry_stats() -> Dict[str, Any]:
+    """
+    Loaded tenants (LRU order, oldest first) with their estimated sizes and
+    per-tenant turn counts, for GET /metrics.
+    """
+    with _lock:
+        loaded = [(tid, t.size_bytes()) for tid, t in _TENANTS.items()]
+    return {
+        "budget_mb": TENANT_CACHE_BUDGET_MB,
+        "loaded": len(loaded),
+        "size_mb": sum(size for _, size in loaded) / (1024 * 1024),
+        "evicted": metrics.get_counter("tenants.evicted"),
+        "config_errors": metrics.get_counter("tenants.config_errors"),
+        "tenants": {
+            tid: {
+                "size_kb": size / 1024,
+                "turns": metrics.get_counter(f"tenant.{tid}.turns"),
+                "faq_extractive": metrics.get_counter(f"tenant.{tid}.faq_extractive"),
+            }
+            for tid, size in loaded
+        },
+    }
@@ -0,0 +1,127 @@
+# backend/services/user_context.py
+
+import json
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+from backend.services.offers import _discount_for_tier
+from backend.services.user_memory import add_mutation_listener, get_user_profile
+from backend.services.user_profile import get_user_profile_light
+
+# Per-user context that is the same on every turn (light profile, persistent
+# preferences, tier, last seen store), built once and pre-serialized so both
+# agents can splice it into their prompts as-is. Rebuilt only after a
+# user_memory mutator touches the user; chat turns only append history,
+# which is serialized separately and doesn't invalidate the snapshot.
+
+
+# One shared encoder: json.dumps() with non-default options builds a new
+# JSONEncoder per call, which shows up at this call rate.
+_compact = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+def splice_json(fragments: List[Tuple[str, str]], rest: Dict[str, Any]) -> str:
+    """
+    Build a JSON object string from pre-serialized (key, json_text) fragments
+    followed by the regular `rest` fields. Fragments come first so the prompt
+    prefix stays byte-identical for the same user.
+    """
+    head = ",".join(_compact(k) + ":" + frag for k, frag in fragments)
+    if not rest:
+        return "{" + head + "}"
+    tail = _compact(rest)  # "{...}"
+    if not head:
+        return tail
+    return "{" + head + "," + tail[1:]
+
+
+def intent_profile(profile_light: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The part of the light profile Agent-1 sees: what kind of customer is
+    asking, not who. Leaving out user_id / name keeps the Agent-1 prompt
+    identical for the same question from different users, so concurrent
+    turns share one generation (llm/client.py).
+    """
+    return {"loyalty_tier": profile_light.get("loyalty_tier", "Bronze")}
+
+
+class UserContextSnapshot:
+    __slots__ = (
+        "user_id",
+        "version",
+        "profile_light",
+        "loyalty_tier",
+        "discount",
+        "light_json",
+        "intent_json",
+        "_persistent_prefix",
+        "_history",
+    )
+
+    def __init__(self, user_id: str, version: Tuple[int, int]):
+        self.user_id = user_id
+        self.version = version
+
+        persistent = get_user_profile(user_id)
+        self.profile_light = get_user_profile_light(user_id)
+        # The tier lives in the light profile (users.json); the memory
+        # profile's "loyalty_tier" is only ever the "Bronze" default.
+        self.loyalty_tier = self.profile_light.get("loyalty_tier", "Bronze")
+        self.discount = _discount_for_tier(self.loyalty_tier)
+        self.light_json = _compact(self.profile_light)
+        self.intent_json = _compact(intent_profile(self.profile_light))
+
+        # Everything but history; history is the only per-turn part.
+        stable = {k: v for k, v in persistent.items() if k != "history"}
+        self._persistent_prefix = _compact(stable)[:-1] + ',"history":'
+        self._history = persistent["history"]  # live list, read at serialize time
+
+    def persistent_json(self) -> str:
+        return self._persistent_prefix + _compact(self._history) + "}"
+
+    def history_turns(self) -> int:
+        return len(self._history)
+
+
+_lock = threading.Lock()
+_SNAPSHOTS: Dict[str, UserContextSnapshot] = {}
+_VERSIONS: Dict[str, int] = {}
+_epoch = 0  # bumped by reset_all
+
+
+def _on_memory_mutation(user_id: Optional[str], op: str):
+    global _epoch
+    if op == "turn":
+        return  # history is serialized per turn, snapshot stays valid
+    with _lock:
+        if user_id is None:
+            _epoch += 1
+            _SNAPSHOTS.clear()
+        else:
+            _VERSIONS[user_id] = _VERSIONS.get(user_id, 0) + 1
+            _SNAPSHOTS.pop(user_id, None)
+
+
+add_mutation_listener(_on_memory_mutation)
+
+
+def invalidate_user_context(user_id: Optional[str] = None):
+    """
+    Drop cached snapshots (e.g. after editing users.json).
+    """
+    _on_memory_mutation(user_id, "invalidate")
+
+
+def get_user_context(user_id: str) -> UserContextSnapshot:
+    with _lock:
+        version = (_epoch, _VERSIONS.get(user_id, 0))
+        snap = _SNAPSHOTS.get(user_id)
+    if snap is not None and snap.version == version:
+        return snap
+
+    snap = UserContextSnapshot(user_id, version)
+    with _lock:
+        # Only publish if nothing changed while we were building
+        if version == (_epoch, _VERSIONS.get(user_id, 0)):
+            _SNAPSHOTS[user_id] = snap
+    return snap
@@ -1,56 +1,164 @@
 # backend/services/user_memory.py
 
-from typing import Dict, Any, List
+import os
+import threading
+from typing import Dict, Any, List, Callable, Optional
+
+from backend.services.memory_log import WriteBehindLog, replay_log
 
 # In-memory store; for hackathon this is perfect.
 USER_MEMORY: Dict[str, Dict[str, Any]] = {}
 
+# Durable copy: every mutation is also appended (write-behind, off the
+# request path) to this JSONL log and replayed on startup.
+# Set USER_MEMORY_LOG="" to keep memory purely in-process.
+# The log is plaintext: callers store PII-masked conversation text only
+# (see app._chat_pipeline), but preferences / last order / last store are
+# written as given, so treat the file as user data.
+MEMORY_LOG_PATH = os.getenv(
+    "USER_MEMORY_LOG",
+    os.path.join(os.path.dirname(__file__), "..", "data", "user_memory_log.jsonl"),
+)
+
+_lock = threading.RLock()
+_loaded = False
+
+# Called as fn(user_id, op) after every mutation (user_id is None for reset_all).
+_LISTENERS: List[Callable[[Optional[str], str], None]] = []
+
+
+def _new_profile() -> Dict[str, Any]:
+    return {
+        "preferences": {
+            "favorite_drinks": [],
+            "dislikes": [],
+            "allergies": [],
+        },
+        "loyalty_tier": "Bronze",
+        "history": [],
+        "last_seen_store": None,
+        "last_order": None,
+    }
+
+
+def _apply_record(memory: Dict[str, Dict[str, Any]], record: Dict[str, Any]):
+    """
+    Single place where mutations happen, used both live and on log replay.
+    """
+    op = record.get("op")
+    user_id = record.get("user_id")
+
+    if op == "reset_all":
+        memory.clear()
+        return
+    if op == "reset_user":
+        memory.pop(user_id, None)
+        return
+    if op == "put":
+        memory[user_id] = record["profile"]
+        return
+
+    profile = memory.get(user_id)
+    if profile is None:
+        profile = memory[user_id] = _new_profile()
+
+    if op == "turn":
+        history = profile["history"]
+        history.append({"user": record["user"], "bot": record["bot"]})
+        # keep only last 20 for speed
+        if len(history) > 20:
+            history.pop(0)
+    elif op == "preference":
+        key, value = record["key"], record["value"]
+        profile["preferences"].setdefault(key, [])
+        if value not in profile["preferences"][key]:
+            profile["preferences"][key].append(value)
+    elif op == "last_order":
+        profile["last_order"] = record["order"]
+    elif op == "last_seen_store":
+        profile["last_seen_store"] = record["store"]
+
+
+_log = WriteBehindLog(MEMORY_LOG_PATH, _apply_record) if MEMORY_LOG_PATH else None
+
+
+def _ensure_loaded():
+    global _loaded
+    if _loaded:
+        return
+    with _lock:
+        if not _loaded:
+            if _log is not None:
+                USER_MEMORY.update(replay_log(MEMORY_LOG_PATH, _apply_record))
+            _loaded = True
+
+
+def _record(record: Dict[str, Any]):
+    """
+    Apply a mutation in memory right away (so reads see it immediately)
+    and queue it for the durable log.
+    """
+    _ensure_loaded()
+    with _lock:
+        _apply_record(USER_MEMORY, record)
+        if _log is not None:
+            _log.append(record)
+    for fn in _LISTENERS:
+        fn(record.get("user_id"), record["op"])
+
+
+def add_mutation_listener(fn: Callable[[Optional[str], str], None]):
+    """
+    Register a callback for memory mutations (used to invalidate caches).
+    """
+    if fn not in _LISTENERS:
+        _LISTENERS.append(fn)
+
+
+def load_user_memory():
+    """
+    Replay the durable log now instead of on the first memory access.
+    """
+    _ensure_loaded()
+
+
+def flush_user_memory(timeout: float = 10.0) -> bool:
+    """
+    Wait until all queued mutations are on disk (e.g. on shutdown).
+    """
+    if _log is None:
+        return True
+    return _log.flush(timeout=timeout)
+
+
 def get_user_profile(user_id: str) -> Dict[str, Any]:
-    if user_id not in USER_MEMORY:
-        USER_MEMORY[user_id] = {
-            "preferences": {
-                "favorite_drinks": [],
-                "dislikes": [],
-                "allergies": [],
-            },
-            "loyalty_tier": "Bronze",
-            "history": [],
-            "last_seen_store": None,
-            "last_order": None,
-        }
-    return USER_MEMORY[user_id]
+    _ensure_loaded()
+    with _lock:
+        if user_id not in USER_MEMORY:
+            USER_MEMORY[user_id] = _new_profile()
+        return USER_MEMORY[user_id]
 
 def update_conversation_history(user_id: str, user_message: str, bot_reply: str):
-    profile = get_user_profile(user_id)
-    history = profile["history"]
-    history.append({"user": user_message, "bot": bot_reply})
-    # keep only last 20 for speed
-    if len(history) > 20:
-        history.pop(0)
+    _record({"op": "turn", "user_id": user_id, "user": user_message, "bot": bot_reply})
 
 def store_preference(user_id: str, key: str, value: str):
-    profile = get_user_profile(user_id)
-    profile["preferences"].setdefault(key, [])
-    if value not in profile["preferences"][key]:
-        profile["preferences"][key].append(value)
+    _record({"op": "preference", "user_id": user_id, "key": key, "value": value})
 
 def set_last_order(user_id: str, order: Dict[str, Any]):
-    profile = get_user_profile(user_id)
-    profile["last_order"] = order
+    _record({"op": "last_order", "user_id": user_id, "order": order})
 
 def set_last_seen_store(user_id: str, store_info: Dict[str, Any]):
-    profile = get_user_profile(user_id)
-    profile["last_seen_store"] = store_info
+    _record({"op": "last_seen_store", "user_id": user_id, "store": store_info})
 
 def reset_user(user_id: str):
     """
     Clear memory for a single user.
     """
-    USER_MEMORY.pop(user_id, None)
+    _record({"op": "reset_user", "user_id": user_id})
 
 
 def reset_all():
     """
     Clear memory for all users.
     """
-    USER_MEMORY.clear()
+    _record({"op": "reset_all"})
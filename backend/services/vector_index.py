@@ -0,0 +1,214 @@
+# backend/services/vector_index.py
+
+import json
+import mmap
+import os
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+# Int8-quantized, memory-mapped embedding index (alternative to Chroma's
+# float32 HNSW files). Everything big is an .npy opened with mmap_mode="r",
+# so every worker process shares the same pages through the OS page cache
+# instead of holding its own copy.
+#
+# On-disk layout (one directory):
+#   manifest.json      {"dim", "count", "nlist", "model"}
+#   vectors.i8.npy     (count, dim) int8, rows grouped by IVF list
+#   scales.npy         (count,) float32, per-row dequantization scale
+#   centroids.npy      (nlist, dim) float32       (IVF only)
+#   list_offsets.npy   (nlist + 1,) int64         (IVF only)
+#   docs.jsonl         one {"id", "text", "metadata"} per row, same order
+#   doc_offsets.npy    (count + 1,) int64 byte offsets into docs.jsonl
+#
+# Scores are cosine similarities; returned "distance" is 2 - 2*cos, i.e.
+# the squared L2 distance Chroma reports for normalized embeddings.
+
+IVF_MIN_ROWS = 50_000   # below this, exact search over all rows is fast enough
+DEFAULT_NPROBE = 8
+SEARCH_BLOCK_ROWS = 65_536  # dequantize this many rows at a time
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(x, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return x / norms
+
+
+def quantize_int8(vectors: np.ndarray):
+    """
+    Symmetric per-row int8 quantization: row ≈ q * scale.
+    """
+    max_abs = np.abs(vectors).max(axis=1)
+    scales = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+    q = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return q, scales
+
+
+def _train_ivf(vectors: np.ndarray, nlist: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """
+    Spherical k-means on (a sample of) the normalized vectors.
+    """
+    rng = np.random.default_rng(seed)
+    sample = vectors
+    if len(vectors) > nlist * 64:
+        sample = vectors[rng.choice(len(vectors), nlist * 64, replace=False)]
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assign = _assign_lists(sample, centroids)
+        # Sum members per list in one pass (rows sorted by list + reduceat)
+        order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=nlist)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        nonempty = counts > 0
+        centroids[nonempty] = np.add.reduceat(sample[order], starts[nonempty], axis=0)
+        centroids = _normalize(centroids)
+    return centroids.astype(np.float32)
+
+
+def _assign_lists(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    # Blocked so the (rows x nlist) score matrix stays small
+    step = max(1, SEARCH_BLOCK_ROWS * 64 // max(len(centroids), 1))
+    out = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), step):
+        block = vectors[start:start + step]
+        out[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return out
+
+
+def build_index(
+    out_dir: str,
+    ids: List[str],
+    texts: List[str],
+    metadatas: List[Dict[str, Any]],
+    embeddings: np.ndarray,
+    model: str = "all-MiniLM-L6-v2",
+    nlist: Optional[int] = None,
+):
+    """
+    Write an index directory from float embeddings (one row per doc).
+    nlist=None picks exact search for small corpora and ~4*sqrt(N) lists otherwise.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+    count, dim = vectors.shape
+
+    if nlist is None:
+        nlist = int(4 * np.sqrt(count)) if count >= IVF_MIN_ROWS else 0
+    nlist = min(nlist, count)
+
+    order = np.arange(count)
+    if nlist:
+        centroids = _train_ivf(vectors, nlist)
+        lists = _assign_lists(vectors, centroids)
+        order = np.argsort(lists, kind="stable")
+        counts = np.bincount(lists, minlength=nlist)
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        np.save(os.path.join(out_dir, "centroids.npy"), centroids)
+        np.save(os.path.join(out_dir, "list_offsets.npy"), offsets)
+
+    q, scales = quantize_int8(vectors[order])
+    np.save(os.path.join(out_dir, "vectors.i8.npy"), q)
+    np.save(os.path.join(out_dir, "scales.npy"), scales)
+
+    doc_offsets = [0]
+    with open(os.path.join(out_dir, "docs.jsonl"), "wb") as f:
+        for i in order:
+            line = json.dumps(
+                {"id": ids[i], "text": texts[i], "metadata": metadatas[i] or {}},
+                ensure_ascii=False,
+            ).encode("utf-8") + b"\n"
+            f.write(line)
+            doc_offsets.append(doc_offsets[-1] + len(line))
+    np.save(os.path.join(out_dir, "doc_offsets.npy"), np.array(doc_offsets, dtype=np.int64))
+
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({"dim": dim, "count": count, "nlist": nlist, "model": model}, f, indent=2)
+
+
+class QuantizedIndex:
+    """
+    Read-only view over an index directory; cheap to open in every worker.
+    """
+
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+        with open(os.path.join(index_dir, "manifest.json"), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+
+        def load(name):
+            return np.load(os.path.join(index_dir, name), mmap_mode="r")
+
+        self.vectors = load("vectors.i8.npy")
+        self.scales = load("scales.npy")
+        self.doc_offsets = load("doc_offsets.npy")
+        self.nlist = int(self.manifest.get("nlist") or 0)
+        if self.nlist:
+            self.centroids = np.asarray(load("centroids.npy"))
+            self.list_offsets = np.asarray(load("list_offsets.npy"))
+
+        self._docs_file = open(os.path.join(index_dir, "docs.jsonl"), "rb")
+        self._docs = mmap.mmap(self._docs_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return int(self.manifest["count"])
+
+    def close(self):
+        self._docs.close()
+        self._docs_file.close()
+
+    def _doc(self, row: int) -> Dict[str, Any]:
+        start, end = int(self.doc_offsets[row]), int(self.doc_offsets[row + 1])
+        return json.loads(self._docs[start:end])
+
+    def _score_rows(self, start: int, end: int, query: np.ndarray) -> np.ndarray:
+        out = np.empty(end - start, dtype=np.float32)
+        for b in range(start, end, SEARCH_BLOCK_ROWS):
+            e = min(b + SEARCH_BLOCK_ROWS, end)
+            block = self.vectors[b:e].astype(np.float32)
+            out[b - start:e - start] = (block @ query) * self.scales[b:e]
+        return out
+
+    def search_rows(self, query: np.ndarray, top_k: int = 3, nprobe: int = DEFAULT_NPROBE):
+        """
+        Returns [(row, cosine_score), ...] best first.
+        """
+        query = _normalize(np.asarray(query, dtype=np.float32).reshape(-1))
+        if self.nlist:
+            probe = np.argsort(-(self.centroids @ query))[:nprobe]
+            rows_parts, score_parts = [], []
+            for c in probe:
+                s, e = int(self.list_offsets[c]), int(self.list_offsets[c + 1])
+                if e > s:
+                    rows_parts.append(np.arange(s, e))
+                    score_parts.append(self._score_rows(s, e, query))
+            if not rows_parts:
+                return []
+            rows = np.concatenate(rows_parts)
+            scores = np.concatenate(score_parts)
+        else:
+            rows = np.arange(len(self))
+            scores = self._score_rows(0, len(self), query)
+
+        k = min(top_k, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(rows[i]), float(scores[i])) for i in top]
+
+    def search(self, query: np.ndarray, top_k: int = 3, nprobe: int = DEFAULT_NPROBE) -> List[Dict[str, Any]]:
+        """
+        Same shape as rag_query(): [{text, metadata, distance}, ...].
+        """
+        out: List[Dict[str, Any]] = []
+        for row, score in self.search_rows(query, top_k=top_k, nprobe=nprobe):
+            doc = self._doc(row)
+            out.append(
+                {
+                    "text": doc["text"],
+                    "metadata": doc.get("metadata") or {},
+                    "distance": max(0.0, 2.0 - 2.0 * score),
+                }
+            )
+        return out
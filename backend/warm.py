@@ -0,0 +1,115 @@
+# backend/warm.py
+
+"""
+Load everything the first chat turn would otherwise pay for.
+
+  python -m backend.warm                      # all steps
+  python -m backend.warm --steps rag,faq      # a subset
+  python -m backend.warm --list
+
+Run it as a pre-start step of a replica (it also writes the static FAQ docs
+into Chroma if the collection is empty). The API itself runs the in-process
+steps in a background thread after startup (see WARM_ON_STARTUP in app.py).
+"""
+
+import argparse
+import sys
+import time
+from typing import Dict, Any, Callable, List, Optional
+
+
+def _warm_imports():
+    import numpy  # noqa: F401  location cache
+    import ollama  # noqa: F401  LLM client
+
+
+def _warm_memory():
+    from backend.services.user_memory import load_user_memory
+
+    load_user_memory()
+
+
+def _warm_rag():
+    from backend.services import rag_service
+
+    if rag_service.RAG_BACKEND == "quantized":
+        rag_service.get_quantized_index()
+        rag_service.embed_texts(["warm up"])  # loads the ONNX embedding model
+        return
+    rag_service.ensure_bootstrapped()
+    rag_service.rag_query("warm up", top_k=1)  # loads the ONNX embedding model
+
+
+def _warm_faq():
+    from backend.services.faq_answers import get_category_index
+
+    get_category_index()
+
+
+def _warm_models():
+    from backend.llm import client as llm_client
+    from backend.llm import model_router
+
+    models = {model_router.LARGE_MODEL}
+    if model_router.ROUTING_ENABLED:
+        models.add(model_router.SMALL_MODEL)
+    for model in sorted(models):
+        llm_client.preload(model)
+
+
+STEPS: Dict[str, Callable[[], None]] = {
+    "imports": _warm_imports,
+    "memory": _warm_memory,
+    "rag": _warm_rag,
+    "faq": _warm_faq,
+    "models": _warm_models,  # loads the models into the Ollama server
+}
+
+# What the API warms in-process after startup; "models" touches the shared
+# Ollama server, so only the CLI does it by default.
+IN_PROCESS_STEPS = ["imports", "memory", "rag", "faq"]
+
+
+def warm(steps: Optional[List[str]] = None, verbose: bool = False) -> Dict[str, Any]:
+    """
+    Run the given steps (default: all) in order. A failing step is reported
+    and skipped, so e.g. a missing Ollama doesn't stop the RAG warm-up.
+    Returns {step: seconds or "error: ..."}.
+    """
+    results: Dict[str, Any] = {}
+    for name in steps or list(STEPS):
+        start = time.perf_counter()
+        try:
+            STEPS[name]()
+            results[name] = time.perf_counter() - start
+        except Exception as e:
+            results[name] = f"error: {e}"
+        if verbose:
+            value = results[name]
+            print(f"  {name:<8} " + (f"{value:.2f}s" if isinstance(value, float) else value))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm caches, indexes and models")
+    parser.add_argument("--steps", default="", help="comma-separated: " + ",".join(STEPS))
+    parser.add_argument("--list", action="store_true")
+    args = parser.parse_args()
+
+    if args.list:
+        print("\n".join(STEPS))
+        return
+
+    steps = [s.strip() for s in args.steps.split(",") if s.strip()] or list(STEPS)
+    unknown = [s for s in steps if s not in STEPS]
+    if unknown:
+        parser.error(f"unknown step(s): {', '.join(unknown)}")
+
+    print("Warming:")
+    results = warm(steps, verbose=True)
+    if any(isinstance(v, str) for v in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+# bench/fair_load.py
+
+"""
+Synthetic multi-user load against the LLM scheduler (backend/llm/scheduler.py).
+
+  python -m bench.fair_load
+  python -m bench.fair_load --slots 2 --latency-ms 300 --heavy-threads 16
+  python -m bench.fair_load --save-baseline     # stored under "fair_load"
+
+Runs the chat pipeline in-process against the fake Ollama server, once with
+the scheduler as plain FIFO admission (fair=False) and once with priority
+classes + per-user fair queueing, using the same traffic:
+  heavy     one user firing from many threads at once
+  light     a few users sending one turn at a time
+  gold      a Gold member (GOLD_USER, Gold in users.json / the built-in profile)
+  in_store  a user standing at a store
+  batch     batch jobs (ChatRequest.batch)
+
+Every turn is a store-discovery message with a unique suffix so no two
+generations coalesce. Reported per group: latency percentiles and how many
+turns were rejected (429: user queue full, 503: deadline passed).
+"""
+
+import argparse
+import os
+import threading
+import time
+from typing import Dict, Any, List
+
+from bench.fake_ollama import serve_fake_ollama
+from bench.report import (
+    DEFAULT_BASELINE_PATH,
+    DEFAULT_TOLERANCE,
+    compare_to_baseline,
+    load_baseline,
+    percentile,
+    print_table,
+    save_baseline,
+)
+
+GROUPS = ("heavy", "light", "gold", "in_store", "batch")
+
+# Starbucks MG Road in the default store catalog
+STORE_LAT, STORE_LNG = 12.9717, 77.5948
+AWAY_LAT, AWAY_LNG = 12.9352, 77.6245
+
+# Gold through the regular profile path (user_profile.get_user_profile_light)
+GOLD_USER = "demo_user"
+
+
+def _traffic(args) -> List[Dict[str, Any]]:
+    """
+    One entry per client thread: {group, payload template, turns, pause_s}.
+    """
+    base = {"lat": AWAY_LAT, "lng": AWAY_LNG, "timeout_s": args.timeout_s}
+    clients = [
+        {"group": "heavy", "payload": dict(base, user_id="heavy_user"), "turns": args.turns, "pause_s": 0.0}
+        for _ in range(args.heavy_threads)
+    ]
+    clients += [
+        {"group": "light", "payload": dict(base, user_id=f"light_user_{i}"), "turns": args.turns, "pause_s": args.think_s}
+        for i in range(args.light_users)
+    ]
+    clients.append({"group": "gold", "payload": dict(base, user_id=GOLD_USER), "turns": args.turns, "pause_s": args.think_s})
+    clients.append({
+        "group": "in_store",
+        "payload": dict(base, user_id="in_store_user", lat=STORE_LAT, lng=STORE_LNG),
+        "turns": args.turns,
+        "pause_s": args.think_s,
+    })
+    clients += [
+        {"group": "batch", "payload": dict(base, user_id=f"batch_job_{i}", batch=True, timeout_s=0), "turns": args.turns, "pause_s": 0.0}
+        for i in range(args.batch_jobs)
+    ]
+    return clients
+
+
+def _prepare_users():
+    from backend.services import location_cache
+    from backend.services.user_context import get_user_context
+    from backend.services.user_memory import reset_all
+
+    reset_all()
+    location_cache.invalidate()
+    tier = get_user_context(GOLD_USER).loyalty_tier
+    if tier != "Gold":
+        raise SystemExit(f"{GOLD_USER} is {tier}, not Gold, in users.json; the gold group would measure nothing")
+
+
+def run_mode(app_module, clients: List[Dict[str, Any]], fair: bool, slots: int) -> Dict[str, Dict[str, float]]:
+    from fastapi import HTTPException
+
+    from backend.llm import scheduler as llm_scheduler
+    from backend.services import metrics
+
+    _prepare_users()
+    metrics.reset()
+    llm_scheduler.configure(llm_scheduler.Scheduler(concurrency=slots, fair=fair))
+
+    lock = threading.Lock()
+    latencies: Dict[str, List[float]] = {g: [] for g in GROUPS}
+    status: Dict[str, Dict[str, int]] = {g: {"429": 0, "503": 0, "error": 0} for g in GROUPS}
+    seq = iter(range(10 ** 9))
+    barrier = threading.Barrier(len(clients))
+
+    def client(spec):
+        group = spec["group"]
+        barrier.wait()
+        for _ in range(spec["turns"]):
+            with lock:
+                n = next(seq)
+            payload = dict(spec["payload"], message=f"where is the nearest coffee shop? (ref {n})")
+            t0 = time.perf_counter()
+            try:
+                app_module.chat_endpoint(app_module.ChatRequest(**payload))
+                outcome = None
+            except HTTPException as e:
+                outcome = str(e.status_code) if str(e.status_code) in ("429", "503") else "error"
+            except Exception:
+                outcome = "error"
+            elapsed_ms = (time.perf_counter() - t0) * 1000.0
+            with lock:
+                if outcome is None:
+                    latencies[group].append(elapsed_ms)
+                else:
+                    status[group][outcome] += 1
+            if spec["pause_s"]:
+                time.sleep(spec["pause_s"])
+
+    threads = [threading.Thread(target=client, args=(spec,), daemon=True) for spec in clients]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    results: Dict[str, Dict[str, float]] = {}
+    for group in GROUPS:
+        ms = latencies[group]
+        results[group] = {
+            "count": len(ms),
+            "p50_ms": percentile(ms, 50),
+            "p95_ms": percentile(ms, 95),
+            "rejected_429": status[group]["429"],
+            "dropped_503": status[group]["503"],
+            "errors": status[group]["error"],
+        }
+    stats = llm_scheduler.scheduler_stats()
+    results["scheduler"] = {f"wait_p95_ms:{name}": w["p95"] for name, w in stats["wait_ms"].items()}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-user load against the LLM scheduler")
+    parser.add_argument("--slots", type=int, default=2, help="scheduler concurrency (model server parallelism)")
+    parser.add_argument("--latency-ms", type=float, default=150.0, help="fake server latency")
+    parser.add_argument("--tokens-per-s", type=float, default=0.0, help="fake server streaming rate")
+    parser.add_argument("--turns", type=int, default=4, help="turns per client thread")
+    parser.add_argument("--heavy-threads", type=int, default=12)
+    parser.add_argument("--light-users", type=int, default=3)
+    parser.add_argument("--batch-jobs", type=int, default=3)
+    parser.add_argument("--think-s", type=float, default=0.2, help="pause between a light user's turns")
+    parser.add_argument("--timeout-s", type=float, default=30.0, help="client timeout sent with interactive turns")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    # In-process API without touching the real memory log or warming in the background
+    os.environ.setdefault("USER_MEMORY_LOG", "")
+    os.environ.setdefault("WARM_ON_STARTUP", "off")
+    from backend import app as app_module
+    from backend.llm import scheduler as llm_scheduler
+
+    clients = _traffic(args)
+    try:
+        with serve_fake_ollama(latency_ms=args.latency_ms, tokens_per_s=args.tokens_per_s):
+            results: Dict[str, Dict[str, float]] = {}
+            for name, fair in (("fifo", False), ("fair", True)):
+                print(f"{name}: {len(clients)} clients x {args.turns} turns, {args.slots} slots ...")
+                for section, values in run_mode(app_module, clients, fair, args.slots).items():
+                    results[f"{name}:{section}"] = values
+    finally:
+        llm_scheduler.configure(None)
+
+    print_table(results)
+
+    if args.save_baseline:
+        save_baseline(args.baseline, "fair_load", results)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    baseline = load_baseline(args.baseline).get("fair_load")
+    if baseline:
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print("REGRESSIONS:")
+            for r in regressions:
+                print("  " + r)
+            raise SystemExit(1)
+        print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
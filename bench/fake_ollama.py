@@ -0,0 +1,310 @@
+# bench/fake_ollama.py
+
+"""
+Deterministic stand-in for the Ollama HTTP API (/api/chat only).
+
+Point the app at it with OLLAMA_HOST=http://127.0.0.1:<port> and every
+LLM call becomes reproducible, with a configurable latency profile:
+  - latency_ms: fixed time-to-first-token
+  - tokens_per_s: generation speed applied to the reply length
+  - missing_models: models answered with Ollama's 404 "not found, try pulling it"
+
+Run standalone:
+  python -m bench.fake_ollama --port 11435 --latency-ms 150 --tokens-per-s 40
+
+In-process (tests, benchmarks):
+  with serve_fake_ollama(latency_ms=200) as server:
+      ...  # backend.llm.client talks to `server` inside the block
+"""
+
+import argparse
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+from backend.services.keyword_matcher import get_matcher as get_keyword_matcher
+
+
+def _user_content(messages: List[Dict[str, Any]]) -> str:
+    for m in reversed(messages):
+        if m.get("role") == "user":
+            return m.get("content", "")
+    return ""
+
+
+def _system_content(messages: List[Dict[str, Any]]) -> str:
+    for m in messages:
+        if m.get("role") == "system":
+            return m.get("content", "")
+    return ""
+
+
+def _fake_intents(user_text: str) -> Dict[str, Any]:
+    # Classify the message only, not the profile fields around it
+    try:
+        user_text = json.loads(user_text).get("user_message_masked", user_text)
+    except (json.JSONDecodeError, AttributeError):
+        pass
+    # Same keyword rules as the API's FAQ heuristic
+    for intent in get_keyword_matcher().local_intents(user_text):
+        if "faq_answer" in intent["required_data"]:
+            return {"intents": [dict(intent, confidence=0.92)]}
+    return {
+        "intents": [
+            {
+                "name": "FIND_NEARBY_COFFEE_SHOP",
+                "confidence": 0.88,
+                "reason": "Default store discovery intent.",
+                "required_data": ["location", "nearby_stores"],
+                "category": "store_discovery",
+            },
+            {
+                "name": "SUGGEST_WARM_DRINK",
+                "confidence": 0.55,
+                "reason": "User may want a drink suggestion.",
+                "required_data": ["user_profile"],
+                "category": "personalized_recommendation",
+            },
+        ]
+    }
+
+
+def _fake_response(user_text: str) -> Dict[str, Any]:
+    try:
+        bundle = json.loads(user_text)
+    except json.JSONDecodeError:
+        bundle = {}
+
+    intents = bundle.get("intents") or []
+    selected_intent = intents[0].get("name") if intents else None
+    stores = bundle.get("candidate_stores") or []
+    snippets = bundle.get("rag_snippets") or []
+
+    if snippets:
+        first_sentence = snippets[0].get("text", "").split(". ")[0]
+        reply = f"According to our policy: {first_sentence}."
+        store_id = None
+    elif stores:
+        s = stores[0]
+        reply = (
+            f"{s.get('name', 'A store')} is about {int(s.get('distance_m', 0))} meters away "
+            f"and is {'open' if s.get('is_open_now') else 'closed'} right now."
+        )
+        store_id = s.get("id")
+    else:
+        reply = "I can help with store, order and policy questions."
+        store_id = None
+
+    return {
+        "selected_intent": selected_intent,
+        "selected_store_id": store_id,
+        "reasoning": "fake-ollama deterministic reply",
+        "reply": reply,
+    }
+
+
+def fake_completion(messages: List[Dict[str, Any]]) -> str:
+    """
+    Pick a canned, schema-valid answer depending on which agent is calling.
+    """
+    system = _system_content(messages)
+    user = _user_content(messages)
+    if "Intent Classification" in system:
+        payload = _fake_intents(user)
+    else:
+        payload = _fake_response(user)
+    return json.dumps(payload, ensure_ascii=False)
+
+
+def _split_tokens(text: str) -> List[str]:
+    # Roughly one "token" per 4 characters, kept as real substrings so the
+    # concatenated stream equals the full text.
+    return [text[i:i + 4] for i in range(0, len(text), 4)] or [""]
+
+
+class FakeOllamaServer:
+    """
+    Threaded HTTP server speaking just enough of the Ollama API for ollama.chat().
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 0.0,
+        tokens_per_s: float = 0.0,
+        missing_models: Iterable[str] = (),
+    ):
+        self.latency_ms = latency_ms
+        self.tokens_per_s = tokens_per_s
+        # Answered like Ollama does for a model that was never pulled
+        self.missing_models = set(missing_models)
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._httpd.server_address[:2]
+
+    @property
+    def url(self) -> str:
+        host, port = self.address
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeOllamaServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _token_delay(self) -> float:
+        if self.tokens_per_s <= 0:
+            return 0.0
+        return 1.0 / self.tokens_per_s
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, fmt, *args):  # keep benchmark output clean
+                pass
+
+            def _send_json(self, status: int, obj: Dict[str, Any]):
+                body = json.dumps(obj).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path in ("/", "/api/version"):
+                    self._send_json(200, {"version": "0.0.0-fake"})
+                elif self.path == "/api/tags":
+                    self._send_json(200, {"models": []})
+                else:
+                    self._send_json(404, {"error": "not found"})
+
+            def do_POST(self):
+                if self.path != "/api/chat":
+                    self._send_json(404, {"error": "not found"})
+                    return
+
+                length = int(self.headers.get("Content-Length") or 0)
+                req = json.loads(self.rfile.read(length) or b"{}")
+                with server._lock:
+                    server.calls += 1
+
+                model = req.get("model", "fake")
+                if model in server.missing_models:
+                    self._send_json(404, {"error": f"model '{model}' not found, try pulling it first"})
+                    return
+                content = fake_completion(req.get("messages") or [])
+                tokens = _split_tokens(content)
+
+                time.sleep(server.latency_ms / 1000.0)
+                delay = server._token_delay()
+
+                if not req.get("stream", True):
+                    time.sleep(delay * len(tokens))
+                    self._send_json(
+                        200,
+                        {
+                            "model": model,
+                            "created_at": "1970-01-01T00:00:00Z",
+                            "message": {"role": "assistant", "content": content},
+                            "done": True,
+                            "done_reason": "stop",
+                            "eval_count": len(tokens),
+                        },
+                    )
+                    return
+
+                # Streaming: NDJSON chunks, one per token
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                def write_chunk(obj: Dict[str, Any]):
+                    data = (json.dumps(obj) + "\n").encode("utf-8")
+                    self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+                    self.wfile.flush()
+
+                for tok in tokens:
+                    if delay:
+                        time.sleep(delay)
+                    write_chunk(
+                        {
+                            "model": model,
+                            "created_at": "1970-01-01T00:00:00Z",
+                            "message": {"role": "assistant", "content": tok},
+                            "done": False,
+                        }
+                    )
+                write_chunk(
+                    {
+                        "model": model,
+                        "created_at": "1970-01-01T00:00:00Z",
+                        "message": {"role": "assistant", "content": ""},
+                        "done": True,
+                        "done_reason": "stop",
+                        "eval_count": len(tokens),
+                    }
+                )
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+
+@contextmanager
+def serve_fake_ollama(**kwargs) -> Iterator[FakeOllamaServer]:
+    """
+    Start a FakeOllamaServer(**kwargs) and point the LLM client at it for
+    the duration of the block; the default Ollama host is restored after.
+    """
+    from backend.llm import client as llm_client
+
+    server = FakeOllamaServer(**kwargs).start()
+    llm_client.set_ollama_host(server.url)
+    try:
+        yield server
+    finally:
+        llm_client.set_ollama_host(None)
+        server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deterministic fake Ollama server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--tokens-per-s", type=float, default=0.0)
+    parser.add_argument("--missing-model", action="append", default=[],
+                        help="answer 404 'model not found' for this model (repeatable)")
+    args = parser.parse_args()
+
+    server = FakeOllamaServer(args.host, args.port, args.latency_ms, args.tokens_per_s, args.missing_model)
+    print(f"Fake Ollama listening on {server.url} (set OLLAMA_HOST to this)")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
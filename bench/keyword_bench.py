@@ -0,0 +1,137 @@
+# bench/keyword_bench.py
+
+"""
+Keyword matching at scale: the compiled regex-trie matcher vs the old
+"any(kw in text for kw in keywords)" loop.
+
+  python -m bench.keyword_bench                       # 10k synthetic phrases + keywords.json
+  python -m bench.keyword_bench --keywords 50000 --messages 5000
+
+Synthetic phrases are random 1-3 word pseudo-words spread over a few hundred
+intents; messages are sample_queries.txt, bench/requests.jsonl and generated
+sentences that mention some of the phrases.
+"""
+
+import argparse
+import random
+import string
+import sys
+import time
+from typing import Dict, Any, List
+
+from backend.services.keyword_matcher import CONFIG_PATH, KeywordMatcher, load_rules
+from bench.report import (
+    DEFAULT_BASELINE_PATH,
+    DEFAULT_TOLERANCE,
+    build_workload,
+    compare_to_baseline,
+    load_baseline,
+    print_table,
+    save_baseline,
+)
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9)))
+
+
+def synthetic_rules(count: int, intents: int, seed: int = 0) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    rules = [{"intent": f"SYNTH_INTENT_{i}", "category": f"synth_{i % 20}", "faq": i % 3 == 0,
+              "phrases": []} for i in range(intents)]
+    for _ in range(count):
+        phrase = " ".join(_word(rng) for _ in range(rng.randint(1, 3)))
+        rules[rng.randrange(intents)]["phrases"].append(phrase)
+    return rules
+
+
+def synthetic_messages(rules: List[Dict[str, Any]], count: int, seed: int = 1) -> List[str]:
+    rng = random.Random(seed)
+    phrases = [p for r in rules for p in r["phrases"]]
+    filler = "hi can you tell me about the store near my office today please thanks".split()
+    out = []
+    for _ in range(count):
+        words = rng.sample(filler, rng.randint(5, 12))
+        for _ in range(rng.randint(0, 2)):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(phrases))
+        out.append(" ".join(words).capitalize() + "?")
+    return out
+
+
+def _per_message_us(fn, messages: List[str], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for m in messages:
+            fn(m)
+    return (time.perf_counter() - start) * 1e6 / (repeat * len(messages))
+
+
+def run(keyword_count: int, message_count: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    rules = load_rules(CONFIG_PATH) + synthetic_rules(keyword_count, intents=max(1, keyword_count // 50))
+    messages = [p["message"] for p in build_workload(None, None)]
+    messages += synthetic_messages(rules, message_count)
+
+    t0 = time.perf_counter()
+    matcher = KeywordMatcher(rules)
+    compile_ms = (time.perf_counter() - t0) * 1000.0
+
+    keywords = [(p.lower(), r) for r in rules for p in r["phrases"]]
+
+    def naive(text: str):
+        lower = text.lower()
+        return [r for kw, r in keywords if kw in lower]
+
+    # Naive loop gets fewer repeats: it's orders of magnitude slower at 10k
+    naive_us = _per_message_us(naive, messages, max(1, repeat // 10))
+    trie_us = _per_message_us(matcher.scan, messages, repeat)
+    faq_us = _per_message_us(matcher.looks_like_faq, messages, repeat)
+
+    hits = sum(len(matcher.scan(m)) for m in messages)
+    return {
+        "keyword_matcher": {
+            "phrases": matcher.phrase_count,
+            "messages": len(messages),
+            "compile_ms": compile_ms,
+            "scan_us_per_msg": trie_us,
+            "looks_like_faq_us_per_msg": faq_us,
+            "hits": hits,
+        },
+        "naive_substring_loop": {"scan_us_per_msg": naive_us, "speedup_x": naive_us / trie_us},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keyword matcher benchmark")
+    parser.add_argument("--keywords", type=int, default=10_000)
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    print(f"Keyword matching, {args.keywords} synthetic phrases:")
+    results = run(args.keywords, args.messages, args.repeat)
+    print_table(results)
+
+    if args.save_baseline:
+        save_baseline(args.baseline, "keywords", results)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    baseline = load_baseline(args.baseline).get("keywords")
+    if not baseline:
+        return
+    timed = {"keyword_matcher": {k: v for k, v in results["keyword_matcher"].items()
+                                 if k.endswith("_ms") or k.endswith("_us_per_msg")}}
+    regressions = compare_to_baseline(timed, baseline, args.tolerance)
+    if regressions:
+        print("REGRESSIONS:")
+        for r in regressions:
+            print("  " + r)
+        sys.exit(1)
+    print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+# bench/load.py
+
+"""
+End-to-end load generator for POST /chat.
+
+Against an already running API:
+  python -m bench.load --url http://localhost:8000 --concurrency 8 --requests 200
+
+Fully self-contained (starts the fake Ollama server + a uvicorn worker):
+  python -m bench.load --spawn --latency-ms 200 --tokens-per-s 50
+
+The workload is sample_queries.txt mixed with bench/requests.jsonl.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, Any, List, Optional
+
+from bench.fake_ollama import FakeOllamaServer
+from bench.report import (
+    DEFAULT_BASELINE_PATH,
+    DEFAULT_TOLERANCE,
+    ROOT_DIR,
+    build_workload,
+    compare_to_baseline,
+    load_baseline,
+    peak_rss_mb,
+    print_table,
+    save_baseline,
+    summarize_latencies,
+)
+
+
+def _post_json(url: str, payload: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+    req = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return json.loads(resp.read() or b"{}")
+
+
+def wait_until_ready(base_url: str, timeout: float = 60.0) -> float:
+    """
+    Poll /health until it answers; returns seconds waited.
+    """
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            with urllib.request.urlopen(base_url + "/health", timeout=1.0):
+                return time.perf_counter() - start
+        except (urllib.error.URLError, ConnectionError, OSError):
+            time.sleep(0.1)
+    raise RuntimeError(f"API at {base_url} did not become ready within {timeout}s")
+
+
+def run_load(
+    base_url: str,
+    workload: List[Dict[str, Any]],
+    total_requests: int,
+    concurrency: int,
+    timeout: float = 120.0,
+) -> Dict[str, Any]:
+    """
+    Fire `total_requests` /chat calls from `concurrency` threads, cycling the workload.
+    """
+    if not workload:
+        raise ValueError("empty workload: add sample_queries.txt or bench/requests.jsonl")
+
+    url = base_url + "/chat"
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+    counter = {"next": 0}
+
+    def worker():
+        nonlocal errors
+        while True:
+            with lock:
+                idx = counter["next"]
+                if idx >= total_requests:
+                    return
+                counter["next"] += 1
+            payload = workload[idx % len(workload)]
+            t0 = time.perf_counter()
+            try:
+                _post_json(url, payload, timeout)
+                ok = True
+            except (urllib.error.URLError, ConnectionError, OSError, ValueError):
+                ok = False
+            elapsed = time.perf_counter() - t0
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors += 1
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+
+    result = summarize_latencies(latencies, wall)
+    result["errors"] = errors
+    return result
+
+
+def spawn_api(port: int, ollama_url: str, extra_env: Optional[Dict[str, str]] = None) -> subprocess.Popen:
+    env = dict(os.environ)
+    env["OLLAMA_HOST"] = ollama_url
+    # Benchmark traffic must not end up in (or replay from) real user memory
+    env["USER_MEMORY_LOG"] = ""
+    env.update(extra_env or {})
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "backend.app:app",
+            "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning",
+        ],
+        cwd=ROOT_DIR,
+        env=env,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/chat load generator")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--queries", default=None, help="path to sample_queries.txt")
+    parser.add_argument("--requests-file", default=None, help="path to a /chat JSONL file")
+    parser.add_argument("--spawn", action="store_true", help="start fake Ollama + API locally")
+    parser.add_argument("--port", type=int, default=8765, help="API port when --spawn is used")
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--tokens-per-s", type=float, default=0.0)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    workload = build_workload(args.queries, args.requests_file)
+
+    fake: Optional[FakeOllamaServer] = None
+    api: Optional[subprocess.Popen] = None
+    base_url = args.url.rstrip("/")
+    results: Dict[str, Dict[str, Any]] = {}
+
+    try:
+        if args.spawn:
+            fake = FakeOllamaServer(
+                latency_ms=args.latency_ms, tokens_per_s=args.tokens_per_s
+            ).start()
+            api = spawn_api(args.port, fake.url)
+            base_url = f"http://127.0.0.1:{args.port}"
+            ready_s = wait_until_ready(base_url)
+            results["startup"] = {"time_to_ready_s": ready_s}
+
+        print(
+            f"Load: {args.requests} requests, concurrency={args.concurrency}, "
+            f"workload={len(workload)} payloads -> {base_url}"
+        )
+        results["chat"] = run_load(base_url, workload, args.requests, args.concurrency)
+        if api is not None:
+            results["chat"]["server_peak_rss_mb"] = peak_rss_mb(api.pid)
+    finally:
+        if api is not None:
+            api.terminate()
+            api.wait(timeout=10)
+        if fake is not None:
+            fake.stop()
+
+    print_table(results)
+
+    # Failed requests fail the run, baseline or not
+    errors = results["chat"].get("errors", 0)
+    if errors:
+        print(f"FAILED: {errors} of {args.requests} requests errored"
+              + ("; baseline not saved." if args.save_baseline else "."))
+        sys.exit(1)
+
+    if args.save_baseline:
+        save_baseline(args.baseline, "load", results)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    baseline = load_baseline(args.baseline).get("load")
+    if not baseline:
+        print("No load baseline found; run with --save-baseline to create one.")
+        return
+
+    regressions = compare_to_baseline(results, baseline, args.tolerance)
+    if regressions:
+        print("REGRESSIONS:")
+        for r in regressions:
+            print("  " + r)
+        sys.exit(1)
+    print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
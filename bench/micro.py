@@ -0,0 +1,215 @@
+# bench/micro.py
+
+"""
+Microbenchmarks for the non-LLM hot path.
+
+  python -m bench.micro                      # run + compare with bench/baseline.json
+  python -m bench.micro --save-baseline      # store current numbers as the baseline
+  python -m bench.micro --only mask_pii,context_json
+"""
+
+import argparse
+import json
+import sys
+import time
+from typing import Callable, Dict, Any, List
+
+from bench.report import (
+    DEFAULT_BASELINE_PATH,
+    DEFAULT_TOLERANCE,
+    compare_to_baseline,
+    load_baseline,
+    load_sample_queries,
+    peak_rss_mb,
+    percentile,
+    print_table,
+    save_baseline,
+)
+
+
+SAMPLE_PII_TEXT = (
+    "Hi, I'm Ganesh, my number is +91-98765-43210 and email is ganesh@example.com. "
+    "Order ORD12345 is delayed."
+)
+
+
+def _time_calls(fn: Callable[[], Any], iterations: int, warmup: int = 5) -> Dict[str, float]:
+    for _ in range(warmup):
+        fn()
+
+    samples: List[float] = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    wall = time.perf_counter() - start
+
+    us = [s * 1e6 for s in samples]
+    return {
+        "ops_per_s": iterations / wall if wall > 0 else 0.0,
+        "p50_us": percentile(us, 50),
+        "p95_us": percentile(us, 95),
+        "p99_us": percentile(us, 99),
+    }
+
+
+def _sample_context_bundle() -> Dict[str, Any]:
+    from backend.services.store_locator import get_nearby_stores
+
+    stores = get_nearby_stores(12.9716, 77.5946)
+    history = [
+        {"user": f"message {i}", "bot": f"reply {i} " * 8} for i in range(20)
+    ]
+    return {
+        "user_message_masked": "I am cold and want coffee, call me at [PHONE_1]",
+        "intents": [
+            {
+                "name": "FIND_NEARBY_COFFEE_SHOP",
+                "confidence": 0.9,
+                "reason": "User wants coffee.",
+                "required_data": ["location", "nearby_stores"],
+                "category": "store_discovery",
+            }
+        ],
+        "location": {"lat": 12.9716, "lng": 77.5946},
+        "candidate_stores": stores,
+        "user_profile_light": {
+            "user_id": "demo_user",
+            "name": "Demo User",
+            "loyalty_tier": "Gold",
+            "favorite_tags": ["coffee", "hot drinks"],
+        },
+        "user_profile_persistent": {
+            "preferences": {"favorite_drinks": ["Mocha"], "dislikes": [], "allergies": ["nuts"]},
+            "loyalty_tier": "Gold",
+            "history": history,
+            "last_seen_store": None,
+            "last_order": None,
+        },
+        "offers": [
+            {
+                "store_id": s["id"],
+                "coupon_code": f"HOT15_{i + 1}",
+                "description": "15% off hot beverages",
+                "valid_till": "2025-12-31",
+                "loyalty_tier": "Gold",
+            }
+            for i, s in enumerate(stores)
+        ],
+        "rag_snippets": [],
+    }
+
+
+def bench_mask_pii(iterations: int) -> Dict[str, float]:
+    from backend.privacy.masking import mask_pii
+
+    return _time_calls(lambda: mask_pii(SAMPLE_PII_TEXT), iterations)
+
+
+def bench_nearby_stores(iterations: int) -> Dict[str, float]:
+    from backend.services.store_locator import get_nearby_stores
+
+    return _time_calls(lambda: get_nearby_stores(12.9716, 77.5946), iterations)
+
+
+def bench_context_json(iterations: int) -> Dict[str, float]:
+    bundle = _sample_context_bundle()
+    return _time_calls(lambda: json.dumps(bundle, ensure_ascii=False), iterations)
+
+
+def bench_context_json_snapshot(iterations: int) -> Dict[str, float]:
+    from backend.services.user_context import get_user_context, splice_json
+
+    bundle = _sample_context_bundle()
+    bundle.pop("user_profile_light")
+    bundle.pop("user_profile_persistent")
+
+    def run():
+        ctx = get_user_context("demo_user")
+        splice_json(
+            [
+                ("user_profile_light", ctx.light_json),
+                ("user_profile_persistent", ctx.persistent_json()),
+            ],
+            bundle,
+        )
+
+    return _time_calls(run, iterations)
+
+
+def bench_rag_query(iterations: int) -> Dict[str, float]:
+    from backend.services.rag_service import rag_query
+
+    queries = load_sample_queries() or ["What is your return policy?"]
+    state = {"i": 0}
+
+    def run():
+        q = queries[state["i"] % len(queries)]
+        state["i"] += 1
+        rag_query(q, top_k=3)
+
+    # Vector search is ~1000x slower than the rest; keep the run short.
+    return _time_calls(run, max(10, iterations // 100), warmup=2)
+
+
+BENCHMARKS: Dict[str, Callable[[int], Dict[str, float]]] = {
+    "mask_pii": bench_mask_pii,
+    "get_nearby_stores": bench_nearby_stores,
+    "context_json": bench_context_json,
+    "context_json_snapshot": bench_context_json_snapshot,
+    "rag_query": bench_rag_query,
+}
+
+
+def run(names: List[str], iterations: int) -> Dict[str, Dict[str, float]]:
+    results: Dict[str, Dict[str, float]] = {}
+    for name in names:
+        try:
+            results[name] = BENCHMARKS[name](iterations)
+        except ImportError as e:
+            # e.g. chromadb not installed in a slim environment
+            print(f"  {name:<28} skipped ({e})")
+    results["process"] = {"peak_rss_mb": peak_rss_mb()}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concierge microbenchmarks")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--only", default="", help="comma-separated benchmark names")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    names = [n.strip() for n in args.only.split(",") if n.strip()] or list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    print("Microbenchmarks:")
+    results = run(names, args.iterations)
+    print_table(results)
+
+    if args.save_baseline:
+        save_baseline(args.baseline, "micro", results)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    baseline = load_baseline(args.baseline).get("micro")
+    if not baseline:
+        print("No micro baseline found; run with --save-baseline to create one.")
+        return
+
+    regressions = compare_to_baseline(results, baseline, args.tolerance)
+    if regressions:
+        print("REGRESSIONS:")
+        for r in regressions:
+            print("  " + r)
+        sys.exit(1)
+    print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
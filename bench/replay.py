@@ -0,0 +1,286 @@
+# bench/replay.py
+
+"""
+Offline replay of /chat traffic against recorded LLM responses.
+
+Record once (real Ollama, or the deterministic fake server):
+  python -m bench.replay --record
+  python -m bench.replay --record --fake --latency-ms 300 --tokens-per-s 40
+
+Then replay as often as needed, without Ollama:
+  python -m bench.replay                       # zero LLM latency: CPU cost of everything else
+  python -m bench.replay --timing original     # recorded LLM timing: end-to-end latency
+  python -m bench.replay --save-baseline       # store numbers under "replay" in bench/baseline.json
+
+Payloads come from bench/requests.jsonl + sample_queries.txt (--requests for
+another JSONL file) and go through chat_endpoint() in-process, one at a time,
+with user memory reset before every pass so the prompts match the recording.
+A replayed request that isn't in the cassette means the prompt changed: it's
+listed and the run exits non-zero (--allow-misses to only report it).
+A turn that raises anything else is left out of the timings and always fails
+the run (and no baseline is saved from it), like bench/load.py.
+"""
+
+import argparse
+import functools
+import os
+import sys
+import time
+from typing import Dict, Any, List, Optional
+
+from bench.report import (
+    BENCH_DIR,
+    DEFAULT_BASELINE_PATH,
+    DEFAULT_TOLERANCE,
+    build_workload,
+    compare_to_baseline,
+    load_baseline,
+    load_request_payloads,
+    percentile,
+    print_table,
+    save_baseline,
+)
+
+DEFAULT_CASSETTE = os.path.join(BENCH_DIR, "cassettes", "workload.jsonl.gz")
+
+# Names looked up in backend.app on every turn; each is timed as a stage.
+STAGES = [
+    "_resolve_tenant",
+    "get_user_context",
+    "mask_pii",
+    "_looks_like_faq",
+    "get_intents",          # prompt build + JSON parse (+ cassette lookup)
+    "get_nearby_context",
+    "_rag_lookup",          # runs on the prefetch pool when speculative
+    "extractive_answer",
+    "get_final_response",   # prompt build + JSON parse (+ cassette lookup)
+    "safe_unmask",
+    "update_conversation_history",
+    "set_last_seen_store",
+]
+
+
+class _StageTimer:
+    """
+    Wraps the stage functions in backend.app and collects the CPU seconds
+    of every call, measured on the thread that ran it.
+    """
+
+    def __init__(self, app_module):
+        self.app = app_module
+        self.samples: Dict[str, List[float]] = {name: [] for name in STAGES}
+        self._originals: Dict[str, Any] = {}
+
+    def _wrap(self, name: str, fn):
+        samples = self.samples[name]
+
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            t0 = time.thread_time()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                samples.append(time.thread_time() - t0)
+
+        return timed
+
+    def __enter__(self):
+        for name in STAGES:
+            fn = getattr(self.app, name)
+            self._originals[name] = fn
+            setattr(self.app, name, self._wrap(name, fn))
+        return self
+
+    def __exit__(self, *exc):
+        for name, fn in self._originals.items():
+            setattr(self.app, name, fn)
+
+    def clear(self):
+        for samples in self.samples.values():
+            samples.clear()
+
+    def mark(self) -> Dict[str, int]:
+        return {name: len(samples) for name, samples in self.samples.items()}
+
+    def rollback(self, mark: Dict[str, int]):
+        """
+        Forget the samples of a turn that failed.
+        """
+        for name, n in mark.items():
+            del self.samples[name][n:]
+
+
+def _reset_state():
+    from backend.services import location_cache
+    from backend.services.user_memory import reset_all
+
+    reset_all()
+    location_cache.invalidate()
+
+
+def run_pass(app_module, workload: List[Dict[str, Any]], timer: Optional[_StageTimer] = None) -> Dict[str, Any]:
+    """
+    One pass over the workload; per-turn CPU / wall times plus failures.
+    """
+    from backend.llm.cassette import CassetteMiss
+
+    _reset_state()
+    cpu: List[float] = []
+    wall: List[float] = []
+    misses: List[str] = []
+    errors: Dict[str, int] = {}
+    for payload in workload:
+        request = app_module.ChatRequest(**payload)
+        mark = timer.mark() if timer is not None else None
+        t_cpu, t_wall = time.thread_time(), time.perf_counter()
+        try:
+            app_module.chat_endpoint(request)
+        except Exception as e:
+            if isinstance(e, CassetteMiss):
+                misses.append(payload["message"])
+            else:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+            if timer is not None:
+                timer.rollback(mark)
+            continue
+        cpu.append(time.thread_time() - t_cpu)
+        wall.append(time.perf_counter() - t_wall)
+    return {"cpu": cpu, "wall": wall, "misses": misses, "errors": errors}
+
+
+def summarize(passes: List[Dict[str, Any]], timer: _StageTimer) -> Dict[str, Dict[str, float]]:
+    cpu_ms = [x * 1000.0 for p in passes for x in p["cpu"]]
+    wall_ms = [x * 1000.0 for p in passes for x in p["wall"]]
+    turns = len(cpu_ms)
+    results: Dict[str, Dict[str, float]] = {
+        "turn": {
+            "count": turns,
+            "cpu_ms_mean": sum(cpu_ms) / turns if turns else 0.0,
+            "cpu_ms_p50": percentile(cpu_ms, 50),
+            "cpu_ms_p95": percentile(cpu_ms, 95),
+            "wall_ms_p50": percentile(wall_ms, 50),
+            "wall_ms_p95": percentile(wall_ms, 95),
+        }
+    }
+    for name in STAGES:
+        us = [x * 1e6 for x in timer.samples[name]]
+        if not us:
+            continue
+        results[f"stage:{name}"] = {
+            "count": len(us),
+            "cpu_us_per_turn": sum(us) / turns if turns else 0.0,
+            "cpu_us_p95": percentile(us, 95),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay /chat traffic against recorded LLM responses")
+    parser.add_argument("--cassette", default=DEFAULT_CASSETTE)
+    parser.add_argument("--requests", default=None, help="JSONL of /chat payloads (default bench/requests.jsonl + sample_queries.txt)")
+    parser.add_argument("--record", action="store_true", help="call the LLM and (re)record the cassette")
+    parser.add_argument("--fake", action="store_true", help="record against the fake Ollama server")
+    parser.add_argument("--ollama-url", default=None)
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="fake server latency")
+    parser.add_argument("--tokens-per-s", type=float, default=50.0, help="fake server streaming rate")
+    parser.add_argument("--timing", default="zero", choices=["zero", "original"])
+    parser.add_argument("--repeat", type=int, default=5, help="measured passes (after one warm-up pass)")
+    parser.add_argument("--allow-misses", action="store_true")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    # In-process API without touching the real memory log or warming in the background
+    os.environ.setdefault("USER_MEMORY_LOG", "")
+    os.environ.setdefault("WARM_ON_STARTUP", "off")
+    from backend import app as app_module
+    from backend.llm import client as llm_client
+    from backend.llm.cassette import Cassette
+
+    workload = load_request_payloads(args.requests) if args.requests else build_workload()
+    if not workload:
+        print("No payloads to replay.")
+        return
+
+    if args.record:
+        fake = None
+        if args.fake:
+            from bench.fake_ollama import FakeOllamaServer
+
+            fake = FakeOllamaServer(latency_ms=args.latency_ms, tokens_per_s=args.tokens_per_s).start()
+            llm_client.set_ollama_host(fake.url)
+        elif args.ollama_url:
+            llm_client.set_ollama_host(args.ollama_url)
+        if os.path.exists(args.cassette):
+            os.remove(args.cassette)
+        cassette = Cassette(args.cassette, mode="record")
+        llm_client.set_cassette(cassette)
+        try:
+            result = run_pass(app_module, workload)
+        finally:
+            if fake is not None:
+                fake.stop()
+        print(f"Recorded {len(cassette)} generations for {len(result['cpu'])}/{len(workload)} turns "
+              f"into {args.cassette} ({os.path.getsize(args.cassette) / 1024:.1f} KB)")
+        for name, n in sorted(result["errors"].items()):
+            print(f"  {n} turn(s) failed: {name}")
+        if result["errors"]:
+            print("FAILED: the cassette is missing the failed turns.")
+            sys.exit(1)
+        return
+
+    cassette = Cassette(args.cassette, mode="replay", timing=args.timing)
+    llm_client.set_cassette(cassette)
+    print(f"Replaying {len(workload)} turns x {args.repeat} from {args.cassette} "
+          f"({len(cassette)} generations, timing={args.timing}):")
+
+    with _StageTimer(app_module) as timer:
+        run_pass(app_module, workload)  # warm-up: imports, indexes, caches
+        timer.clear()
+        passes = [run_pass(app_module, workload, timer) for _ in range(args.repeat)]
+
+    results = summarize(passes, timer)
+    print_table(results)
+
+    misses = passes[0]["misses"] if passes else []
+    if misses:
+        print(f"{len(misses)} turn(s) not in the cassette (prompt changed?), e.g.:")
+        for m in misses[:5]:
+            print(f"  {m}")
+
+    # Failed turns are missing from the timings: fail the run, baseline or not
+    errors: Dict[str, int] = {}
+    for p in passes:
+        for name, n in p["errors"].items():
+            errors[name] = errors.get(name, 0) + n
+    if errors:
+        for name, n in sorted(errors.items()):
+            print(f"  {n} turn(s) failed: {name}")
+        print(f"FAILED: {sum(errors.values())} of {len(workload) * len(passes)} turns errored"
+              + ("; baseline not saved." if args.save_baseline else "."))
+        sys.exit(1)
+
+    section = f"replay:{args.timing}"
+    if args.save_baseline:
+        save_baseline(args.baseline, section, results)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    failed = bool(misses) and not args.allow_misses
+    baseline = load_baseline(args.baseline).get(section)
+    if baseline:
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print("REGRESSIONS:")
+            for r in regressions:
+                print("  " + r)
+            failed = True
+        else:
+            print("No regressions against baseline.")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
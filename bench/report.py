@@ -0,0 +1,193 @@
+# bench/report.py
+
+import json
+import math
+import os
+import re
+import resource
+import sys
+from typing import Dict, Any, List, Optional
+
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+
+DEFAULT_BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_TOLERANCE = 0.20  # 20% slack before we call it a regression
+
+# Metrics where a bigger number is better; everything else is "lower is better".
+HIGHER_IS_BETTER = {"throughput_rps", "ops_per_s"}
+
+
+# ---- Workload loading ----
+
+def load_sample_queries(path: Optional[str] = None) -> List[str]:
+    """
+    Parse sample_queries.txt ("1. I am cold and want coffee" style lines).
+    Lines that are not numbered are ignored.
+    """
+    path = path or os.path.join(ROOT_DIR, "sample_queries.txt")
+    queries: List[str] = []
+    if not os.path.exists(path):
+        return queries
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            m = re.match(r"^\s*\d+\.\s*(.+?)\s*$", line)
+            if m:
+                queries.append(m.group(1))
+    return queries
+
+
+def load_request_payloads(path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Load /chat payloads from a JSONL file, one ChatRequest per line:
+      {"user_id": "...", "message": "...", "lat": 12.97, "lng": 77.59}
+    Lines without a "message" are skipped.
+    """
+    path = path or os.path.join(BENCH_DIR, "requests.jsonl")
+    payloads: List[Dict[str, Any]] = []
+    if not os.path.exists(path):
+        return payloads
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                obj = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(obj, dict) and obj.get("message"):
+                payloads.append(obj)
+    return payloads
+
+
+def build_workload(
+    queries_path: Optional[str] = None,
+    requests_path: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Mix sample_queries.txt and requests.jsonl into a list of /chat payloads.
+    """
+    workload = load_request_payloads(requests_path)
+    for idx, q in enumerate(load_sample_queries(queries_path)):
+        workload.append(
+            {
+                "user_id": f"bench_user_{idx}",
+                "message": q,
+                "lat": 12.9716,
+                "lng": 77.5946,
+            }
+        )
+    return workload
+
+
+# ---- Stats ----
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile; good enough for benchmark reporting.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[k]
+
+
+def summarize_latencies(latencies_s: List[float], wall_s: float) -> Dict[str, float]:
+    """
+    Turn a list of per-call latencies (seconds) into the numbers we report.
+    """
+    ms = [x * 1000.0 for x in latencies_s]
+    return {
+        "count": len(ms),
+        "throughput_rps": (len(ms) / wall_s) if wall_s > 0 else 0.0,
+        "p50_ms": percentile(ms, 50),
+        "p95_ms": percentile(ms, 95),
+        "p99_ms": percentile(ms, 99),
+    }
+
+
+def peak_rss_mb(pid: Optional[int] = None) -> float:
+    """
+    Peak resident set size in MB.
+    - pid=None: this process (getrusage)
+    - pid=N: another process on Linux (VmHWM from /proc)
+    """
+    if pid is None:
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KB, macOS reports bytes
+        if sys.platform == "darwin":
+            return maxrss / (1024.0 * 1024.0)
+        return maxrss / 1024.0
+
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return 0.0
+
+
+# ---- Baseline handling ----
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(path: str, section: str, results: Dict[str, Any]):
+    """
+    Store `results` under `section` ("micro", "load", ...) in the baseline file,
+    keeping other sections untouched.
+    """
+    data = load_baseline(path)
+    data[section] = results
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare_to_baseline(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> List[str]:
+    """
+    Compare {case: {metric: value}} against the same shape from the baseline.
+    Returns human-readable regression lines (empty list = all good).
+    """
+    regressions: List[str] = []
+    for case, metrics in results.items():
+        base_metrics = baseline.get(case) or {}
+        for name, value in metrics.items():
+            base = base_metrics.get(name)
+            if not isinstance(base, (int, float)) or not isinstance(value, (int, float)):
+                continue
+            if name == "count" or base <= 0:
+                continue
+            if name in HIGHER_IS_BETTER:
+                if value < base * (1.0 - tolerance):
+                    regressions.append(
+                        f"{case}.{name}: {value:.2f} < baseline {base:.2f} (-{tolerance:.0%} allowed)"
+                    )
+            else:
+                if value > base * (1.0 + tolerance):
+                    regressions.append(
+                        f"{case}.{name}: {value:.2f} > baseline {base:.2f} (+{tolerance:.0%} allowed)"
+                    )
+    return regressions
+
+
+def print_table(results: Dict[str, Dict[str, float]]):
+    for case, metrics in results.items():
+        parts = ", ".join(
+            f"{k}={v:.3f}" if isinstance(v, float) else f"{k}={v}"
+            for k, v in metrics.items()
+        )
+        print(f"  {case:<28} {parts}")
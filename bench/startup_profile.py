@@ -0,0 +1,172 @@
+# bench/startup_profile.py
+
+"""
+Cold-start profile of the API process.
+
+  python -m bench.startup_profile                 # -X importtime report for backend.app
+  python -m bench.startup_profile --ready         # + time-to-ready and first /chat latency
+  python -m bench.startup_profile --ready --warm off   # same, without the background warm-up
+  python -m bench.startup_profile --module backend.services.rag_service --top 40
+
+--ready spawns uvicorn against the fake Ollama server. Use --save-baseline /
+the baseline file like bench.micro and bench.load to catch startup regressions.
+"""
+
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, Any, List, Tuple
+
+from bench.fake_ollama import FakeOllamaServer
+from bench.load import _post_json, spawn_api, wait_until_ready
+from bench.report import (
+    DEFAULT_BASELINE_PATH,
+    DEFAULT_TOLERANCE,
+    ROOT_DIR,
+    compare_to_baseline,
+    load_baseline,
+    print_table,
+    save_baseline,
+)
+
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)")
+
+FIRST_CHAT = {"user_id": "demo_user", "message": "Is the MG Road store open right now?",
+              "lat": 12.9716, "lng": 77.5946}
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """
+    [(module, self_us, cumulative_us, depth), ...] from `-X importtime` output.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        m = _IMPORTTIME_RE.match(line)
+        if m:
+            rows.append((m.group(4), int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2))
+    return rows
+
+
+def profile_imports(module: str, runs: int) -> Dict[str, Any]:
+    """
+    Import `module` in `runs` fresh interpreters; report the median run.
+    """
+    samples = []
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=ROOT_DIR, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+        rows = parse_importtime(proc.stderr)
+        total = next((cum for name, _, cum, _ in rows if name == module), 0)
+        samples.append((total, rows))
+    samples.sort(key=lambda s: s[0])
+    total, rows = samples[len(samples) // 2]
+
+    by_package: Dict[str, int] = {}
+    for name, self_us, _, _ in rows:
+        top = name.split(".")[0]
+        by_package[top] = by_package.get(top, 0) + self_us
+
+    return {
+        "total_ms": total / 1000.0,
+        "all_runs_ms": [s[0] / 1000.0 for s in samples],
+        "modules": len(rows),
+        "top_cumulative": sorted(rows, key=lambda r: -r[2]),
+        "by_package": sorted(by_package.items(), key=lambda kv: -kv[1]),
+    }
+
+
+def measure_ready(port: int, warm: str, latency_ms: float, message: str) -> Dict[str, float]:
+    """
+    Spawn the API, time /health readiness, then the first and second /chat.
+    """
+    fake = FakeOllamaServer(latency_ms=latency_ms).start()
+    start = time.perf_counter()
+    api = spawn_api(port, fake.url, {"WARM_ON_STARTUP": warm, "USER_MEMORY_LOG": ""})
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        wait_until_ready(base_url)
+        ready_s = time.perf_counter() - start
+        time.sleep(2.0)  # a real replica gets a moment before traffic arrives
+        timings = {"time_to_ready_s": ready_s}
+        for label in ("first_chat_ms", "second_chat_ms"):
+            t0 = time.perf_counter()
+            _post_json(base_url + "/chat", dict(FIRST_CHAT, message=message), timeout=120.0)
+            timings[label] = (time.perf_counter() - t0) * 1000.0
+        return timings
+    finally:
+        api.terminate()
+        api.wait(timeout=10)
+        fake.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API cold-start profile")
+    parser.add_argument("--module", default="backend.app")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--ready", action="store_true", help="also spawn the API and time it")
+    parser.add_argument("--warm", default="background", choices=["background", "off"])
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--message", default=FIRST_CHAT["message"],
+                        help='first /chat message, e.g. "What is your return policy?" for the RAG path')
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    prof = profile_imports(args.module, args.runs)
+    print(f"import {args.module}: {prof['total_ms']:.1f} ms "
+          f"(median of {args.runs}: {', '.join(f'{t:.0f}' for t in prof['all_runs_ms'])}), "
+          f"{prof['modules']} modules")
+
+    print(f"\nTop {args.top} by cumulative time:")
+    print(f"  {'cumul ms':>9} {'self ms':>8}  module")
+    for name, self_us, cum_us, depth in prof["top_cumulative"][:args.top]:
+        print(f"  {cum_us / 1000:9.1f} {self_us / 1000:8.1f}  {'  ' * min(depth, 6)}{name}")
+
+    print("\nSelf time by top-level package:")
+    for pkg, us in prof["by_package"][:15]:
+        print(f"  {us / 1000:9.1f}  {pkg}")
+
+    results: Dict[str, Dict[str, float]] = {
+        "imports": {"import_ms": prof["total_ms"],
+                    "import_ms_spread": statistics.pstdev(prof["all_runs_ms"])},
+    }
+    if args.ready:
+        results["ready"] = measure_ready(args.port, args.warm, args.latency_ms, args.message)
+
+    print()
+    print_table(results)
+
+    section = "startup" if args.module == "backend.app" else f"startup:{args.module}"
+    if args.save_baseline:
+        save_baseline(args.baseline, section, results)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    baseline = load_baseline(args.baseline).get(section)
+    if not baseline:
+        return
+    regressions = compare_to_baseline(
+        {k: {m: v for m, v in r.items() if m != "import_ms_spread"} for k, r in results.items()},
+        baseline,
+        args.tolerance,
+    )
+    if regressions:
+        print("REGRESSIONS:")
+        for r in regressions:
+            print("  " + r)
+        sys.exit(1)
+    print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+# bench/tier_compare.py
+
+"""
+Regression harness for model tiering: runs every query in sample_queries.txt
+through both agents on the small and on the large model and reports how often
+the small tier agrees with the large one.
+
+Against the local Ollama (both models pulled):
+  python -m bench.tier_compare
+  python -m bench.tier_compare --small llama3.2:3b --large llama3.1 --json-out tiers.json
+
+Smoke test of the harness itself (deterministic fake server, tiers agree):
+  python -m bench.tier_compare --fake
+
+Exits non-zero when the top-intent agreement is below --min-agreement.
+"""
+
+import argparse
+import copy
+import json
+import sys
+import time
+from typing import Dict, Any, List, Optional
+
+from bench.report import load_sample_queries, percentile
+
+DEFAULT_LAT, DEFAULT_LNG = 12.9716, 77.5946
+
+
+def _top_intent(intents: List[Dict[str, Any]]) -> Dict[str, Any]:
+    if not intents:
+        return {}
+    return max(intents, key=lambda i: i.get("confidence") or 0.0)
+
+
+def _words(text: str) -> set:
+    return {w.strip(".,!?\"'()").lower() for w in (text or "").split() if w.strip(".,!?\"'()")}
+
+
+def _jaccard(a: str, b: str) -> float:
+    wa, wb = _words(a), _words(b)
+    if not wa and not wb:
+        return 1.0
+    return len(wa & wb) / len(wa | wb)
+
+
+def _rag_snippets(question: str) -> List[Dict[str, Any]]:
+    from backend.services.rag_service import rag_query
+
+    try:
+        return rag_query(question, top_k=3)
+    except ImportError:  # chromadb is imported on first query
+        return []
+
+
+def compare_query(query: str, user_id: str, small: str, large: str) -> Dict[str, Any]:
+    from backend.llm import model_router
+    from backend.llm.agent_intent import get_intents
+    from backend.llm.agent_response import get_final_response
+    from backend.privacy.masking import mask_pii
+    from backend.services.location_cache import get_nearby_context
+    from backend.services.user_context import get_user_context
+
+    user_ctx = get_user_context(user_id)
+    masked, _ = mask_pii(query)
+    location = {"lat": DEFAULT_LAT, "lng": DEFAULT_LNG}
+    payload = {"user_message": masked, "location": location, "user_context": user_ctx}
+
+    row: Dict[str, Any] = {"query": query}
+    intents_by_tier = {}
+    for tier, model in (("small", small), ("large", large)):
+        t0 = time.perf_counter()
+        result = get_intents(payload, model=model)
+        row[f"intent_ms_{tier}"] = (time.perf_counter() - t0) * 1000.0
+        intents_by_tier[tier] = result.get("intents", [])
+        top = _top_intent(intents_by_tier[tier])
+        row[f"intent_{tier}"] = top.get("name")
+        row[f"confidence_{tier}"] = top.get("confidence")
+        # Would the router have escalated this small-model output?
+        row[f"intent_escalation_{tier}"] = model_router.intent_escalation_reason(result)
+
+    # Agent-2 gets the same bundle (built from the large tier's intents) on both tiers
+    intents = intents_by_tier["large"]
+    needs_faq = any("faq_answer" in (i.get("required_data") or []) for i in intents)
+    stores, offers = get_nearby_context(DEFAULT_LAT, DEFAULT_LNG, user_ctx.loyalty_tier, intents=intents)
+    bundle = {
+        "user_message_masked": masked,
+        "intents": intents,
+        "location": location,
+        "candidate_stores": [] if needs_faq else stores,
+        "offers": offers,
+        "rag_snippets": _rag_snippets(masked) if needs_faq else [],
+    }
+    row["response_route"] = model_router.choose_response_model(
+        intents, len(json.dumps(bundle, ensure_ascii=False)), user_ctx.history_turns()
+    )[1]
+
+    replies = {}
+    for tier, model in (("small", small), ("large", large)):
+        b = copy.deepcopy(bundle)
+        b["user_context"] = user_ctx
+        t0 = time.perf_counter()
+        resp = get_final_response(b, model=model)
+        row[f"response_ms_{tier}"] = (time.perf_counter() - t0) * 1000.0
+        replies[tier] = resp
+        row[f"store_{tier}"] = resp.get("selected_store_id")
+        row[f"reply_{tier}"] = resp.get("reply")
+        row[f"response_escalation_{tier}"] = model_router.response_escalation_reason(
+            None if "heuristic fallback" in (resp.get("reasoning") or "") else resp
+        )
+
+    row["intent_agree"] = row["intent_small"] == row["intent_large"]
+    row["store_agree"] = row["store_small"] == row["store_large"]
+    row["reply_overlap"] = _jaccard(replies["small"].get("reply"), replies["large"].get("reply"))
+    return row
+
+
+def summarize(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    n = len(rows) or 1
+    summary = {
+        "queries": len(rows),
+        "intent_agreement": sum(r["intent_agree"] for r in rows) / n,
+        "store_agreement": sum(r["store_agree"] for r in rows) / n,
+        "reply_overlap_mean": sum(r["reply_overlap"] for r in rows) / n,
+        "small_intent_escalations": sum(bool(r["intent_escalation_small"]) for r in rows),
+        "small_response_escalations": sum(bool(r["response_escalation_small"]) for r in rows),
+        "routed_small_response": sum(r["response_route"] == "simple" for r in rows),
+    }
+    for tier in ("small", "large"):
+        summary[f"intent_p50_ms_{tier}"] = percentile([r[f"intent_ms_{tier}"] for r in rows], 50)
+        summary[f"response_p50_ms_{tier}"] = percentile([r[f"response_ms_{tier}"] for r in rows], 50)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare small vs large model tiers")
+    parser.add_argument("--queries", default=None, help="path to a sample_queries.txt-style file")
+    parser.add_argument("--user-id", default="demo_user")
+    parser.add_argument("--small", default=None, help="defaults to LLM_SMALL_MODEL")
+    parser.add_argument("--large", default=None, help="defaults to LLM_LARGE_MODEL")
+    parser.add_argument("--json-out", default=None, help="write per-query rows + summary here")
+    parser.add_argument("--min-agreement", type=float, default=0.0)
+    parser.add_argument("--fake", action="store_true", help="run against the fake Ollama server")
+    args = parser.parse_args()
+
+    server: Optional[Any] = None
+    if args.fake:
+        from backend.llm import client as llm_client
+        from bench.fake_ollama import FakeOllamaServer
+
+        server = FakeOllamaServer().start()
+        llm_client.set_ollama_host(server.url)
+
+    from backend.llm import model_router
+
+    small = args.small or model_router.SMALL_MODEL
+    large = args.large or model_router.LARGE_MODEL
+    queries = load_sample_queries(args.queries)
+    if not queries:
+        parser.error("no queries found")
+
+    rows = []
+    try:
+        for q in queries:
+            row = compare_query(q, args.user_id, small, large)
+            rows.append(row)
+            mark = "=" if row["intent_agree"] else "!"
+            print(f"{mark} {q[:50]:<50} {row['intent_small']} / {row['intent_large']} "
+                  f"overlap={row['reply_overlap']:.2f} route={row['response_route']}")
+    finally:
+        if server is not None:
+            server.stop()
+
+    summary = summarize(rows)
+    print(f"\nTiers: small={small} large={large}")
+    for k, v in summary.items():
+        print(f"  {k:<28} {v:.3f}" if isinstance(v, float) else f"  {k:<28} {v}")
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump({"small": small, "large": large, "summary": summary, "rows": rows},
+                      f, indent=2, ensure_ascii=False)
+
+    if summary["intent_agreement"] < args.min_agreement:
+        print(f"Intent agreement below {args.min_agreement:.2f}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# bench/vector_recall.py
+
+"""
+Recall / memory / latency of the int8 memory-mapped index.
+
+Synthetic corpus (no Chroma needed), exact float32 search as ground truth:
+  python -m bench.vector_recall --synthetic 200000 --dim 384
+
+Against the real Chroma collection (build the index first with
+"python -m rag.build_quantized_index"):
+  python -m bench.vector_recall --chroma
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from typing import List
+
+import numpy as np
+
+from bench.report import ROOT_DIR, load_sample_queries, peak_rss_mb, percentile
+
+
+def _dir_size_mb(path: str) -> float:
+    total = 0
+    for root, _, files in os.walk(path):
+        for f in files:
+            total += os.path.getsize(os.path.join(root, f))
+    return total / (1024.0 * 1024.0)
+
+
+def _current_rss_mb() -> float:
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return peak_rss_mb()
+
+
+def _recall(truth: List[List[int]], got: List[List[int]]) -> float:
+    hits = sum(len(set(t) & set(g)) for t, g in zip(truth, got))
+    total = sum(len(t) for t in truth)
+    return hits / total if total else 0.0
+
+
+def run_synthetic(count: int, dim: int, queries: int, top_k: int, nprobe: int):
+    from backend.services.vector_index import QuantizedIndex, build_index
+
+    rng = np.random.default_rng(0)
+    # Clustered data looks more like real embeddings than uniform noise
+    centers = rng.normal(size=(max(16, count // 500), dim)).astype(np.float32)
+    data = centers[rng.integers(0, len(centers), count)] + 0.3 * rng.normal(size=(count, dim)).astype(np.float32)
+    data /= np.linalg.norm(data, axis=1, keepdims=True)
+    qs = data[rng.choice(count, queries, replace=False)] + 0.05 * rng.normal(size=(queries, dim)).astype(np.float32)
+
+    truth = [list(np.argsort(-(data @ q))[:top_k]) for q in qs]
+    ids = [str(i) for i in range(count)]
+    float32_mb = data.nbytes / (1024.0 * 1024.0)
+
+    print(f"Synthetic corpus: {count} x {dim}, float32 matrix = {float32_mb:.1f} MB")
+    for label, nlist in (("exact-int8", 0), ("ivf-int8", None)):
+        with tempfile.TemporaryDirectory() as d:
+            t0 = time.perf_counter()
+            build_index(d, ids, [""] * count, [{}] * count, data, nlist=nlist)
+            build_s = time.perf_counter() - t0
+
+            rss_before = _current_rss_mb()
+            index = QuantizedIndex(d)
+            lat: List[float] = []
+            got: List[List[int]] = []
+            for q in qs:
+                t0 = time.perf_counter()
+                rows = index.search_rows(q, top_k=top_k, nprobe=nprobe)
+                lat.append((time.perf_counter() - t0) * 1000.0)
+                got.append([int(index._doc(r)["id"]) for r, _ in rows])
+            rss_after = _current_rss_mb()
+
+            print(
+                f"  {label:<11} nlist={index.nlist:<5} recall@{top_k}={_recall(truth, got):.3f} "
+                f"p50={percentile(lat, 50):.2f}ms p95={percentile(lat, 95):.2f}ms "
+                f"disk={_dir_size_mb(d):.1f}MB rss_delta={rss_after - rss_before:.1f}MB "
+                f"build={build_s:.1f}s"
+            )
+            index.close()
+
+
+def run_chroma(top_k: int, nprobe: int):
+    from backend.services import rag_service
+    from backend.services.rag_service import STATIC_DOCS, embed_texts, get_collection
+
+    questions = load_sample_queries() + [
+        "What is the return window?",
+        "How long does express delivery take?",
+        "What is the Wi-Fi session limit?",
+        "What do Gold members get?",
+        "Does Caramel Latte contain gluten?",
+    ] + [d["text"].split(". ")[1] for d in STATIC_DOCS if ". " in d["text"]]
+
+    rss0 = _current_rss_mb()
+    index = rag_service.get_quantized_index()
+    rss_q = _current_rss_mb()
+
+    col = get_collection()
+    truth: List[List[str]] = []
+    chroma_lat: List[float] = []
+    for q in questions:
+        t0 = time.perf_counter()
+        res = col.query(query_texts=[q], n_results=top_k)
+        chroma_lat.append((time.perf_counter() - t0) * 1000.0)
+        truth.append(res["ids"][0])
+    rss_c = _current_rss_mb()
+
+    got: List[List[str]] = []
+    q_lat: List[float] = []
+    for q in questions:
+        emb = embed_texts([q])[0]
+        t0 = time.perf_counter()
+        rows = index.search_rows(emb, top_k=top_k, nprobe=nprobe)
+        q_lat.append((time.perf_counter() - t0) * 1000.0)
+        got.append([index._doc(r)["id"] for r, _ in rows])
+
+    print(f"Chroma vs quantized on {len(questions)} queries, corpus={len(index)}")
+    print(f"  recall@{top_k} vs Chroma: {_recall(truth, got):.3f}")
+    print(f"  search p50: chroma={percentile(chroma_lat, 50):.2f}ms (incl. embedding) "
+          f"quantized={percentile(q_lat, 50):.3f}ms (search only)")
+    print(f"  disk: chroma={_dir_size_mb(rag_service.CHROMA_DIR):.1f}MB "
+          f"quantized={_dir_size_mb(rag_service.QUANTIZED_INDEX_DIR):.1f}MB")
+    print(f"  rss delta: open quantized={rss_q - rss0:.1f}MB, chroma queries={rss_c - rss_q:.1f}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantized vector index benchmark")
+    parser.add_argument("--synthetic", type=int, default=0, help="corpus size for a synthetic run")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--chroma", action="store_true", help="compare against the Chroma collection")
+    args = parser.parse_args()
+
+    os.chdir(ROOT_DIR)
+    if args.synthetic:
+        run_synthetic(args.synthetic, args.dim, args.queries, args.top_k, args.nprobe)
+    if args.chroma:
+        run_chroma(args.top_k, args.nprobe)
+    if not args.synthetic and not args.chroma:
+        parser.error("pass --synthetic N and/or --chroma")
+
+
+if __name__ == "__main__":
+    main()
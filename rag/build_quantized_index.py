@@ -0,0 +1,53 @@
+# rag/build_quantized_index.py
+
+import argparse
+import os
+
+import numpy as np
+
+from backend.services.rag_service import QUANTIZED_INDEX_DIR, ensure_bootstrapped, get_collection
+from backend.services.vector_index import build_index
+
+
+def main():
+    """
+    Export the Chroma collection (documents + embeddings) into the int8
+    memory-mapped index used when RAG_BACKEND=quantized.
+    """
+    parser = argparse.ArgumentParser(description="Build the int8 quantized RAG index")
+    parser.add_argument("--tenant", default=None, help="export a tenant's collection instead of the default one")
+    args = parser.parse_args()
+
+    out_dir = QUANTIZED_INDEX_DIR
+    if args.tenant:
+        from backend.services.tenants import get_tenant
+
+        tenant = get_tenant(args.tenant)
+        tenant.ensure_bootstrapped()
+        col = get_collection(tenant.collection_name)
+        if not tenant.is_default:
+            out_dir = os.path.join(QUANTIZED_INDEX_DIR, tenant.tenant_id)
+    else:
+        ensure_bootstrapped()
+        col = get_collection()
+    data = col.get(include=["documents", "metadatas", "embeddings"])
+
+    ids = data.get("ids") or []
+    if not ids:
+        print("Collection is empty, nothing to export.")
+        return
+
+    embeddings = np.asarray(data["embeddings"], dtype=np.float32)
+    print(f"Building quantized index for {len(ids)} chunks (dim={embeddings.shape[1]})")
+    build_index(
+        out_dir,
+        ids=ids,
+        texts=data["documents"],
+        metadatas=data["metadatas"],
+        embeddings=embeddings,
+    )
+    print(f"Done: {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+from backend.services import faq_answers
+from backend.services.faq_answers import (
+    MAX_DISTANCE,
+    build_category_index,
+    extractive_answer,
+    set_category_enabled,
+)
+from backend.services.rag_service import STATIC_DOCS
+
+# Built from the static docs only (no Chroma needed)
+INDEX = build_category_index(STATIC_DOCS)
+
+
+def _snippet(category, distance):
+    doc = next(d for d in STATIC_DOCS if d["metadata"]["category"] == category)
+    return [{"text": doc["text"], "metadata": doc["metadata"], "distance": distance}]
+
+
+def test_confident_match_is_answered_from_the_docs():
+    out = extractive_answer(
+        "how many days do I have to return a product?",
+        _snippet("return_policy", 0.6),
+        selected_intent="RETURN_POLICY",
+        category_index=INDEX,
+    )
+    assert out is not None
+    assert out["selected_intent"] == "RETURN_POLICY"
+    assert "30 days" in out["reply"]
+    assert out["reply"].startswith("Per our Return & Refund Policy:")
+
+
+def test_distance_threshold():
+    question = "how many days do I have to return a product?"
+    assert extractive_answer(question, _snippet("return_policy", MAX_DISTANCE), category_index=INDEX)
+    assert extractive_answer(question, _snippet("return_policy", MAX_DISTANCE + 0.01), category_index=INDEX) is None
+    assert extractive_answer(question, _snippet("return_policy", None), category_index=INDEX) is None
+    assert extractive_answer(question, [], category_index=INDEX) is None
+
+
+def test_no_matching_sentence_falls_back_to_the_llm():
+    out = extractive_answer("tell me a joke", _snippet("return_policy", 0.3), category_index=INDEX)
+    assert out is None
+
+
+def test_category_kill_switch():
+    question = "is there free wifi in the store?"
+    assert extractive_answer(question, _snippet("wifi_terms", 0.5), category_index=INDEX)
+    set_category_enabled("wifi_terms", False)
+    try:
+        assert not faq_answers.is_category_enabled("wifi_terms")
+        assert extractive_answer(question, _snippet("wifi_terms", 0.5), category_index=INDEX) is None
+        assert extractive_answer(
+            "how many days do I have to return a product?",
+            _snippet("return_policy", 0.5),
+            category_index=INDEX,
+        )
+    finally:
+        set_category_enabled("wifi_terms", True)
+    assert extractive_answer(question, _snippet("wifi_terms", 0.5), category_index=INDEX)
+
+
+if __name__ == "__main__":
+    test_confident_match_is_answered_from_the_docs()
+    test_distance_threshold()
+    test_no_matching_sentence_falls_back_to_the_llm()
+    test_category_kill_switch()
+    print("FAQ extractive answers OK")
@@ -0,0 +1,69 @@
+import json
+import os
+import tempfile
+
+from backend.services import keyword_matcher
+from backend.services.keyword_matcher import KeywordMatcher
+
+RULES = [
+    {"intent": "ASK_RETURN_POLICY", "category": "return_policy", "faq": True,
+     "phrases": ["return", "return policy", "refund"]},
+    {"intent": "ASK_LOYALTY_BENEFITS", "category": "loyalty", "faq": True, "phrases": ["points"]},
+    {"intent": "CHECK_STORE_OPEN_STATUS", "category": "store_discovery", "faq": False,
+     "phrases": ["open now"]},
+]
+
+
+def test_scan_longest_phrase_at_word_start():
+    m = KeywordMatcher(RULES)
+    hits = m.scan("What's your RETURN  policy? Any refunds?")
+    assert [h.phrase for h in hits] == ["return policy", "refund"]
+    assert m.looks_like_faq("can I get a refund")
+    assert not m.looks_like_faq("I have two appointments")  # no mid-word hits
+    assert not m.looks_like_faq("is MG Road open now?")
+    assert [i["name"] for i in m.local_intents("is it open now? and my points?")] == [
+        "CHECK_STORE_OPEN_STATUS", "ASK_LOYALTY_BENEFITS"
+    ]
+
+
+def test_config_hot_reload():
+    old_path, old_interval = keyword_matcher.CONFIG_PATH, keyword_matcher.RELOAD_CHECK_S
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "keywords.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"rules": RULES}, f)
+        keyword_matcher.CONFIG_PATH = path
+        keyword_matcher.RELOAD_CHECK_S = 0.0
+        try:
+            keyword_matcher.reload_matcher()
+            assert not keyword_matcher.get_matcher().looks_like_faq("any wifi here?")
+
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"rules": RULES + [{"intent": "ASK_WIFI_TERMS", "category": "wifi_terms",
+                                              "faq": True, "phrases": ["wifi"]}]}, f)
+            os.utime(path, (1, 1))  # make sure the mtime changes
+            # The request that notices the edit isn't held up by the recompile:
+            # it gets the old matcher, the new one is swapped in behind it
+            old = keyword_matcher.get_matcher()
+            assert not old.looks_like_faq("any wifi here?")
+            assert keyword_matcher.wait_for_reload(timeout=5)
+            assert keyword_matcher.get_matcher() is not old
+            assert keyword_matcher.get_matcher().looks_like_faq("any wifi here?")
+
+            # A broken edit keeps the last good rules
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("{not json")
+            os.utime(path, (2, 2))
+            keyword_matcher.get_matcher()
+            assert keyword_matcher.wait_for_reload(timeout=5)
+            assert keyword_matcher.get_matcher().looks_like_faq("any wifi here?")
+        finally:
+            keyword_matcher.CONFIG_PATH = old_path
+            keyword_matcher.RELOAD_CHECK_S = old_interval
+            keyword_matcher.reload_matcher()
+
+
+if __name__ == "__main__":
+    test_scan_longest_phrase_at_word_start()
+    test_config_hot_reload()
+    print("Keyword matcher OK")
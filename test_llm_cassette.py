@@ -0,0 +1,57 @@
+import os
+import tempfile
+import time
+
+from backend.llm import client as llm_client
+from backend.llm.cassette import Cassette, CassetteMiss
+from bench.fake_ollama import serve_fake_ollama
+
+MESSAGES = [
+    {"role": "system", "content": "You are a customer support assistant."},
+    {"role": "user", "content": '{"user_message_masked":"is the MG Road store open?"}'},
+]
+
+
+def test_record_then_replay_without_ollama():
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "llm.jsonl.gz")
+
+        llm_client.set_cassette(Cassette(path, mode="record"))
+        with serve_fake_ollama(latency_ms=200, tokens_per_s=100):
+            chunks = []
+            live_streamed = llm_client.chat("llama3.1", MESSAGES, {"temperature": 0.3}, on_chunk=chunks.append)
+            live_plain = llm_client.chat("llama3.1", MESSAGES, {"temperature": 0.2})
+        assert len(chunks) > 1
+
+        # Zero latency: same content, no server, far faster than the recording
+        llm_client.set_cassette(Cassette(path, mode="replay", timing="zero"))
+        try:
+            replayed = []
+            t0 = time.perf_counter()
+            out = llm_client.chat("llama3.1", MESSAGES, {"temperature": 0.3}, on_chunk=replayed.append)
+            assert time.perf_counter() - t0 < 0.1
+            assert out == live_streamed and replayed == chunks
+            assert llm_client.chat("llama3.1", MESSAGES, {"temperature": 0.2}) == live_plain
+
+            # A streamed recording also serves the same request non-streamed
+            assert llm_client.chat("llama3.1", MESSAGES, {"temperature": 0.3}) == live_streamed
+
+            # A changed prompt is a miss, not a silent live call
+            try:
+                llm_client.chat("llama3.1", MESSAGES[:1], {"temperature": 0.2})
+                assert False, "expected CassetteMiss"
+            except CassetteMiss:
+                pass
+
+            # Original timing keeps the recorded latency
+            llm_client.set_cassette(Cassette(path, mode="replay", timing="original"))
+            t0 = time.perf_counter()
+            llm_client.chat("llama3.1", MESSAGES, {"temperature": 0.2})
+            assert time.perf_counter() - t0 >= 0.15
+        finally:
+            llm_client.set_cassette(None)
+
+
+if __name__ == "__main__":
+    test_record_then_replay_without_ollama()
+    print("LLM cassette OK")
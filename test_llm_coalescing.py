@@ -0,0 +1,93 @@
+import threading
+
+from backend.llm import client as llm_client
+from backend.llm.agent_intent import get_intents
+from backend.services import metrics
+from backend.services.user_context import get_user_context
+from bench.fake_ollama import serve_fake_ollama
+
+MESSAGES = [
+    {"role": "system", "content": "You are an Intent Classification engine."},
+    {"role": "user", "content": '{"user_message_masked":"is the MG Road store open?"}'},
+]
+
+
+def _run_concurrently(n, fn):
+    results = [None] * n
+    barrier = threading.Barrier(n)
+
+    def worker(i):
+        barrier.wait()
+        results[i] = fn()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_identical_calls_share_one_generation():
+    metrics.reset()
+    with serve_fake_ollama(latency_ms=300, tokens_per_s=200) as server:
+        results = _run_concurrently(
+            8, lambda: llm_client.chat("llama3.1", MESSAGES, {"temperature": 0.2})
+        )
+        assert server.calls == 1
+        assert len({r["message"]["content"] for r in results}) == 1
+        assert metrics.get_counter("llm.coalesced") == 7
+
+        # Different options -> different request, no sharing
+        llm_client.chat("llama3.1", MESSAGES, {"temperature": 0.3})
+        assert server.calls == 2
+
+
+def test_streaming_followers_get_every_chunk():
+    def stream():
+        pieces = []
+        resp = llm_client.chat("llama3.1", MESSAGES, {}, on_chunk=pieces.append)
+        return "".join(pieces), resp["message"]["content"]
+
+    with serve_fake_ollama(latency_ms=300, tokens_per_s=200) as server:
+        results = _run_concurrently(4, stream)
+        assert server.calls == 1
+        for streamed, full in results:
+            assert streamed == full == results[0][1]
+
+
+def test_same_question_from_different_users_is_coalesced():
+    metrics.reset()
+    location = {"lat": 12.9716, "lng": 77.5946}
+
+    def ask(user_id):
+        return lambda: get_intents({
+            "user_message": "is the MG Road store open?",
+            "location": location,
+            "user_context": get_user_context(user_id),
+        })
+
+    with serve_fake_ollama(latency_ms=300) as server:
+        barrier = threading.Barrier(2)
+        results = {}
+
+        def worker(user_id):
+            fn = ask(user_id)
+            barrier.wait()
+            results[user_id] = fn()
+
+        threads = [threading.Thread(target=worker, args=(u,)) for u in ("coalesce_alice", "coalesce_bob")]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert server.calls == 1
+        assert metrics.get_counter("llm.coalesced") == 1
+        assert results["coalesce_alice"]["intents"] == results["coalesce_bob"]["intents"]
+
+
+if __name__ == "__main__":
+    test_identical_calls_share_one_generation()
+    test_streaming_followers_get_every_chunk()
+    test_same_question_from_different_users_is_coalesced()
+    print("LLM coalescing OK")
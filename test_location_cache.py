@@ -0,0 +1,114 @@
+from datetime import datetime
+
+from backend.services import location_cache, metrics, store_locator
+from backend.services.location_cache import (
+    MAX_TTL_S,
+    _seconds_until_next_boundary,
+    geohash_center,
+    geohash_encode,
+    get_nearby_context,
+)
+from backend.services.offers import build_offers
+
+
+def _store(store_id, lat, lng, hours="00:00-23:59"):
+    return {"id": store_id, "name": store_id, "lat": lat, "lng": lng,
+            "opening_hours": hours, "is_open_now": True, "rating": 4.0}
+
+
+class _Catalog:
+    """
+    Swap in a store catalog (bumps the catalog version) and a clean cache.
+    """
+
+    def __init__(self, stores):
+        self.stores = stores
+
+    def __enter__(self):
+        self._old = list(store_locator.STORE_CATALOG)
+        store_locator.reload_store_catalog(self.stores)
+        location_cache.invalidate()
+        metrics.reset()
+        return self
+
+    def __exit__(self, *exc):
+        store_locator.reload_store_catalog(self._old)
+        location_cache.invalidate()
+
+
+def test_geohash_cells():
+    assert geohash_encode(42.6, -5.6, precision=5) == "ezs42"
+    cell = geohash_encode(12.9717, 77.5948)
+    c_lat, c_lng = geohash_center(cell)
+    assert geohash_encode(c_lat, c_lng) == cell
+    assert abs(c_lat - 12.9717) < 0.003 and abs(c_lng - 77.5948) < 0.006
+
+
+def test_same_cell_shares_an_entry_with_exact_distances():
+    c_lat, c_lng = geohash_center(geohash_encode(12.9717, 77.5948))
+    with _Catalog([_store("a", c_lat, c_lng), _store("b", c_lat + 0.02, c_lng)]):
+        stores, _ = get_nearby_context(c_lat + 0.001, c_lng, "Gold")
+        near, _ = get_nearby_context(c_lat - 0.001, c_lng + 0.002, "Gold")
+        assert metrics.get_counter("location_cache.miss") == 1
+        assert metrics.get_counter("location_cache.hit") == 1
+        assert metrics.ratio("location_cache.hit", "location_cache.lookups") == 0.5
+        assert abs(near[0]["distance_m"] - store_locator._haversine_distance_m(
+            c_lat - 0.001, c_lng + 0.002, c_lat, c_lng)) < 0.01
+
+        # Another cell, another tier: separate entries
+        get_nearby_context(c_lat + 0.05, c_lng, "Gold")
+        get_nearby_context(c_lat + 0.001, c_lng, "Bronze")
+        assert metrics.get_counter("location_cache.miss") == 3
+
+
+def test_coupons_follow_the_users_own_ranking():
+    # "a" is nearest to the cell center, "b" to the user (same cell)
+    c_lat, c_lng = geohash_center(geohash_encode(12.9717, 77.5948))
+    with _Catalog([_store("a", c_lat + 0.0005, c_lng), _store("b", c_lat - 0.002, c_lng)]):
+        user = (c_lat - 0.0025, c_lng)
+        assert geohash_encode(*user) == geohash_encode(c_lat, c_lng)
+        stores, offers = get_nearby_context(*user, "Gold")
+        assert [s["id"] for s in stores] == ["b", "a"]
+        assert [(o["store_id"], o["coupon_code"]) for o in offers] == [("b", "HOT15_1"), ("a", "HOT15_2")]
+
+        uncached = store_locator.get_nearby_stores(*user)
+        assert [o["coupon_code"] for o in offers] == [o["coupon_code"] for o in build_offers("Gold", uncached)]
+
+
+def test_ttl_stops_at_the_next_opening_hours_boundary():
+    stores = [_store("a", 0, 0, "08:00-22:00")]
+    assert _seconds_until_next_boundary(stores, datetime(2025, 1, 1, 21, 59, 30)) == 30.0
+    assert _seconds_until_next_boundary(stores, datetime(2025, 1, 1, 7, 58, 0)) == 120.0
+    assert _seconds_until_next_boundary(stores, datetime(2025, 1, 1, 12, 0, 0)) == MAX_TTL_S
+    assert _seconds_until_next_boundary(stores, datetime(2025, 1, 1, 22, 0, 0)) == MAX_TTL_S
+    assert _seconds_until_next_boundary([_store("x", 0, 0, "")], datetime(2025, 1, 1)) == MAX_TTL_S
+
+    # An expired entry is rebuilt
+    c_lat, c_lng = geohash_center(geohash_encode(12.9717, 77.5948))
+    with _Catalog([_store("a", c_lat, c_lng)]):
+        get_nearby_context(c_lat, c_lng, "Gold")
+        for entry in location_cache._CACHE.values():
+            entry.expires_at = 0.0
+        get_nearby_context(c_lat, c_lng, "Gold")
+        assert metrics.get_counter("location_cache.miss") == 2
+
+
+def test_catalog_reload_invalidates():
+    c_lat, c_lng = geohash_center(geohash_encode(12.9717, 77.5948))
+    with _Catalog([_store("a", c_lat, c_lng)]):
+        stores, _ = get_nearby_context(c_lat, c_lng, "Gold")
+        assert [s["id"] for s in stores] == ["a"]
+
+        store_locator.reload_store_catalog([_store("a", c_lat, c_lng), _store("new", c_lat, c_lng + 0.0001)])
+        stores, _ = get_nearby_context(c_lat, c_lng, "Gold")
+        assert {s["id"] for s in stores} == {"a", "new"}
+        assert metrics.get_counter("location_cache.miss") == 2
+
+
+if __name__ == "__main__":
+    test_geohash_cells()
+    test_same_cell_shares_an_entry_with_exact_distances()
+    test_coupons_follow_the_users_own_ranking()
+    test_ttl_stops_at_the_next_opening_hours_boundary()
+    test_catalog_reload_invalidates()
+    print("location cache OK")
@@ -0,0 +1,69 @@
+from backend.llm import model_router as router
+from backend.llm.agent_intent import get_intents
+from backend.llm.agent_response import get_final_response
+from backend.services import metrics
+from bench.fake_ollama import serve_fake_ollama
+
+
+def _intent(name, confidence):
+    return {"name": name, "confidence": confidence, "required_data": [], "category": "x"}
+
+
+def test_intent_escalation_reasons():
+    assert router.intent_escalation_reason(None) == "invalid_json"
+    assert router.intent_escalation_reason({"intents": []}) == "no_intents"
+    assert router.intent_escalation_reason({"intents": [{"confidence": 0.9}]}) == "schema"
+    assert router.intent_escalation_reason({"intents": [_intent("A", 0.4)]}) == "low_confidence"
+    assert router.intent_escalation_reason({"intents": [_intent("A", 0.9)]}) is None
+
+
+def test_response_routing():
+    if not router.ROUTING_ENABLED:
+        return
+    one = [_intent("CHECK_STORE_OPEN_STATUS", 0.95)]
+    assert router.choose_response_model(one, 1000, 2) == (router.SMALL_MODEL, "simple")
+    two = one + [_intent("SUGGEST_WARM_DRINK", 0.6)]
+    assert router.choose_response_model(two, 1000, 2)[1] == "multi_intent"
+    assert router.choose_response_model([_intent("A", 0.7)], 1000, 2)[1] == "low_confidence"
+    assert router.choose_response_model(one, 50_000, 2)[1] == "large_context"
+    assert router.choose_response_model(one, 1000, 40)[1] == "long_conversation"
+
+    assert router.response_escalation_reason(None) == "invalid_json"
+    assert router.response_escalation_reason({"reply": ""}) == "schema"
+    assert router.response_escalation_reason({"reply": "Open till 10pm."}) is None
+
+
+def test_missing_small_model_falls_back_to_large():
+    if not router.ROUTING_ENABLED:
+        return
+    metrics.reset()
+    try:
+        with serve_fake_ollama(missing_models=[router.SMALL_MODEL]) as server:
+            out = get_intents({"user_message": "is the MG Road store open?", "location": {}})
+            assert out["model"] == router.LARGE_MODEL
+            assert out["intents"][0]["name"] != "FALLBACK_GENERIC"
+            assert metrics.get_counter("llm.escalate.intent.error") == 1
+            assert not router.small_model_available()
+
+            # While the small model is marked down, nothing is routed to it
+            assert router.choose_intent_model() == router.LARGE_MODEL
+            one = [_intent("CHECK_STORE_OPEN_STATUS", 0.95)]
+            assert router.choose_response_model(one, 1000, 2) == (router.LARGE_MODEL, "small_model_unavailable")
+            calls = server.calls
+            get_intents({"user_message": "wifi password?", "location": {}})
+            assert server.calls == calls + 1
+
+            # Agent-2 escalates the same way when the small model fails mid-turn
+            router._small_model_down_until = 0.0
+            reply = get_final_response({"intents": one, "candidate_stores": []})
+            assert reply.get("reply")
+            assert metrics.get_counter("llm.escalate.response.error") == 1
+    finally:
+        router._small_model_down_until = 0.0
+
+
+if __name__ == "__main__":
+    test_intent_escalation_reasons()
+    test_response_routing()
+    test_missing_small_model_falls_back_to_large()
+    print("Model router OK")
@@ -0,0 +1,325 @@
+import threading
+import time
+
+from backend.llm import client as llm_client
+from backend.llm import scheduler as llm_scheduler
+from backend.llm.scheduler import (
+    PRIORITY_BATCH,
+    PRIORITY_HIGH,
+    PRIORITY_NORMAL,
+    DeadlineExceeded,
+    RequestContext,
+    Scheduler,
+    UserQueueFull,
+    priority_class,
+)
+from backend.services import metrics
+from backend.services.user_context import get_user_context
+from bench.fake_ollama import serve_fake_ollama
+
+
+def _queue_behind_busy_slot(sched, requests):
+    """
+    Hold the only slot, queue `requests` (RequestContexts) in order, then
+    release; returns the user_ids in the order they were granted.
+    """
+    sched.acquire(RequestContext("holder"))
+    order = []
+    lock = threading.Lock()
+
+    def worker(ctx):
+        with sched.slot(ctx):
+            with lock:
+                order.append(ctx.user_id)
+
+    threads = []
+    for ctx in requests:
+        t = threading.Thread(target=worker, args=(ctx,))
+        t.start()
+        threads.append(t)
+        time.sleep(0.02)  # deterministic arrival order
+    sched.release()
+    for t in threads:
+        t.join()
+    return order
+
+
+def test_light_user_overtakes_heavy_backlog():
+    sched = Scheduler(concurrency=1, user_burst=100, max_queued_per_user=100)
+    order = _queue_behind_busy_slot(
+        sched, [RequestContext("heavy") for _ in range(5)] + [RequestContext("light")]
+    )
+    assert order.index("light") <= 1
+
+    fifo = Scheduler(concurrency=1, fair=False)
+    order = _queue_behind_busy_slot(
+        fifo, [RequestContext("heavy") for _ in range(5)] + [RequestContext("light")]
+    )
+    assert order[-1] == "light"
+
+
+def test_priority_classes_served_in_order():
+    sched = Scheduler(concurrency=1, user_burst=100)
+    order = _queue_behind_busy_slot(sched, [
+        RequestContext("batch", PRIORITY_BATCH),
+        RequestContext("normal", PRIORITY_NORMAL),
+        RequestContext("gold", PRIORITY_HIGH),
+    ])
+    assert order == ["gold", "normal", "batch"]
+
+    assert priority_class("Gold") == PRIORITY_HIGH
+    assert priority_class("Bronze", nearest_store_m=20.0) == PRIORITY_HIGH
+    assert priority_class("Bronze", nearest_store_m=900.0) == PRIORITY_NORMAL
+    assert priority_class("Gold", batch=True) == PRIORITY_BATCH
+
+
+def test_gold_tier_comes_from_the_user_profile():
+    # demo_user is Gold in the light profile; the memory profile says Bronze
+    ctx = get_user_context("demo_user")
+    assert ctx.profile_light["loyalty_tier"] == "Gold"
+    assert priority_class(ctx.loyalty_tier) == PRIORITY_HIGH
+    assert priority_class(get_user_context("some_guest").loyalty_tier) == PRIORITY_NORMAL
+
+
+def test_over_rate_user_is_demoted_to_batch():
+    sched = Scheduler(concurrency=1, user_rate=0.001, user_burst=1)
+    order = _queue_behind_busy_slot(sched, [
+        RequestContext("spammer"),   # spends the only token
+        RequestContext("spammer"),   # over the rate -> batch
+        RequestContext("batch", PRIORITY_BATCH),
+        RequestContext("normal"),
+    ])
+    # The second spammer request waits behind "normal", like any batch job
+    assert order == ["spammer", "normal", "spammer", "batch"]
+    assert sched.stats()["throttled"] >= 1
+
+
+def test_expired_requests_are_dropped():
+    metrics.reset()
+    sched = Scheduler(concurrency=1)
+    sched.acquire(RequestContext("holder"))
+    errors = []
+
+    def worker():
+        try:
+            sched.acquire(RequestContext("late", deadline=time.monotonic() + 0.1))
+            sched.release()
+        except DeadlineExceeded as e:
+            errors.append(e)
+
+    t = threading.Thread(target=worker)
+    t.start()
+    t.join(timeout=2.0)
+    assert not t.is_alive() and len(errors) == 1
+    assert sched.stats()["queue_depth"]["normal"] == 0
+    sched.release()
+    assert sched.stats()["running"] == 0
+
+    # Already past its deadline: never queued
+    try:
+        sched.acquire(RequestContext("late", deadline=time.monotonic() - 1))
+        assert False, "expected DeadlineExceeded"
+    except DeadlineExceeded:
+        pass
+    assert metrics.get_counter("scheduler.dropped_deadline") == 2
+
+
+def test_user_queue_cap():
+    sched = Scheduler(concurrency=1, user_burst=100, max_queued_per_user=2)
+    sched.acquire(RequestContext("holder"))
+    threads = [threading.Thread(target=sched.acquire, args=(RequestContext("u"),)) for _ in range(2)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    try:
+        sched.acquire(RequestContext("u"))
+        assert False, "expected UserQueueFull"
+    except UserQueueFull as e:
+        assert e.status_code == 429
+    assert sched.stats()["queue_depth"]["normal"] == 2
+    for _ in range(3):
+        sched.release()
+    for t in threads:
+        t.join()
+
+
+def test_generations_queue_under_the_request_context():
+    sched = Scheduler(concurrency=1, user_burst=100)
+    llm_scheduler.configure(sched)
+    try:
+        with serve_fake_ollama(latency_ms=200) as server:
+            sched.acquire(RequestContext("holder"))
+            errors = []
+
+            def turn():
+                with llm_scheduler.request_context("impatient", timeout_s=0.1):
+                    try:
+                        llm_client.chat("llama3.1", [{"role": "user", "content": "hi"}])
+                    except DeadlineExceeded as e:
+                        errors.append(e)
+
+            t = threading.Thread(target=turn)
+            t.start()
+            t.join(timeout=2.0)
+            sched.release()
+            assert len(errors) == 1 and server.calls == 0
+
+            # Free slot: goes straight through
+            with llm_scheduler.request_context("patient", timeout_s=5):
+                llm_client.chat("llama3.1", [{"role": "user", "content": "hello"}])
+            assert server.calls == 1
+            assert sched.stats()["running"] == 0
+    finally:
+        llm_scheduler.configure(None)
+
+
+def test_rejected_leader_does_not_fail_its_followers():
+    sched = Scheduler(concurrency=1, user_burst=100)
+    llm_scheduler.configure(sched)
+    messages = [{"role": "user", "content": "is the MG Road store open?"}]
+    results = {}
+
+    def turn(user_id, timeout_s, streamed):
+        with llm_scheduler.request_context(user_id, timeout_s=timeout_s):
+            try:
+                if streamed:
+                    chunks = []
+                    llm_client.chat("llama3.1", messages, on_chunk=chunks.append)
+                    results[user_id] = "".join(chunks)
+                else:
+                    results[user_id] = llm_client.chat("llama3.1", messages)["message"]["content"]
+            except Exception as e:
+                results[user_id] = e
+
+    try:
+        with serve_fake_ollama(latency_ms=50) as server:
+            for streamed in (False, True):
+                results.clear()
+                sched.acquire(RequestContext("holder"))
+                alice = threading.Thread(target=turn, args=("brewco:alice", 0.2, streamed))
+                alice.start()
+                time.sleep(0.05)  # alice leads (queued for the slot), bob follows
+                bob = threading.Thread(target=turn, args=("bob", 30, streamed))
+                bob.start()
+                alice.join(timeout=2.0)
+                assert isinstance(results["brewco:alice"], DeadlineExceeded)
+                assert "alice" not in str(results["brewco:alice"])
+
+                sched.release()
+                bob.join(timeout=5.0)
+                assert isinstance(results["bob"], str) and results["bob"]
+            assert server.calls == 2
+            assert sched.stats()["running"] == 0
+    finally:
+        llm_scheduler.configure(None)
+
+
+def test_followers_are_charged_to_their_own_rate():
+    sched = Scheduler(concurrency=2, user_rate=0.001, user_burst=1)
+    llm_scheduler.configure(sched)
+    metrics.reset()
+    messages = [{"role": "user", "content": "wifi password?"}]
+    try:
+        with serve_fake_ollama(latency_ms=300) as server:
+            sched.acquire(RequestContext("spammer"))  # spends the spammer's only token
+            sched.release()
+
+            def lead():
+                with llm_scheduler.request_context("someone_else"):
+                    llm_client.chat("llama3.1", messages)
+
+            leader = threading.Thread(target=lead)
+            leader.start()
+            time.sleep(0.05)
+            with llm_scheduler.request_context("spammer"):
+                llm_client.chat("llama3.1", messages)
+            leader.join()
+            assert server.calls == 1  # still shared the generation
+            assert metrics.get_counter("llm.coalesced") == 1
+            assert metrics.get_counter("scheduler.throttled") == 1
+            assert sched.stats()["wait_ms"]["batch"]["samples"] == 1  # waited as batch
+    finally:
+        llm_scheduler.configure(None)
+
+
+def test_high_priority_follower_lifts_a_batch_leader():
+    sched = Scheduler(concurrency=1, user_burst=100)
+    llm_scheduler.configure(sched)
+    metrics.reset()
+    shared = [{"role": "user", "content": "is the MG Road store open?"}]
+    other = [{"role": "user", "content": "wifi password?"}]
+    finished = []
+    lock = threading.Lock()
+
+    def turn(user_id, priority, messages):
+        with llm_scheduler.request_context(user_id, priority, timeout_s=10):
+            llm_client.chat("llama3.1", messages)
+        with lock:
+            finished.append(user_id)
+
+    try:
+        with serve_fake_ollama(latency_ms=100) as server:
+            sched.acquire(RequestContext("holder"))
+            threads = []
+            for args in (
+                ("batch_job", PRIORITY_BATCH, shared),     # leads the shared generation
+                ("normal_user", PRIORITY_NORMAL, other),
+                ("gold_user", PRIORITY_HIGH, shared),      # follows the batch job
+            ):
+                t = threading.Thread(target=turn, args=args)
+                t.start()
+                threads.append(t)
+                time.sleep(0.05)
+            assert sched.stats()["queue_depth"] == {"high": 1, "normal": 1, "batch": 0}
+            sched.release()
+            for t in threads:
+                t.join(timeout=5.0)
+            assert finished.index("gold_user") < finished.index("normal_user")
+            assert finished.index("batch_job") < finished.index("normal_user")
+            assert server.calls == 2
+            assert metrics.get_counter("scheduler.boosted") == 1
+    finally:
+        llm_scheduler.configure(None)
+
+
+def test_follower_stops_waiting_at_its_deadline():
+    sched = Scheduler(concurrency=1, user_burst=100)
+    llm_scheduler.configure(sched)
+    messages = [{"role": "user", "content": "is the MG Road store open?"}]
+    try:
+        with serve_fake_ollama(latency_ms=1000) as server:
+            for streamed in (False, True):
+                def lead():
+                    with llm_scheduler.request_context("batch_job", PRIORITY_BATCH, timeout_s=10):
+                        llm_client.chat("llama3.1", messages, on_chunk=(lambda _: None) if streamed else None)
+
+                leader = threading.Thread(target=lead)
+                leader.start()
+                time.sleep(0.05)  # generating, not just queued
+                t0 = time.monotonic()
+                try:
+                    with llm_scheduler.request_context("impatient", PRIORITY_HIGH, timeout_s=0.2):
+                        llm_client.chat("llama3.1", messages, on_chunk=(lambda _: None) if streamed else None)
+                    assert False, "expected DeadlineExceeded"
+                except DeadlineExceeded:
+                    pass
+                assert time.monotonic() - t0 < 0.6
+                leader.join(timeout=5.0)  # the generation itself carries on
+            assert server.calls == 2
+    finally:
+        llm_scheduler.configure(None)
+
+
+if __name__ == "__main__":
+    test_light_user_overtakes_heavy_backlog()
+    test_priority_classes_served_in_order()
+    test_gold_tier_comes_from_the_user_profile()
+    test_over_rate_user_is_demoted_to_batch()
+    test_expired_requests_are_dropped()
+    test_user_queue_cap()
+    test_generations_queue_under_the_request_context()
+    test_rejected_leader_does_not_fail_its_followers()
+    test_followers_are_charged_to_their_own_rate()
+    test_high_priority_follower_lifts_a_batch_leader()
+    test_follower_stops_waiting_at_its_deadline()
+    print("LLM scheduler OK")
@@ -0,0 +1,148 @@
+import json
+import os
+import tempfile
+
+from backend.services import location_cache, metrics, tenants
+from backend.services.tenants import TenantConfigError, UnknownTenantError, get_tenant, scoped_user_id
+
+
+def _tenant_config(brand, store_id, lat, lng, gold_discount):
+    return {
+        "brand_name": brand,
+        "stores": [{"id": store_id, "name": f"{brand} One", "lat": lat, "lng": lng,
+                    "opening_hours": "00:00-23:59", "is_open_now": True, "rating": 4.0}],
+        "tier_discounts": {"Gold": gold_discount},
+        "faq_docs": [{"id": f"{store_id}_returns",
+                      "text": f"Returns — {brand}. Unopened beans can be returned within 14 days of purchase.",
+                      "metadata": {"category": "return_policy"}}],
+        "prompts": {"response": f"You are the {brand} assistant.\n{{default}}"},
+    }
+
+
+class _TenantsDir:
+    def __init__(self, configs, budget_mb=256.0):
+        self.configs = configs
+        self.budget_mb = budget_mb
+        self._touches = 0
+
+    def __enter__(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        for tid, config in self.configs.items():
+            os.makedirs(os.path.join(self._tmp.name, tid))
+            with open(os.path.join(self._tmp.name, tid, "tenant.json"), "w") as f:
+                json.dump(config, f)
+        self._old = tenants.TENANTS_DIR, tenants.TENANT_CACHE_BUDGET_MB
+        tenants.TENANTS_DIR = self._tmp.name
+        tenants.TENANT_CACHE_BUDGET_MB = self.budget_mb
+        return self
+
+    def touch(self, tenant_id):
+        """
+        Give tenant.json a new mtime even within the filesystem's resolution.
+        """
+        path = os.path.join(self._tmp.name, tenant_id, "tenant.json")
+        self._touches += 1
+        mtime_ns = (1_700_000_000 + self._touches) * 10 ** 9
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+    def __exit__(self, *exc):
+        for tid in self.configs:
+            tenants.evict_tenant(tid)
+        tenants.TENANTS_DIR, tenants.TENANT_CACHE_BUDGET_MB = self._old
+        self._tmp.cleanup()
+
+
+def test_unknown_and_malformed_tenants():
+    with _TenantsDir({"acme": _tenant_config("Acme", "acme_1", 12.97, 77.59, 30)}):
+        assert get_tenant(None).is_default
+        assert get_tenant("ACME").tenant_id == "acme"
+        for bad in ("nope", "../etc", "a b"):
+            try:
+                get_tenant(bad)
+                assert False, bad
+            except UnknownTenantError:
+                pass
+    assert scoped_user_id("default", "alice") == "alice"
+    assert scoped_user_id("acme", "alice") == "acme:alice"
+
+
+def test_broken_config_is_a_503_until_the_file_changes():
+    from fastapi.testclient import TestClient
+
+    from backend.app import app
+
+    with _TenantsDir({"acme": _tenant_config("Acme", "acme_1", 12.97, 77.59, 30)}) as d:
+        path = tenants.tenant_config_path("acme")
+        metrics.reset()
+        for broken in ('{"brand_name": "Acme", "stores": [', '{"tier_discounts": [20, 10]}', "[]"):
+            with open(path, "w") as f:
+                f.write(broken)
+            d.touch("acme")
+            try:
+                get_tenant("acme")
+                assert False, broken
+            except TenantConfigError as e:
+                assert e.status_code == 503 and path not in str(e)
+        assert metrics.get_counter("tenants.config_errors") == 3
+
+        # Not re-parsed while the file is unchanged
+        resp = TestClient(app).post("/chat", json={"user_id": "u1", "message": "hi", "tenant_id": "acme"})
+        assert resp.status_code == 503 and "acme" in resp.json()["detail"]
+        assert metrics.get_counter("tenants.config_errors") == 3
+
+        # Fixed on disk: loads on the next request
+        with open(path, "w") as f:
+            json.dump(_tenant_config("Acme", "acme_1", 12.97, 77.59, 30), f)
+        d.touch("acme")
+        assert get_tenant("acme").brand_name == "Acme"
+
+
+def test_catalogs_prompts_and_cache_isolation():
+    with _TenantsDir({
+        "acme": _tenant_config("Acme", "acme_1", 12.9717, 77.5948, 30),
+        "zeta": _tenant_config("Zeta", "zeta_1", 12.9717, 77.5948, 40),
+    }):
+        acme, zeta = get_tenant("acme"), get_tenant("zeta")
+        assert acme.prompt("response").startswith("You are the Acme assistant.\n")
+        assert "VALID JSON" in acme.prompt("response")
+        assert acme.prompt("intent") is None and get_tenant().prompt("response") is None
+        assert "return_policy" in acme.faq_index()
+
+        # Same cell and tier, different tenants: separate entries, own catalogs
+        location_cache.invalidate()
+        a_stores, a_offers = location_cache.get_nearby_context(12.9716, 77.5946, "Gold", tenant=acme)
+        z_stores, z_offers = location_cache.get_nearby_context(12.9716, 77.5946, "Gold", tenant=zeta)
+        d_stores, _ = location_cache.get_nearby_context(12.9716, 77.5946, "Gold", tenant=get_tenant())
+        assert [s["id"] for s in a_stores] == ["acme_1"] and a_offers[0]["coupon_code"] == "HOT30_1"
+        assert [s["id"] for s in z_stores] == ["zeta_1"] and z_offers[0]["coupon_code"] == "HOT40_1"
+        assert "acme_1" not in [s["id"] for s in d_stores]
+
+        # Evicting a tenant drops only its cache entries
+        tenants.evict_tenant("acme")
+        assert {k[0] for k in location_cache._CACHE} == {"zeta", "default"}
+
+
+def test_lru_eviction_under_budget():
+    configs = {f"t{i}": _tenant_config(f"T{i}", f"t{i}_1", 12.97, 77.59, 10) for i in range(4)}
+    with _TenantsDir(configs):
+        one = get_tenant("t0").size_bytes()
+        tenants.TENANT_CACHE_BUDGET_MB = (2.5 * one) / (1024 * 1024)  # room for two
+
+        get_tenant("t0")
+        get_tenant("t1")
+        get_tenant("t0")  # t1 is now least recently used
+        get_tenant("t2")
+        loaded = set(tenants.registry_stats()["tenants"])
+        assert {"t0", "t2"} <= loaded and "t1" not in loaded
+
+        # An evicted tenant reloads transparently
+        assert get_tenant("t1").tenant_id == "t1"
+        assert "t1" in tenants.registry_stats()["tenants"]
+
+
+if __name__ == "__main__":
+    test_unknown_and_malformed_tenants()
+    test_broken_config_is_a_503_until_the_file_changes()
+    test_catalogs_prompts_and_cache_isolation()
+    test_lru_eviction_under_budget()
+    print("Tenants OK")
@@ -0,0 +1,105 @@
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+
+from backend.services import user_memory, user_profile
+from backend.services.user_context import get_user_context, invalidate_user_context
+
+
+@contextmanager
+def _memory():
+    """
+    In-memory user memory (no write-behind log) and fresh snapshots.
+    """
+    old_log = user_memory._log
+    user_memory._log = None
+    user_memory.reset_all()
+    try:
+        yield
+    finally:
+        user_memory.reset_all()
+        user_memory._log = old_log
+
+
+def _persistent(user_id):
+    return json.loads(get_user_context(user_id).persistent_json())
+
+
+def test_memory_mutations_rebuild_the_snapshot():
+    with _memory():
+        snap = get_user_context("alice")
+        assert get_user_context("alice") is snap
+
+        user_memory.store_preference("alice", "favorite_drinks", "flat white")
+        assert get_user_context("alice") is not snap
+        assert _persistent("alice")["preferences"]["favorite_drinks"] == ["flat white"]
+
+        snap = get_user_context("alice")
+        user_memory.set_last_order("alice", {"item": "flat white", "store_id": "mg_road"})
+        assert get_user_context("alice") is not snap
+        assert _persistent("alice")["last_order"]["store_id"] == "mg_road"
+
+        # Only the mutated user is rebuilt
+        bob = get_user_context("bob")
+        user_memory.set_last_seen_store("alice", {"id": "mg_road"})
+        assert get_user_context("bob") is bob
+
+        user_memory.reset_user("alice")
+        assert _persistent("alice")["last_order"] is None
+        assert get_user_context("bob") is bob
+
+        user_memory.reset_all()
+        assert get_user_context("bob") is not bob
+
+
+def test_turns_keep_the_snapshot_but_serialize_fresh_history():
+    with _memory():
+        user_memory.store_preference("alice", "favorite_drinks", "mocha")
+        snap = get_user_context("alice")
+        before = snap.persistent_json()
+
+        user_memory.update_conversation_history("alice", "hi", "Hello!")
+        assert get_user_context("alice") is snap
+        assert snap.history_turns() == 1
+        after = json.loads(snap.persistent_json())
+        assert after["history"] == [{"user": "hi", "bot": "Hello!"}]
+        assert after["preferences"]["favorite_drinks"] == ["mocha"]
+        assert snap.persistent_json() != before
+
+        # After a reset the old history list is gone: the new snapshot starts empty
+        user_memory.reset_user("alice")
+        assert get_user_context("alice").history_turns() == 0
+
+
+def test_profile_edits_need_an_explicit_invalidate():
+    users = {"carol": {"user_id": "carol", "name": "Carol", "loyalty_tier": "Bronze"}}
+    with _memory(), tempfile.TemporaryDirectory() as tmp:
+        old_path = user_profile.DATA_PATH
+        user_profile.DATA_PATH = os.path.join(tmp, "users.json")
+        try:
+            with open(user_profile.DATA_PATH, "w", encoding="utf-8") as f:
+                json.dump(users, f)
+            invalidate_user_context()
+            assert get_user_context("carol").loyalty_tier == "Bronze"
+
+            users["carol"]["loyalty_tier"] = "Gold"
+            with open(user_profile.DATA_PATH, "w", encoding="utf-8") as f:
+                json.dump(users, f)
+            assert get_user_context("carol").loyalty_tier == "Bronze"  # still cached
+
+            invalidate_user_context("carol")
+            snap = get_user_context("carol")
+            assert snap.loyalty_tier == "Gold"
+            assert json.loads(snap.light_json)["loyalty_tier"] == "Gold"
+            assert json.loads(snap.intent_json) == {"loyalty_tier": "Gold"}
+        finally:
+            user_profile.DATA_PATH = old_path
+            invalidate_user_context()
+
+
+if __name__ == "__main__":
+    test_memory_mutations_rebuild_the_snapshot()
+    test_turns_keep_the_snapshot_but_serialize_fresh_history()
+    test_profile_edits_need_an_explicit_invalidate()
+    print("User context OK")
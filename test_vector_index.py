@@ -0,0 +1,131 @@
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from backend.services import rag_service, vector_index
+from backend.services.vector_index import QuantizedIndex, build_index, quantize_int8
+
+
+def _corpus(count=600, dim=32, seed=7):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((count, dim)).astype(np.float32)
+    texts = [f"doc {i}" for i in range(count)]
+    return vectors, texts
+
+
+def _build(out_dir, vectors, texts, nlist=0):
+    build_index(out_dir, [f"id{i}" for i in range(len(texts))], texts,
+                [{"row": i} for i in range(len(texts))], vectors, nlist=nlist)
+    return QuantizedIndex(out_dir)
+
+
+def _exact_top(vectors, query, k):
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = unit @ (query / np.linalg.norm(query))
+    top = np.argsort(-scores)[:k]
+    return [int(i) for i in top], scores[top]
+
+
+def test_quantize_int8_round_trips_within_half_a_step():
+    vectors, _ = _corpus(count=50)
+    vectors[3] = 0.0
+    q, scales = quantize_int8(vectors)
+    assert q.dtype == np.int8 and scales.dtype == np.float32
+    assert np.abs(q).max() <= 127
+    error = np.abs(q.astype(np.float32) * scales[:, None] - vectors)
+    assert (error <= scales[:, None] / 2 + 1e-6).all()
+    assert not q[3].any()
+
+
+def test_exact_search_matches_float_ranking():
+    vectors, texts = _corpus()
+    rng = np.random.default_rng(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        index = _build(tmp, vectors, texts)
+        try:
+            for _ in range(20):
+                query = rng.standard_normal(vectors.shape[1]).astype(np.float32)
+                expected_rows, expected_scores = _exact_top(vectors, query, 10)
+                hits = index.search_rows(query, top_k=10)
+                scores = [s for _, s in hits]
+                assert scores == sorted(scores, reverse=True)
+                assert np.allclose(scores, expected_scores, atol=0.02)
+                assert len({r for r, _ in hits} & set(expected_rows)) >= 9
+
+            # A stored document finds itself first, at distance ~0
+            results = index.search(vectors[42], top_k=3)
+            assert results[0]["text"] == "doc 42" and results[0]["metadata"] == {"row": 42}
+            assert results[0]["distance"] < 0.01
+            distances = [r["distance"] for r in results]
+            assert distances == sorted(distances)
+
+            assert len(index.search(vectors[0], top_k=1000)) == len(texts)
+        finally:
+            index.close()
+
+
+def test_ivf_search_probing_every_list_is_exact():
+    vectors, texts = _corpus()
+    rng = np.random.default_rng(2)
+    with tempfile.TemporaryDirectory() as exact_dir, tempfile.TemporaryDirectory() as ivf_dir:
+        exact = _build(exact_dir, vectors, texts)
+        ivf = _build(ivf_dir, vectors, texts, nlist=8)
+        try:
+            assert ivf.nlist == 8 and int(ivf.list_offsets[-1]) == len(texts)
+            for _ in range(10):
+                query = rng.standard_normal(vectors.shape[1]).astype(np.float32)
+                want = [r["text"] for r in exact.search(query, top_k=5)]
+                assert [r["text"] for r in ivf.search(query, top_k=5, nprobe=8)] == want
+
+            # One probe still reaches the list the document was filed under
+            assert ivf.search(vectors[123], top_k=1, nprobe=1)[0]["text"] == "doc 123"
+        finally:
+            exact.close()
+            ivf.close()
+
+
+def test_concurrent_first_queries_open_one_index():
+    vectors, texts = _corpus(count=20)
+    opened = []
+    real = vector_index.QuantizedIndex
+
+    class _SlowIndex(real):
+        def __init__(self, index_dir):
+            time.sleep(0.05)  # widen the window between the check and the assignment
+            opened.append(index_dir)
+            super().__init__(index_dir)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _build(tmp, vectors, texts).close()
+        old = rag_service.QUANTIZED_INDEX_DIR, rag_service._quantized_index
+        rag_service.QUANTIZED_INDEX_DIR, rag_service._quantized_index = tmp, None
+        vector_index.QuantizedIndex = _SlowIndex
+        try:
+            start = threading.Barrier(8)
+            got = []
+
+            def first_query():
+                start.wait()
+                got.append(rag_service.get_quantized_index())
+
+            threads = [threading.Thread(target=first_query) for _ in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            assert len(opened) == 1
+            assert len(got) == 8 and all(index is got[0] for index in got)
+            got[0].close()
+        finally:
+            vector_index.QuantizedIndex = real
+            rag_service.QUANTIZED_INDEX_DIR, rag_service._quantized_index = old
+
+
+if __name__ == "__main__":
+    test_quantize_int8_round_trips_within_half_a_step()
+    test_exact_search_matches_float_ranking()
+    test_ivf_search_probing_every_list_is_exact()
+    test_concurrent_first_queries_open_one_index()
+    print("Vector index OK")
@@ -0,0 +1,109 @@
+from contextlib import contextmanager
+
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from backend import app as app_module
+from backend.services import metrics, user_memory
+from bench.fake_ollama import serve_fake_ollama
+
+STORE = {"lat": 12.9717, "lng": 77.5948}  # Starbucks MG Road
+QUESTION = "where is the nearest coffee shop?"
+
+
+@contextmanager
+def _client(**settings):
+    """
+    TestClient for the API with backend.app settings overridden
+    (WS_HEARTBEAT_INTERVAL_S, ...); user memory stays in-process.
+    """
+    old = {name: getattr(app_module, name) for name in settings}
+    old_log = user_memory._log
+    for name, value in settings.items():
+        setattr(app_module, name, value)
+    user_memory._log = None
+    try:
+        yield TestClient(app_module.app)
+    finally:
+        for name, value in old.items():
+            setattr(app_module, name, value)
+        user_memory._log = old_log
+
+
+def _hello(ws, user_id):
+    ws.send_json(dict(STORE, type="hello", user_id=user_id))
+    assert ws.receive_json() == {"type": "ready"}
+
+
+def test_streamed_turn():
+    with serve_fake_ollama(latency_ms=50, tokens_per_s=200), _client() as client:
+        with client.websocket_connect("/ws/chat") as ws:
+            ws.send_json({"type": "chat", "id": 0, "message": QUESTION})
+            assert ws.receive_json() == {"type": "error", "error": "send hello first"}
+            _hello(ws, "ws_stream_user")
+
+            ws.send_json({"type": "chat", "id": 1, "message": QUESTION})
+            deltas = []
+            while True:
+                msg = ws.receive_json()
+                if msg["type"] != "delta":
+                    break
+                assert msg["id"] == 1
+                deltas.append(msg["text"])
+            assert msg["type"] == "final" and msg["id"] == 1
+            assert len(deltas) > 1 and "".join(deltas) == msg["reply"]
+            assert msg["selected_store"]["id"] == "store_101"
+
+
+def test_heartbeat_and_idle_close():
+    with _client(WS_HEARTBEAT_INTERVAL_S=0.05, WS_IDLE_TIMEOUT_S=0.3) as client:
+        with client.websocket_connect("/ws/chat") as ws:
+            ws.send_json({"type": "ping"})
+            assert ws.receive_json() == {"type": "pong"}
+            assert ws.receive_json() == {"type": "ping"}
+            # The client never answers: closed as idle after the timeout
+            try:
+                while True:
+                    assert ws.receive_json() == {"type": "ping"}
+            except WebSocketDisconnect as e:
+                assert e.code == 1001
+
+
+def test_pending_turns_are_capped():
+    with serve_fake_ollama(latency_ms=200), _client(WS_MAX_PENDING_TURNS=1) as client:
+        with client.websocket_connect("/ws/chat") as ws:
+            _hello(ws, "ws_busy_user")
+            for turn_id in range(1, 5):
+                ws.send_json({"type": "chat", "id": turn_id, "message": f"{QUESTION} ({turn_id})"})
+            results = {}
+            while len(results) < 4:
+                msg = ws.receive_json()
+                if msg["type"] in ("final", "error"):
+                    results[msg["id"]] = msg
+            busy = [i for i, msg in results.items() if msg["type"] == "error"]
+            # One turn running, one queued, the rest turned away
+            assert len(busy) >= 2 and all(results[i]["error"] == "busy" for i in busy)
+            assert results[1]["type"] == "final"
+
+
+def test_disconnect_mid_turn_cleans_up():
+    metrics.reset()
+    with serve_fake_ollama(latency_ms=300), _client() as client:
+        with client.websocket_connect("/ws/chat") as ws:
+            _hello(ws, "ws_gone_user")
+            ws.send_json({"type": "chat", "id": 1, "message": QUESTION})
+        # Left mid-turn: the connection's worker / heartbeat tasks are gone
+        assert metrics.get_counter("ws.opened") == metrics.get_counter("ws.closed") == 1
+        assert client.get("/metrics").json()["ws_open"] == 0
+
+        # And the endpoint still serves new connections
+        with client.websocket_connect("/ws/chat") as ws:
+            _hello(ws, "ws_gone_user")
+
+
+if __name__ == "__main__":
+    test_streamed_turn()
+    test_heartbeat_and_idle_close()
+    test_pending_turns_are_capped()
+    test_disconnect_mid_turn_cleans_up()
+    print("WebSocket chat OK")